@@ -55,6 +55,7 @@ def cache_agent(state):
     flight_cols = [col[0] for col in cur.description]
     flight_rows = cur.fetchall()
     flights = [dict(zip(flight_cols, row)) for row in flight_rows]
+    conn.close()
 
     # Cache hit only if BOTH hotels and flights exist
     if len(hotels) > 0 and len(flights) > 0:
@@ -1,17 +1,123 @@
-
+import os
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, wait
 from agents.tools.serp_tools import (
-    search_google_sights, 
-    search_google_local, 
-    search_google_news, 
-    search_google_discussions
+    search_google_sights,
+    search_google_local,
+    search_google_news,
+    search_google_discussions,
+    asearch_google_sights,
+    asearch_google_local,
+    asearch_google_news,
+    asearch_google_discussions
 )
 from utils.logger import setup_logger
+from utils.metrics import metrics
 
 logger = setup_logger("community_agent")
 
+# The four engines are independent, so they run concurrently. Each gets the
+# same deadline; widgets are built from whatever finished in time.
+COMMUNITY_FETCH_TIMEOUT = float(os.getenv("COMMUNITY_FETCH_TIMEOUT_SECONDS", "8"))
+
+# Shared pool for the sync path. Late calls keep running here after the node
+# has moved on (their responses still land in the SerpAPI cache).
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("COMMUNITY_FETCH_WORKERS", "16")),
+    thread_name_prefix="community",
+)
+
+def _sight_widgets(sights):
+    # Top Sights -> Place Cards (first 3)
+    return [{
+        "type": "place_card",
+        "priority": 10,
+        "data": {
+            "name": sight.get("title") or sight.get("name"),
+            "type": "Sightseeing",
+            "rating": sight.get("rating"),
+            "reviews": sight.get("reviews"),
+            "address": sight.get("address"),
+            "thumbnail": sight.get("thumbnail")
+        }
+    } for sight in sights[:3]]
+
+def _gem_widgets(gems):
+    # Local Gems -> Place Cards
+    return [{
+        "type": "place_card",
+        "priority": 8,
+        "data": {
+            "name": gem.get("title"),
+            "type": "Local Gem",
+            "rating": gem.get("rating"),
+            "thumbnail": gem.get("thumbnail")
+        }
+    } for gem in gems[:3]]
+
+def _news_widgets(news_items):
+    # Local News -> News Widgets
+    return [{
+        "type": "news_card",
+        "priority": 5,
+        "data": {
+            "title": news.get("title"),
+            "snippet": news.get("snippet"),
+            "link": news.get("link"),
+            "source": news.get("source"),
+            "date": news.get("date"),
+            "thumbnail": news.get("thumbnail")
+        }
+    } for news in news_items[:3]]
+
+def _searches(location):
+    """Source -> (sync search, async search, query, state field, widget builder)."""
+    return {
+        "sights": (search_google_sights, asearch_google_sights, location, "top_sights", _sight_widgets),
+        "local": (search_google_local, asearch_google_local, location, "local_places", _gem_widgets),
+        "news": (search_google_news, asearch_google_news, f"latest travel news {location}", "local_news", _news_widgets),
+        # Discussions are not widgetized yet, but stored
+        "discussions": (search_google_discussions, asearch_google_discussions, location, "discussions", None),
+    }
+
+def _record_latency(source, started):
+    elapsed = round(time.perf_counter() - started, 3)
+    metrics.observe(f"community.{source}.seconds", elapsed)
+    return elapsed
+
+def _timed(source, func, query, timings):
+    started = time.perf_counter()
+    try:
+        return func(query)
+    finally:
+        timings[source] = _record_latency(source, started)
+
+def _apply(state, searches, results, timings):
+    """Copy finished results onto the state and build their widgets."""
+    widgets = []
+    for source, (_, _, _, field, to_widgets) in searches.items():
+        if source not in results:
+            continue
+        setattr(state, field, results[source])
+        if to_widgets:
+            widgets.extend(to_widgets(results[source]))
+    # Per-source wall time, e.g. {"community_agent.news": 2.4}
+    state.node_timings = {f"community_agent.{source}": t for source, t in timings.items()}
+    logger.info(f"⏱️ Community sources: {timings}")
+    return widgets
+
+def _finish(state, widgets):
+    # Sort widgets by priority
+    widgets.sort(key=lambda x: x["priority"], reverse=True)
+    state.generated_ui = widgets
+
+    logger.info(f"✅ Generated {len(widgets)} UI widgets.")
+    return state
+
 def fetch_community_data(state):
     """
-    Fetch Sights, Local Gems, News, and Discussions and format as Dynamic Widgets.
+    Fetch Sights, Local Gems, News, and Discussions concurrently and format as Dynamic Widgets.
     """
     location = state.destination_city or state.destination or ""
     if not location:
@@ -19,78 +125,68 @@ def fetch_community_data(state):
         return state
 
     logger.info(f"🏘️ Fetching community data for: {location}")
-    
-    widgets = []
 
-    # 1. Top Sights -> Place Cards
-    try:
-        sights = search_google_sights(location)
-        state.top_sights = sights
-        # Convert first 3 to widgets
-        for sight in sights[:3]:
-            widgets.append({
-                "type": "place_card",
-                "priority": 10,
-                "data": {
-                    "name": sight.get("title") or sight.get("name"),
-                    "type": "Sightseeing",
-                    "rating": sight.get("rating"),
-                    "reviews": sight.get("reviews"),
-                    "address": sight.get("address"),
-                    "thumbnail": sight.get("thumbnail")
-                }
-            })
-    except Exception as e:
-        logger.error(f"Failed sights search: {e}")
-
-    # 2. Local Gems -> Place Cards
-    try:
-        gems = search_google_local(location)
-        state.local_places = gems
-        for gem in gems[:3]:
-             widgets.append({
-                "type": "place_card",
-                "priority": 8,
-                "data": {
-                    "name": gem.get("title"),
-                    "type": "Local Gem",
-                    "rating": gem.get("rating"),
-                    "thumbnail": gem.get("thumbnail")
-                }
-            })
-    except Exception as e:
-        logger.error(f"Failed local search: {e}")
-
-    # 3. Local News -> News Widgets
-    try:
-        news_items = search_google_news(f"latest travel news {location}")
-        state.local_news = news_items
-        for news in news_items[:3]:
-             widgets.append({
-                "type": "news_card",
-                "priority": 5,
-                "data": {
-                    "title": news.get("title"),
-                    "snippet": news.get("snippet"),
-                    "link": news.get("link"),
-                    "source": news.get("source"),
-                    "date": news.get("date"),
-                    "thumbnail": news.get("thumbnail")
-                }
-            })
-    except Exception as e:
-        logger.error(f"Failed news search: {e}")
-
-    # 4. Discussions (not widgetized yet, but stored)
-    try:
-        state.discussions = search_google_discussions(location)
-    except Exception as e:
-        logger.error(f"Failed discussion search: {e}")
-        
-    # Sort widgets by priority
-    widgets.sort(key=lambda x: x["priority"], reverse=True)
-    state.generated_ui = widgets
-    
-    logger.info(f"✅ Generated {len(widgets)} UI widgets.")
+    searches = _searches(location)
+    timings = {}
+    futures = {
+        _executor.submit(_timed, source, func, query, timings): source
+        for source, (func, _, query, _, _) in searches.items()
+    }
+    done, pending = wait(futures, timeout=COMMUNITY_FETCH_TIMEOUT)
+    timings = dict(timings)  # late calls keep writing to the shared dict
 
-    return state
+    results = {}
+    for future in done:
+        source = futures[future]
+        try:
+            results[source] = future.result()
+        except Exception as e:
+            logger.error(f"Failed {source} search: {e}")
+    for future in pending:
+        source = futures[future]
+        metrics.incr(f"community.{source}.timeout")
+        timings[source] = COMMUNITY_FETCH_TIMEOUT
+        logger.warning(f"⚠️ {source} search timed out after {COMMUNITY_FETCH_TIMEOUT}s. Skipping.")
+
+    return _finish(state, _apply(state, searches, results, timings))
+
+async def afetch_community_data(state):
+    """
+    Async variant of fetch_community_data.
+    """
+    location = state.destination_city or state.destination or ""
+    if not location:
+        logger.warning("⚠️ No destination found for community search.")
+        return state
+
+    logger.info(f"🏘️ Fetching community data for: {location}")
+
+    searches = _searches(location)
+    timings = {}
+
+    async def run(source, afunc, query):
+        started = time.perf_counter()
+        try:
+            return await asyncio.wait_for(afunc(query), COMMUNITY_FETCH_TIMEOUT)
+        except asyncio.TimeoutError:
+            metrics.incr(f"community.{source}.timeout")
+            logger.warning(f"⚠️ {source} search timed out after {COMMUNITY_FETCH_TIMEOUT}s. Skipping.")
+            raise
+        finally:
+            timings[source] = _record_latency(source, started)
+
+    outcomes = await asyncio.gather(
+        *(run(source, afunc, query) for source, (_, afunc, query, _, _) in searches.items()),
+        return_exceptions=True,
+    )
+
+    results = {}
+    for source, outcome in zip(searches, outcomes):
+        if isinstance(outcome, asyncio.TimeoutError):
+            continue
+        if isinstance(outcome, Exception):
+            logger.error(f"Failed {source} search: {outcome}")
+            continue
+        results[source] = outcome
+
+    return _finish(state, _apply(state, searches, results, timings))
@@ -2,10 +2,19 @@ from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 from pydantic import BaseModel, Field
-from typing import List
-from agents.tools.serp_tools import search_google_flights
+from typing import List, Optional
+from collections import OrderedDict
+import hashlib
+import os
+import re
+import threading
+from agents.tools.serp_tools import search_google_flights, asearch_google_flights
+from utils.cache import TieredCache
 from utils.logger import setup_logger
 from utils.llm_factory import get_llm
+from utils.llm_cache import CachedChain
+from utils.metrics import metrics
+from state import DEFAULT_USER_ID
 
 logger = setup_logger("flight_agent")
 
@@ -13,7 +22,7 @@ class AirlinePreferences(BaseModel):
     preferred_airlines: List[str] = Field(default_factory=list, description="List of preferred airline names (e.g., 'Delta', 'United')")
     excluded_airlines: List[str] = Field(default_factory=list, description="List of airlines to avoid (e.g., 'Spirit', 'Ryanair')")
 
-llm = get_llm(temperature=0)
+llm = get_llm(temperature=0, route="airline_prefs")
 parser = JsonOutputParser(pydantic_object=AirlinePreferences)
 
 preference_prompt = ChatPromptTemplate.from_messages([
@@ -38,7 +47,146 @@ preference_prompt = ChatPromptTemplate.from_messages([
     ("user", "Extract preferences.")
 ])
 
-chain = preference_prompt | llm | parser
+chain = CachedChain("airline_prefs", preference_prompt, llm, parser)
+
+def _airline_pattern(names: List[str]) -> Optional["re.Pattern"]:
+    names = [n.strip().lower() for n in names if n and n.strip()]
+    return re.compile("|".join(re.escape(n) for n in names), re.IGNORECASE) if names else None
+
+
+class AirlineProfile:
+    """
+    A user's AirlinePreferences compiled to match patterns, so filtering and
+    boosting flights is plain in-process matching.
+    """
+
+    def __init__(self, prefs: AirlinePreferences):
+        self.prefs = prefs
+        self._excluded = _airline_pattern(prefs.excluded_airlines)
+        self._preferred = _airline_pattern(prefs.preferred_airlines)
+
+    def apply(self, flights):
+        if self._excluded:
+            original_count = len(flights)
+            flights = [f for f in flights if not self._excluded.search(f.get('airline', ''))]
+            if len(flights) < original_count:
+                logger.info(f"🚫 Filtered {original_count - len(flights)} flights based on exclusion list: {self.prefs.excluded_airlines}")
+
+        if self._preferred:
+            # boost preferred (stable sort keeps price order within each group)
+            logger.info(f"✨ Boosting airlines: {self.prefs.preferred_airlines}")
+            flights.sort(key=lambda x: bool(self._preferred.search(x.get('airline', ''))), reverse=True)
+
+        return flights
+
+# Memories that can shape airline preferences. Everything else (interests,
+# trip summaries saved after each plan, whatever the contextual search
+# happened to return) is left out of the profile, so it doesn't recompile
+# per route or per plan. Deliberately broad: a missed airline memory is
+# worse than an extra recompile.
+AIRLINE_MEMORY = re.compile(
+    r"\b(?:airlines?|airways|air ?lines?|airports?|fly|flying|flew|flights?|carriers?|alliance|star alliance|"
+    r"oneworld|skyteam|low[- ]cost|economy|business class|first class|layovers?|non-?stop|direct|"
+    r"delta|united|american|spirit|frontier|ryanair|easyjet|southwest|jetblue|alaska|lufthansa|air canada|"
+    r"ana|singapore|turkish|british|cathay|qantas|air france|klm|korean|emirates|qatar|etihad)\b",
+    re.IGNORECASE)
+TRIP_MEMORY = re.compile(r"^\s*(?:user )?planned a trip\b", re.IGNORECASE)   # see graph._memory_text
+
+def airline_memories(memories: List[str]) -> List[str]:
+    """The memories an airline profile is built from, de-duplicated and in a stable order."""
+    return sorted({m.strip() for m in memories or [] if AIRLINE_MEMORY.search(m) and not TRIP_MEMORY.match(m)})
+
+# Extracted preferences are shared by every worker through the disk tier;
+# compiled profiles are kept per user in-process.
+PROFILE_CACHE_SIZE = 1024
+AIRLINE_PROFILE_TTL = float(os.getenv("AIRLINE_PROFILE_TTL_SECONDS", str(30 * 24 * 60 * 60)))
+_profiles: "OrderedDict[str, tuple]" = OrderedDict()
+_profiles_lock = threading.Lock()
+
+def _default_profile_cache():
+    if os.getenv("AIRLINE_PROFILE_CACHE_ENABLED", "true").lower() == "false":
+        return None
+    return TieredCache(
+        "airline_profiles",
+        path=os.getenv("AIRLINE_PROFILE_CACHE_PATH", ".cache/airline_profiles.sqlite"),
+        max_entries=PROFILE_CACHE_SIZE,
+        max_disk_entries=int(os.getenv("AIRLINE_PROFILE_CACHE_MAX_DISK_ENTRIES", "20000")),
+    )
+
+_profile_cache = _default_profile_cache()
+
+def set_profile_cache(cache) -> None:
+    """Swap the shared airline preference cache (a TieredCache or compatible); None disables it."""
+    global _profile_cache
+    _profile_cache = cache
+
+def _memories_hash(memories: List[str]) -> str:
+    # The extraction prompt / model is part of the key, like CachedChain's
+    return hashlib.sha1("\n".join([getattr(chain, "version", ""), *memories]).encode()).hexdigest()
+
+def _cached_profile(user_id: str, digest: str) -> Optional[AirlineProfile]:
+    with _profiles_lock:
+        entry = _profiles.get(user_id)
+        if entry and entry[0] == digest:
+            _profiles.move_to_end(user_id)
+            metrics.incr("airline_profile.hit")
+            return entry[1]
+    shared = _profile_cache.get(f"airline_profile:{digest}") if _profile_cache is not None else None
+    if shared is not None:
+        metrics.incr("airline_profile.shared_hit")
+        return _remember_profile(user_id, digest, shared, store=False)
+    return None
+
+def _remember_profile(user_id: str, digest: str, result: dict, store: bool = True) -> AirlineProfile:
+    prefs = AirlinePreferences(**result)
+    profile = AirlineProfile(prefs)
+    metrics.incr("airline_profile.compiled")
+    if store and _profile_cache is not None:
+        try:
+            _profile_cache.set(f"airline_profile:{digest}", prefs.model_dump(), AIRLINE_PROFILE_TTL)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not cache airline preferences: {e}")
+    with _profiles_lock:
+        _profiles[user_id] = (digest, profile)
+        _profiles.move_to_end(user_id)
+        while len(_profiles) > PROFILE_CACHE_SIZE:
+            _profiles.popitem(last=False)
+    return profile
+
+def airline_profile(state) -> AirlineProfile:
+    """The user's compiled airline profile; extracted by the LLM only when their airline memories changed."""
+    memories = airline_memories(state.user_preferences)
+    user_id, digest = state.user_id or DEFAULT_USER_ID, _memories_hash(memories)
+    profile = _cached_profile(user_id, digest)
+    if profile is None:
+        result = {}
+        if memories:
+            logger.info("🧠 Analyzing airline preferences with LLM...")
+            result = chain.invoke({"memories": "\n".join(memories)})
+        profile = _remember_profile(user_id, digest, result)
+    return profile
+
+async def aairline_profile(state) -> AirlineProfile:
+    """Async variant of airline_profile."""
+    memories = airline_memories(state.user_preferences)
+    user_id, digest = state.user_id or DEFAULT_USER_ID, _memories_hash(memories)
+    profile = _cached_profile(user_id, digest)
+    if profile is None:
+        result = {}
+        if memories:
+            logger.info("🧠 Analyzing airline preferences with LLM...")
+            result = await chain.ainvoke({"memories": "\n".join(memories)})
+        profile = _remember_profile(user_id, digest, result)
+    return profile
+
+def _apply_flights(state, flights):
+    if flights:
+        logger.info(f"✅ Found {len(flights)} flights from SerpAPI.")
+        state.flights = flights
+    else:
+        logger.warning("⚠️ No flights found via SerpAPI.")
+        state.flights = []
+    return state
 
 def fetch_flights_from_api(state):
     """
@@ -50,34 +198,26 @@ def fetch_flights_from_api(state):
     # Smart Filter with Mem0
     if state.user_preferences and flights:
         try:
-            memories_text = "\n".join(state.user_preferences)
-            logger.info("🧠 Analyzing airline preferences with LLM...")
-            
-            result = chain.invoke({"memories": memories_text})
-            prefs = AirlinePreferences(**result)
-            
-            # Application Logic
-            if prefs.excluded_airlines:
-                original_count = len(flights)
-                flights = [f for f in flights if not any(ex.lower() in f.get('airline', '').lower() for ex in prefs.excluded_airlines)]
-                if len(flights) < original_count:
-                    logger.info(f"🚫 Filtered {original_count - len(flights)} flights based on exclusion list: {prefs.excluded_airlines}")
-
-            if prefs.preferred_airlines:
-                # boost preferred
-                logger.info(f"✨ Boosting airlines: {prefs.preferred_airlines}")
-                # Create a score: 1 if preferred, 0 if not. Sort desc.
-                flights.sort(key=lambda x: any(p.lower() in x.get('airline', '').lower() for p in prefs.preferred_airlines), reverse=True)
+            flights = airline_profile(state).apply(flights)
                 
         except Exception as e:
             logger.error(f"Preference extraction failed: {e}")
             # Fallback: maintain original order
 
-    if flights:
-        logger.info(f"✅ Found {len(flights)} flights from SerpAPI.")
-        state.flights = flights
-    else:
-        logger.warning("⚠️ No flights found via SerpAPI.")
-        state.flights = []
-        
-    return state
\ No newline at end of file
+    return _apply_flights(state, flights)
+
+async def afetch_flights_from_api(state):
+    """
+    Async variant of fetch_flights_from_api.
+    """
+    logger.info(f"✈️ Searching flights from {state.origin} to {state.destination}...")
+    flights = await asearch_google_flights(state.model_dump())
+
+    if state.user_preferences and flights:
+        try:
+            flights = (await aairline_profile(state)).apply(flights)
+
+        except Exception as e:
+            logger.error(f"Preference extraction failed: {e}")
+
+    return _apply_flights(state, flights)
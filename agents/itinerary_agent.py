@@ -1,28 +1,37 @@
 
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
+from langchain_core.output_parsers import StrOutputParser, JsonOutputParser
 import os
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+from langgraph.config import get_stream_writer
 from utils.logger import setup_logger
 from utils.llm_factory import get_llm
+from utils.metrics import metrics
 
 logger = setup_logger("itinerary_agent")
 
-def generate_itinerary(state):
-    """
-    Generate a day-by-day itinerary based on the user's trip details 
-    and the selected/found accommodations and flights.
-    """
-    
-    logger.info("📝 Generating itinerary...")
-    
-    llm = get_llm(temperature=0.7)
-    
-    # Prepare context
-    hotels_str = "\n".join([f"- {h.get('name')} in {h.get('city')} (${h.get('price')}/night)" for h in state.accommodations[:3]])
-    flights_str = "\n".join([f"- {f.get('airline')} (${f.get('price')})" for f in state.flights[:2]])
-    
- 
+ITINERARY_FALLBACK = "Could not generate itinerary at this time."
+
+# Streamed text is forwarded in chunks: at paragraph breaks, or once this many
+# characters are pending (keeps websocket messages few but the first one early)
+STREAM_FLUSH_CHARS = int(os.getenv("ITINERARY_STREAM_FLUSH_CHARS", "200"))
+
+# Generation engine: "single" (one prompt for the whole trip), "parallel"
+# (day skeleton, then every day concurrently) or "auto" (parallel from
+# ITINERARY_PARALLEL_MIN_DAYS days on, where one prompt gets slow)
+ITINERARY_MODE = os.getenv("ITINERARY_MODE", "auto").lower()
+PARALLEL_MIN_DAYS = int(os.getenv("ITINERARY_PARALLEL_MIN_DAYS", "4"))
+
+# Chains are built once per process; their clients come from llm_factory's shared registry
+@lru_cache(maxsize=None)
+def _itinerary_chain():
+    llm = get_llm(temperature=0.7, route="itinerary")
+
     prompt = ChatPromptTemplate.from_messages([
         (
             "system",
@@ -130,8 +139,13 @@ def generate_itinerary(state):
     ])
 
     
-    chain = prompt | llm | StrOutputParser()
-    
+    return prompt | llm | StrOutputParser()
+
+def _itinerary_inputs(state) -> dict:
+    # Prepare context
+    hotels_str = "\n".join([f"- {h.get('name')} in {h.get('city')} (${h.get('price')}/night)" for h in state.accommodations[:3]])
+    flights_str = "\n".join([f"- {f.get('airline')} (${f.get('price')})" for f in state.flights[:2]])
+
     # Construct age context string
     age_context = "Unknown"
     if state.travel_party == "solo":
@@ -139,29 +153,307 @@ def generate_itinerary(state):
     elif state.travel_party == "group":
         age_context = f"Ages {state.group_age_min}-{state.group_age_max}" if state.group_age_min else "Mixed Group"
 
+    return {
+        "destination": state.destination,
+        "origin": state.origin,
+        "start_date": state.start_date,
+        "end_date": state.end_date,
+        "trip_purpose": state.trip_purpose or "vacation",
+        "travel_party": state.travel_party or "solo",
+        "age_context": age_context,
+        "transportation_mode": state.transportation_mode or "public",
+        "budget": state.budget or "Flexible",
+        "accessibility_needs": state.accessibility_needs or "None",
+        "location_scope": state.location_scope or "Domestic",
+        "travel_pace": state.travel_pace or "Moderate",
+        "interests": state.interests or "General sightseeing",
+        "hotels": hotels_str,
+        "flights": flights_str
+    }
+
+def _trip_days(state) -> int:
+    try:
+        start = datetime.strptime(str(state.start_date)[:10], "%Y-%m-%d")
+        end = datetime.strptime(str(state.end_date)[:10], "%Y-%m-%d")
+    except (TypeError, ValueError):
+        return 0
+    return max(0, (end - start).days + 1)
+
+def _use_parallel(state) -> bool:
+    days = _trip_days(state)
+    if ITINERARY_MODE == "single" or days < 2:
+        return False
+    return ITINERARY_MODE == "parallel" or days >= PARALLEL_MIN_DAYS
+
+# Shared by the per-day prompts (parallel engine)
+TRIP_CONTEXT = """
+            ────────────────────────────
+            TRIP DETAILS
+            ────────────────────────────
+            - Origin: {origin}
+            - Destination: {destination}
+            - Dates: {start_date} to {end_date} ({num_days} days)
+            - Purpose of Travel: {trip_purpose}
+            - Travelers: {travel_party} ({age_context})
+            - Accessibility or Disability Needs: {accessibility_needs}
+            - Budget (total or per person): ${budget}
+            - Transportation Preference: {transportation_mode}
+            - Location Type: {location_scope}
+            - Travel Pace: {travel_pace}
+            - Interests: {interests}
+
+            Hotels:
+            {hotels}
+
+            Flights / Trains / Buses / Rental Cars:
+            {flights}
+"""
+
+DAY_PLAN = """
+            ────────────────────────────
+            DAY PLAN (one area per day, already decided)
+            ────────────────────────────
+            {skeleton}
+"""
+
+@lru_cache(maxsize=None)
+def _skeleton_chain():
+    llm = get_llm(temperature=0.3, route="itinerary_skeleton")
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", """
+            You are a Travel Route Planner.
+
+            Task: Split the trip into days and give each day ONE compact area or
+            cluster of nearby sights, so the days can be planned independently.
+            """ + TRIP_CONTEXT + """
+            Rules:
+            1. Day 1 is the arrival day and the last day is the departure day: keep them light and close to the hotel.
+            2. Cluster nearby locations; do not send two days to the same area unless the city is small.
+            3. Respect the travel pace, accessibility needs and interests.
+
+            Return JSON: {{"days": [{{"day": 1, "date": "YYYY-MM-DD", "area": "...", "focus": "..."}}]}}
+            with exactly {num_days} entries.
+            """),
+        ("user", "Plan the day skeleton.")
+    ])
+    return prompt | llm | JsonOutputParser()
+
+@lru_cache(maxsize=None)
+def _day_chain():
+    llm = get_llm(temperature=0.7, route="itinerary_day")
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", """
+            You are a production-grade AI Travel Planner writing ONE day of a
+            multi-day itinerary. Other days are written in parallel from the same day plan.
+            """ + TRIP_CONTEXT + DAY_PLAN + """
+            ────────────────────────────
+            YOUR DAY
+            ────────────────────────────
+            Day {day} of {num_days} ({date}): {area} ({focus})
+            {day_role}
+
+            Include:
+            - Morning / Afternoon / Evening structure
+            - Key attractions and activities in this area only
+            - How to get there (walk / metro / bus / taxi / car) and approximate travel times
+            - Nearby food options
+            - Rest or buffer time when needed
+            - Estimated local transport costs (rough ranges are fine)
+
+            Do NOT invent unavailable flights, hotels, or attractions.
+            Start with the heading "## Day {day}: {area}", then bullet points.
+            Do not write an introduction or closing summary.
+            """),
+        ("user", "Write this day.")
+    ])
+    return prompt | llm | StrOutputParser()
+
+@lru_cache(maxsize=None)
+def _closing_chain():
+    llm = get_llm(temperature=0.7, route="itinerary_closing")
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", """
+            You are a production-grade AI Travel Planner. The day-by-day plan below
+            (including arrival and departure) is being written separately; write only
+            the closing sections.
+            """ + TRIP_CONTEXT + DAY_PLAN + """
+            Write, with these headings:
+            ## Best Times & Weather Considerations
+            ## Traveler Profile Summary
+            ## Why This Works
+            ## Swap or Refresh Suggestions
+
+            Bullet points, friendly professional tone. Do not repeat the daily schedules.
+            """),
+        ("user", "Write the closing sections.")
+    ])
+    return prompt | llm | StrOutputParser()
+
+def _skeleton_days(result, num_days: int) -> list:
+    days = (result or {}).get("days") if isinstance(result, dict) else result
+    if not days:
+        raise ValueError("empty day skeleton")
+    days = list(days)[:num_days]
+    # Pad a short skeleton so every day of the trip gets a section
+    for i in range(len(days), num_days):
+        days.append({"area": "Flexible", "focus": "Free exploration or revisit favourites"})
+    return days
+
+def _section_calls(inputs: dict, days: list) -> list:
+    """(chain, inputs) for every day plus the closing sections, in output order."""
+    inputs = dict(inputs, skeleton="\n".join(
+        f"- Day {i}: {d.get('area')} ({d.get('focus')})" for i, d in enumerate(days, 1)))
+    day_chain = _day_chain()
+    calls = []
+    for i, d in enumerate(days, 1):
+        role = ""
+        if i == 1:
+            role = "Arrival day: start with the arrival & check-in plan."
+        elif i == len(days):
+            role = "Departure day: end with the departure plan (check-out, getting to the airport or station)."
+        calls.append((day_chain, dict(inputs, day=i, date=d.get("date") or "", area=d.get("area") or "Flexible",
+                                      focus=d.get("focus") or "", day_role=role)))
+    calls.append((_closing_chain(), inputs))
+    return calls
+
+def _parallel_inputs(state) -> dict:
+    return dict(_itinerary_inputs(state), num_days=_trip_days(state))
+
+def _generate_by_day(state, stream) -> str:
+    inputs = _parallel_inputs(state)
+    days = _skeleton_days(_skeleton_chain().invoke(inputs), inputs["num_days"])
+    calls = _section_calls(inputs, days)
+    with ThreadPoolExecutor(max_workers=len(calls)) as pool:
+        futures = [pool.submit(chain.invoke, call_inputs) for chain, call_inputs in calls]
+        # Forward sections in order: each one as soon as it and all before it are done
+        for future in futures:
+            stream.add(future.result().strip() + "\n\n")
+    return stream.text().strip()
+
+async def _agenerate_by_day(state, stream) -> str:
+    inputs = _parallel_inputs(state)
+    days = _skeleton_days(await _skeleton_chain().ainvoke(inputs), inputs["num_days"])
+    tasks = [asyncio.create_task(chain.ainvoke(call_inputs)) for chain, call_inputs in _section_calls(inputs, days)]
+    try:
+        for task in tasks:
+            stream.add((await task).strip() + "\n\n")
+    except Exception:
+        for task in tasks:
+            task.cancel()
+        raise
+    return stream.text().strip()
+
+def _stream_writer():
     try:
-        result = chain.invoke({
-            "destination": state.destination,
-            "origin": state.origin,
-            "start_date": state.start_date,
-            "end_date": state.end_date,
-            "trip_purpose": state.trip_purpose or "vacation",
-            "travel_party": state.travel_party or "solo",
-            "age_context": age_context,
-            "transportation_mode": state.transportation_mode or "public",
-            "budget": state.budget or "Flexible",
-            "accessibility_needs": state.accessibility_needs or "None",
-            "location_scope": state.location_scope or "Domestic",
-            "travel_pace": state.travel_pace or "Moderate",
-            "interests": state.interests or "General sightseeing",
-            "hotels": hotels_str,
-            "flights": flights_str
-        })
+        return get_stream_writer()
+    except Exception:
+        return None   # called outside a graph run (e.g. the refinement loop)
+
+class _ItineraryStream:
+    """
+    Collects streamed tokens into the full itinerary and forwards chunks to
+    the graph's "custom" stream as {"type": "itinerary_chunk", "text": ...}.
+    reset() tells the client to drop what it was sent ({"type": "itinerary_reset"}).
+    """
+
+    def __init__(self):
+        self.writer = _stream_writer()
+        self.parts = []
+        self.pending = ""
+        self.emitted = False
+        self.started = time.perf_counter()
+        self.first_token = None
+
+    def add(self, token: str) -> None:
+        if not token:
+            return
+        if self.first_token is None:
+            self.first_token = time.perf_counter()
+            metrics.observe("itinerary.ttft_seconds", self.first_token - self.started)
+        self.parts.append(token)
+        self.pending += token
+        # Paragraph break (possibly split across two tokens) or enough text
+        if "\n\n" in self.pending[-(len(token) + 1):] or len(self.pending) >= STREAM_FLUSH_CHARS:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.pending and self.writer is not None:
+            self.writer({"type": "itinerary_chunk", "text": self.pending})
+            metrics.incr("itinerary.stream_chunks")
+            self.emitted = True
+        self.pending = ""
+
+    def reset(self) -> None:
+        """Discard the text so far (e.g. a failed per-day run before the single-call fallback)."""
+        if self.emitted:
+            self.writer({"type": "itinerary_reset"})
+        self.parts, self.pending, self.emitted = [], "", False
+
+    def text(self) -> str:
+        self.flush()
+        metrics.observe("itinerary.total_seconds", time.perf_counter() - self.started)
+        return "".join(self.parts)
+
+def generate_itinerary(state):
+    """
+    Generate a day-by-day itinerary based on the user's trip details 
+    and the selected/found accommodations and flights.
+    """
+    
+    logger.info("📝 Generating itinerary...")
+
+    stream = _ItineraryStream()
+    try:
+        if _use_parallel(state):
+            try:
+                state.itinerary = _generate_by_day(state, stream)
+                metrics.incr("itinerary.mode.parallel")
+                logger.info(f"✅ Itinerary generated day by day ({_trip_days(state)} days).")
+                return state
+            except Exception as e:
+                logger.warning(f"⚠️ Per-day generation failed ({e}). Falling back to a single call.")
+                stream.reset()
+
+        for token in _itinerary_chain().stream(_itinerary_inputs(state)):
+            stream.add(token)
         
-        state.itinerary = result
+        state.itinerary = stream.text()
+        metrics.incr("itinerary.mode.single")
         logger.info("✅ Itinerary generated.")
     except Exception as e:
         logger.error(f"⚠️ Error creating itinerary: {e}")
-        state.itinerary = "Could not generate itinerary at this time."
+        stream.reset()      # drop partial text already sent to the client
+        state.itinerary = ITINERARY_FALLBACK
         
     return state
+
+async def agenerate_itinerary(state):
+    """
+    Async variant of generate_itinerary.
+    Tokens are streamed to the client while the full text is assembled.
+    """
+    logger.info("📝 Generating itinerary...")
+
+    stream = _ItineraryStream()
+    try:
+        if _use_parallel(state):
+            try:
+                state.itinerary = await _agenerate_by_day(state, stream)
+                metrics.incr("itinerary.mode.parallel")
+                logger.info(f"✅ Itinerary generated day by day ({_trip_days(state)} days).")
+                return state
+            except Exception as e:
+                logger.warning(f"⚠️ Per-day generation failed ({e}). Falling back to a single call.")
+                stream.reset()
+
+        async for token in _itinerary_chain().astream(_itinerary_inputs(state)):
+            stream.add(token)
+        state.itinerary = stream.text()
+        metrics.incr("itinerary.mode.single")
+        logger.info("✅ Itinerary generated.")
+    except Exception as e:
+        logger.error(f"⚠️ Error creating itinerary: {e}")
+        stream.reset()      # drop partial text already sent to the client
+        state.itinerary = ITINERARY_FALLBACK
+
+    return state
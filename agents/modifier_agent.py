@@ -3,9 +3,12 @@ from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 from pydantic import BaseModel, Field
 from typing import Optional, List
-from state import TravelState
+import re
+from state import TravelState, DEFAULT_USER_ID
 from utils.memory import MemoryManager
 from utils.llm_factory import get_llm
+from utils.llm_cache import CachedChain
+from utils.metrics import metrics
 
 class StateUpdate(BaseModel):
     """
@@ -18,6 +21,8 @@ class StateUpdate(BaseModel):
     interests: Optional[List[str]] = Field(None, description="Updated list of interests")
     trip_purpose: Optional[str] = Field(None, description="Updated trip purpose")
     bedrooms: Optional[int] = Field(None, description="Updated number of bedrooms")
+    start_date: Optional[str] = Field(None, description="Updated trip start date (YYYY-MM-DD)")
+    end_date: Optional[str] = Field(None, description="Updated trip end date (YYYY-MM-DD)")
     
     # New Field for Memory
     new_preference: Optional[str] = Field(None, description="Any permanent user preference extracted from the feedback (e.g., 'User hates hostels', 'User prefers Delta')")
@@ -26,7 +31,7 @@ class StateUpdate(BaseModel):
     rerun_hotels: bool = Field(False, description="True if hotel preferences changed")
     rerun_itinerary: bool = Field(False, description="True if itinerary preferences changed (pace, interests, purpose)")
 
-llm = get_llm(temperature=0)
+llm = get_llm(temperature=0, route="modifier")
 
 parser = JsonOutputParser(pydantic_object=StateUpdate)
 
@@ -45,7 +50,8 @@ prompt = ChatPromptTemplate.from_messages([
     2. Map it to the `StateUpdate` schema fields.
     3. Set `rerun_hotels` to True if price, rating, or bedrooms change.
     4. Set `rerun_itinerary` to True if pace, interests, or purpose change.
-    5. If the user expresses a general preference, extract it into `new_preference` using a structured format like "Category: [Value]".
+    5. If the user moves the trip, set `start_date` / `end_date` (YYYY-MM-DD).
+    6. If the user expresses a general preference, extract it into `new_preference` using a structured format like "Category: [Value]".
        - Example: "Airline: Delta Only"
        - Example: "Hotel: No Hostels"
        - Example: "Food: Vegetarian options required"
@@ -55,52 +61,161 @@ prompt = ChatPromptTemplate.from_messages([
     ("user", "{user_message}")
 ])
 
-chain = prompt | llm | parser
+chain = CachedChain("modifier", prompt, llm, parser)
+
+def _summary(state: TravelState) -> dict:
+    # Create a simplified dict representation for the LLM
+    return {
+        "max_price": state.max_price_per_night,
+        "min_rating": state.min_rating,
+        "bedrooms": state.bedrooms,
+        "pace": state.travel_pace,
+        "interests": state.interests,
+        "purpose": state.trip_purpose,
+        "start_date": state.start_date,
+        "end_date": state.end_date
+    }
+
+# Fast path: common refinements parsed by rule, without the LLM.
+# Each rule is (pattern, handler(match, state) -> StateUpdate fields).
+NUMBER_WORDS = {"one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6}
+PRICE_STEP = 0.75          # "cheaper" = 25% lower max price, "pricier" = 1 / PRICE_STEP higher
+
+def _number(text: str) -> float:
+    return float(NUMBER_WORDS.get(text.lower(), text))
+
+def _rating(value: float) -> dict:
+    return {"min_rating": value, "rerun_hotels": True} if 1 <= value <= 5 else None
+
+# A price cap is only read after an explicit cap qualifier
+PRICE_CAP = r"(?:under|below|less than|max(?:imum)?(?: of)?|up to|at most|no more than|budget of|<=|≤)"
+
+# Price floors ("min $100", "over 150") are left to the LLM
+PRICE_FLOOR = re.compile(r"(?:\bmin(?:imum)?|\bat least|\bover|\babove|\bmore than|\bstarting at|>=|≥)\s*(?:\$\s*)?\d{2,}",
+                         re.IGNORECASE)
+
+# Star caps ("max 3 stars", "3 stars maximum", "only 3 stars") are left to the LLM
+RATING_CAP = re.compile(
+    r"(?:\bmax(?:imum)?|\bat most|\bup to|\bunder|\bbelow|\bless than|\bno more than|\bonly)\s*(?:of\s*)?"
+    r"\d(?:\.\d)?\s*(?:\+|[- ]?stars?)"
+    r"|\d(?:\.\d)?\s*[- ]?stars?\s*(?:max(?:imum)?|at most|only|or (?:less|lower|fewer|below))\b",
+    re.IGNORECASE)
+
+FEEDBACK_RULES = [
+    (PRICE_CAP + r"\s*\$?\s*(\d{2,})(?:\s*(?:dollars|usd))?",
+     lambda m, s: {"max_price_per_night": float(m.group(1)), "rerun_hotels": True}),
+    (r"\b(?:cheaper|less expensive|more affordable|lower (?:the )?(?:price|budget)|budget)\b",
+     lambda m, s: {"max_price_per_night": round((s.max_price_per_night or 200) * PRICE_STEP), "rerun_hotels": True}),
+    (r"\b(?:pricier|more expensive|higher budget|bigger budget|increase (?:the )?budget|splurge)\b",
+     lambda m, s: {"max_price_per_night": round((s.max_price_per_night or 200) / PRICE_STEP), "rerun_hotels": True}),
+    (r"(?:at least|minimum(?: of)?|min)\s*(\d(?:\.\d)?)(?![\d.])(?:\s*[- ]?stars?)?|(\d(?:\.\d)?)\s*(?:\+|[- ]?stars?)(?:\s*(?:minimum|min|or (?:more|better|above|higher)|and up|plus))?",
+     lambda m, s: _rating(float(m.group(1) or m.group(2)))),
+    (r"\b(?:better|higher)[- ]rated\b|\bbetter reviews\b",
+     lambda m, s: _rating(min(5.0, (s.min_rating or 4.0) + 0.5))),
+    (r"\b(\d|one|two|three|four|five|six)\s*[- ]?(?:bedrooms?|br|beds?)\b",
+     lambda m, s: {"bedrooms": int(_number(m.group(1))), "rerun_hotels": True}),
+    (r"\b(?:relaxed|slower|slow|chill|laid[- ]back|leisurely|less (?:rushed|hectic|packed)|easier)\b",
+     lambda m, s: {"travel_pace": "Relaxed", "rerun_itinerary": True}),
+    (r"\b(?:faster|fast|busier|hectic|action[- ]packed|more (?:packed|active|intense))\b",
+     lambda m, s: {"travel_pace": "Hectic", "rerun_itinerary": True}),
+    # Only with pace context: "moderate price hotels" is not about pace
+    (r"\b(?:moderate|balanced|normal)\s+(?:pace|speed|schedule|itinerary)\b|\b(?:pace|speed|schedule)\s+(?:to be |should be )?(?:moderate|balanced|normal)\b",
+     lambda m, s: {"travel_pace": "Moderate", "rerun_itinerary": True}),
+    (r"\b(business|honeymoon|family|vacation)\s+trip\b|\bit'?s (?:a |an |for )?(business|honeymoon|family|vacation)\b",
+     lambda m, s: {"trip_purpose": (m.group(1) or m.group(2)).lower(), "rerun_itinerary": True}),
+]
+FEEDBACK_RULES = [(re.compile(pattern, re.IGNORECASE), handler) for pattern, handler in FEEDBACK_RULES]
+
+# Words that may surround a rule match without making the request ambiguous
+FILLER_WORDS = set("""
+a an the and or but also please pls make it its it's i i'd id want would like need show me us we find give get
+can could you let's lets to be go for of with some something more much bit little rather instead just only
+hotel hotels option options place places stay stays room rooms pace trip itinerary price prices per night nights
+star stars rating rated minimum min max maximum now then too ok okay thanks thank
+""".split())
+
+def parse_feedback(state: TravelState, message: str) -> Optional[StateUpdate]:
+    """
+    StateUpdate for common refinements ("cheaper hotels", "4 stars minimum",
+    "more relaxed pace", "2 bedrooms"), or None when any part of the message
+    is not understood and the LLM should decide.
+    """
+    if PRICE_FLOOR.search(message) or RATING_CAP.search(message):
+        return None
+    fields, rest = {}, message
+    for pattern, handler in FEEDBACK_RULES:
+        for match in pattern.finditer(rest):
+            update = handler(match, state)
+            if update is None:
+                return None
+            for key, value in update.items():
+                if key in fields and fields[key] != value and not key.startswith("rerun_"):
+                    return None         # contradictory ("cheaper ... $300 max")
+                fields[key] = value
+        rest = pattern.sub(" ", rest)
+    leftover = [w for w in re.findall(r"[a-z']+|\d+", rest.lower()) if w not in FILLER_WORDS]
+    if not fields or leftover:
+        return None
+    return StateUpdate(**fields)
+
+def feedback_stats() -> dict:
+    rules, llm_calls = metrics.counter("modifier.rules"), metrics.counter("modifier.llm")
+    total = rules + llm_calls
+    return {"rules": rules, "llm": llm_calls, "local_rate": round(rules / total, 3) if total else 0.0}
+
+metrics.register_gauge("modifier", feedback_stats)
+
+def _fast_updates(state: TravelState, message: str) -> Optional[StateUpdate]:
+    updates = parse_feedback(state, message)
+    metrics.incr(f"modifier.{'rules' if updates else 'llm'}")
+    return updates
+
+def _apply_updates(state: TravelState, updates: StateUpdate) -> TravelState:
+    new_state = state.copy()
+    
+    if updates.max_price_per_night is not None:
+         new_state.max_price_per_night = updates.max_price_per_night
+    if updates.min_rating is not None:
+         new_state.min_rating = updates.min_rating
+    if updates.bedrooms is not None:
+         new_state.bedrooms = updates.bedrooms
+    if updates.start_date:
+         new_state.start_date = updates.start_date
+    if updates.end_date:
+         new_state.end_date = updates.end_date
+    
+    if updates.travel_pace:
+         new_state.travel_pace = updates.travel_pace
+    if updates.interests:
+         new_state.interests = updates.interests
+    if updates.trip_purpose:
+         new_state.trip_purpose = updates.trip_purpose
+
+    if updates.new_preference:
+        # Update local state too so it's used immediately
+        new_state.user_preferences = new_state.user_preferences + [updates.new_preference]
+
+    return new_state
 
 def modify_state(state: TravelState, message: str) -> tuple[TravelState, dict]:
     """
     Updates the state based on message.
     Returns (updated_state, diff_dict)
     """
-    # 1. Run LLM
+    # 1. Parse by rule, else run LLM
     try:
-        # Create a simplified dict representation for the LLM
-        current_summary = {
-            "max_price": state.max_price_per_night,
-            "min_rating": state.min_rating,
-            "bedrooms": state.bedrooms,
-            "pace": state.travel_pace,
-            "interests": state.interests,
-            "purpose": state.trip_purpose
-        }
-        
-        result = chain.invoke({"current_state": str(current_summary), "user_message": message})
-        updates = StateUpdate(**result)
+        updates = _fast_updates(state, message)
+        if updates is None:
+            updates = StateUpdate(**chain.invoke({"current_state": str(_summary(state)), "user_message": message}))
         
         # 2. Apply updates
-        new_state = state.copy()
-        
-        if updates.max_price_per_night is not None:
-             new_state.max_price_per_night = updates.max_price_per_night
-        if updates.min_rating is not None:
-             new_state.min_rating = updates.min_rating
-        if updates.bedrooms is not None:
-             new_state.bedrooms = updates.bedrooms
-        
-        if updates.travel_pace:
-             new_state.travel_pace = updates.travel_pace
-        if updates.interests:
-             new_state.interests = updates.interests
-        if updates.trip_purpose:
-             new_state.trip_purpose = updates.trip_purpose
+        new_state = _apply_updates(state, updates)
              
         # 3. Handle Memory
         if updates.new_preference:
             mem_mgr = MemoryManager()
-            user_id = "default_user" # Should come from state in real app
+            user_id = state.user_id or DEFAULT_USER_ID
             mem_mgr.add_memory(user_id, updates.new_preference)
-            # Update local state too so it's used immediately
-            new_state.user_preferences.append(updates.new_preference)
              
         return new_state, updates.dict()
         
@@ -108,4 +223,22 @@ def modify_state(state: TravelState, message: str) -> tuple[TravelState, dict]:
         print(f"Error modifying state: {e}")
         return state, {}
 
+async def amodify_state(state: TravelState, message: str) -> tuple[TravelState, dict]:
+    """
+    Async variant of modify_state.
+    """
+    try:
+        updates = _fast_updates(state, message)
+        if updates is None:
+            updates = StateUpdate(**await chain.ainvoke({"current_state": str(_summary(state)), "user_message": message}))
 
+        new_state = _apply_updates(state, updates)
+
+        if updates.new_preference:
+            await MemoryManager().aadd_memory(state.user_id or DEFAULT_USER_ID, updates.new_preference)
+
+        return new_state, updates.dict()
+
+    except Exception as e:
+        print(f"Error modifying state: {e}")
+        return state, {}
@@ -5,17 +5,14 @@ from state import TravelState
 from utils.logger import logger
 
 from utils.llm_factory import get_llm
+from functools import lru_cache
 
-llm = get_llm(temperature=0.7)
+llm = get_llm(temperature=0.7, route="reasoning")
 
-def reasoning_node(state: TravelState):
-    """
-    Analyzes the complete trip and provides a qualitative "Agent Note".
-    """
-    logger.info("🧠 Reasoning Agent: Analyzing final trip...")
-    
-    validation_issues = ", ".join(state.constraint_violations) if state.constraint_violations else "None"
-    
+REASONING_FALLBACK = "Trip generated successfully."
+
+@lru_cache(maxsize=None)
+def _reasoning_chain():
     prompt = ChatPromptTemplate.from_messages([
         ("system", """
         You are a Helpful Travel Assistant Reviewer.
@@ -38,18 +35,42 @@ def reasoning_node(state: TravelState):
         ("user", "Analyze this trip.")
     ])
     
-    chain = prompt | llm | StrOutputParser()
+    return prompt | llm | StrOutputParser()
+
+def _reasoning_inputs(state: TravelState) -> dict:
+    validation_issues = ", ".join(state.constraint_violations) if state.constraint_violations else "None"
+    return {
+        "destination": state.destination,
+        "num_flights": len(state.flights),
+        "num_hotels": len(state.accommodations),
+        "issues": validation_issues,
+        "weather": state.weather_summary or "Unknown"
+    }
+
+def reasoning_node(state: TravelState):
+    """
+    Analyzes the complete trip and provides a qualitative "Agent Note".
+    """
+    logger.info("🧠 Reasoning Agent: Analyzing final trip...")
     
     try:
-        note = chain.invoke({
-            "destination": state.destination,
-            "num_flights": len(state.flights),
-            "num_hotels": len(state.accommodations),
-            "issues": validation_issues,
-            "weather": state.weather_summary or "Unknown"
-        })
+        note = _reasoning_chain().invoke(_reasoning_inputs(state))
+        logger.info(f"🧠 Generated Note: {note}")
+        return {"trip_analysis": note}
+    except Exception as e:
+        logger.error(f"Reasoning failed: {e}")
+        return {"trip_analysis": REASONING_FALLBACK}
+
+async def areasoning_node(state: TravelState):
+    """
+    Async variant of reasoning_node.
+    """
+    logger.info("🧠 Reasoning Agent: Analyzing final trip...")
+
+    try:
+        note = await _reasoning_chain().ainvoke(_reasoning_inputs(state))
         logger.info(f"🧠 Generated Note: {note}")
         return {"trip_analysis": note}
     except Exception as e:
         logger.error(f"Reasoning failed: {e}")
-        return {"trip_analysis": "Trip generated successfully."}
+        return {"trip_analysis": REASONING_FALLBACK}
@@ -15,27 +15,34 @@ def _google_hotel_search_url(name: str, city: str, country: Optional[str] = None
     return f"https://www.google.com/search?q={quote_plus(q)}"
 
 
+def _number(value) -> float:
+    try:
+        return float(value or 0.0)
+    except Exception:
+        return 0.0
+
+def _within_limits(h, max_price, min_rating) -> bool:
+    # Unknown price / rating (0) never excludes a hotel
+    price = _number(h.get("price") or h.get("price_per_night"))
+    rating = _number(h.get("rating"))
+    if max_price and price and price > max_price:
+        return False
+    if min_rating and rating and rating < min_rating:
+        return False
+    return True
+
 def recommend_hotels(state):
     """
-    Sort accommodations by rating (desc), then price (asc),
-    and pick top 5. Also replaces dummy URLs with real
-    Google Search URLs for each hotel.
+    Keep hotels within the max price / min rating (all of them if none fit),
+    sort by rating (desc), then price (asc), and pick top 5. Also replaces
+    dummy URLs with real Google Search URLs for each hotel.
     """
     hotels = state.accommodations or []
+    hotels = [h for h in hotels if _within_limits(h, state.max_price_per_night, state.min_rating)] or hotels
 
     def score(h):
-        rating = h.get("rating") or 0.0
-        price = h.get("price") or h.get("price_per_night") or 0.0
-        try:
-            rating_f = float(rating)
-        except Exception:
-            rating_f = 0.0
-        try:
-            price_f = float(price)
-        except Exception:
-            price_f = 0.0
         # Higher rating, lower price
-        return (-rating_f, price_f)
+        return (-_number(h.get("rating")), _number(h.get("price") or h.get("price_per_night")))
 
     hotels_sorted = sorted(hotels, key=score)
     top_hotels = hotels_sorted[:5]
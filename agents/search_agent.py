@@ -1,23 +1,20 @@
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from agents.tools.serp_tools import search_google_hotels
+from agents.tools.serp_tools import search_google_hotels, asearch_google_hotels
 from utils.logger import setup_logger
 from utils.llm_factory import get_llm
+from utils.llm_cache import CachedChain
+from utils.metrics import metrics
+from functools import lru_cache
+from typing import Optional
+import re
 
 logger = setup_logger("search_agent")
-llm = get_llm(temperature=0)
+llm = get_llm(temperature=0, route="hotel_query")
 
-def live_search(state):
-    """
-    Search for accommodations using SerpAPI (Google Hotels) with personalized query.
-    """
-    dest = state.destination
-    city_name = state.destination_city or dest
-    
-    # Include user preferences from Mem0
-    preferences_text = "\n".join(state.user_preferences) if state.user_preferences else "None"
-    
+@lru_cache(maxsize=None)
+def _query_chain():
     prompt = ChatPromptTemplate.from_messages([
         ("system", """
         You are a Hotel Search Expert.
@@ -41,39 +38,145 @@ def live_search(state):
         ("user", "Genereate query.")
     ])
     
-    chain = prompt | llm | StrOutputParser()
+    return CachedChain("hotel_query", prompt, llm, StrOutputParser())
+
+def _query_inputs(state) -> dict:
+    # Include user preferences from Mem0
+    preferences_text = "\n".join(state.user_preferences) if state.user_preferences else "None"
+    return {
+        "destination": state.destination,
+        "city": state.destination_city or state.destination,
+        "budget": state.max_price_per_night,
+        "party": state.travel_party,
+        "rating": state.min_rating,
+        "preferences": preferences_text
+    }
+
+# Preference phrases the query builder maps without the LLM -> Google Hotels keywords
+AMENITY_KEYWORDS = [
+    (re.compile(r"\b(gym|fitness)"), "gym"),
+    (re.compile(r"\bpools?\b"), "pool"),
+    (re.compile(r"\bspa\b"), "spa"),
+    (re.compile(r"\bpets?\b|\bdogs?\b|\bcats?\b|pet[- ]friendly"), "pet friendly"),
+    (re.compile(r"wi-?fi|internet"), "free wifi"),
+    (re.compile(r"breakfast"), "breakfast included"),
+    (re.compile(r"parking"), "parking"),
+    (re.compile(r"kitchen"), "kitchen"),
+    (re.compile(r"beach"), "near beach"),
+    (re.compile(r"city cent(er|re)|downtown"), "city center"),
+    (re.compile(r"boutique"), "boutique"),
+    (re.compile(r"luxury|5[- ]star|five[- ]star"), "luxury"),
+    (re.compile(r"family[- ]friendly|\bkids\b|children"), "family friendly"),
+    (re.compile(r"air[- ]?con"), "air conditioning"),
+    (re.compile(r"wheelchair|accessib"), "wheelchair accessible"),
+]
+
+# "Category: value" preferences (see modifier_agent) that never shape a hotel query
+NON_HOTEL_CATEGORIES = {"airline", "flight", "flights", "seat", "food", "dining", "diet", "activity", "activities"}
+
+# "Category: value" preferences that are explicitly about the stay
+HOTEL_CATEGORIES = {"hotel", "hotels", "accommodation", "stay", "lodging"}
+
+# Words an uncategorized preference may contain besides amenity keywords
+# ("Needs a pool and gym"); anything else (e.g. a saved trip summary) goes to the LLM
+HOTEL_FILLER_WORDS = set("""
+a an the and with near needs need want wants prefer prefers preferred likes like i user my must have has
+hotel hotels room rooms access free included friendly please always
+""".split())
+
+# Exclusions ("no hostels", "avoid chains") need the LLM's judgement
+NEGATION = re.compile(r"\b(no|not|avoid|never|without|hate|don'?t|dislike)\b")
+
+def rule_based_query(state) -> Optional[str]:
+    """
+    Hotel query for the common cases (no preferences, or only known amenity
+    keywords) without an LLM call. Keywords are only taken from explicit
+    "Hotel:" preferences or preferences made of nothing but keywords; None
+    when a preference needs the LLM.
+    """
+    terms = []
+    for preference in state.user_preferences:
+        text = preference.lower().strip()
+        category, _, value = text.partition(":")
+        if value and category.strip() in NON_HOTEL_CATEGORIES:
+            continue
+        if NEGATION.search(text):
+            return None
+        matched = [keyword for pattern, keyword in AMENITY_KEYWORDS if pattern.search(text)]
+        if not matched:
+            return None
+        if not (value and category.strip() in HOTEL_CATEGORIES):
+            rest = text
+            for pattern, _ in AMENITY_KEYWORDS:
+                rest = pattern.sub(" ", rest)
+            if any(w not in HOTEL_FILLER_WORDS for w in re.findall(r"[a-z']+", rest)):
+                return None
+        terms += [k for k in matched if k not in terms]
+    city = state.destination_city or state.destination
+    return " ".join([f"hotels in {city}", *terms])
+
+def hotel_query_stats() -> dict:
+    rules, llm_calls = metrics.counter("hotel_query.rules"), metrics.counter("hotel_query.llm")
+    total = rules + llm_calls
+    return {"rules": rules, "llm": llm_calls, "llm_skip_rate": round(rules / total, 3) if total else 0.0}
+
+metrics.register_gauge("hotel_query", hotel_query_stats)
+
+def _rule_query(state) -> Optional[str]:
+    query = rule_based_query(state)
+    metrics.incr(f"hotel_query.{'rules' if query else 'llm'}")
+    return query
+
+def _search_params(state, query: str) -> dict:
+    # We need to pass this query to serp_tools. 
+    # Updating state temporarily or passing explicit arg if tool supports it.
+    # Check serp_tools.py to see if it accepts a custom 'q' or uses state fields.
+    # Assuming we need to override the implicit query construction in serp_tools
+    # For now, let's create a temporary state dict with a 'custom_query' or just pass it.
+    # Looking at serp_tools logic (previous context), it uses params.get("q").
+    params = state.dict()
+    params["q"] = query # Override default query construction
+    return params
+
+def _apply_hotels(state, hotels):
+    if hotels:
+        logger.info(f"✅ Found {len(hotels)} hotels from SerpAPI.")
+        state.accommodations = hotels
+    else:
+        logger.warning("⚠️ No hotels found via SerpAPI.")
+        state.accommodations = []
+    return state
+
+def live_search(state):
+    """
+    Search for accommodations using SerpAPI (Google Hotels) with personalized query.
+    """
     try:
-        query = chain.invoke({
-            "destination": dest,
-            "city": city_name,
-            "budget": state.max_price_per_night,
-            "party": state.travel_party,
-            "rating": state.min_rating,
-            "preferences": preferences_text
-        })
+        query = _rule_query(state) or _query_chain().invoke(_query_inputs(state))
         logger.info(f"🔎 Generated Query: {query}")
         
-        # We need to pass this query to serp_tools. 
-        # Updating state temporarily or passing explicit arg if tool supports it.
-        # Check serp_tools.py to see if it accepts a custom 'q' or uses state fields.
-        # Assuming we need to override the implicit query construction in serp_tools
-        # For now, let's create a temporary state dict with a 'custom_query' or just pass it.
-        # Looking at serp_tools logic (previous context), it uses params.get("q").
-        
-        params = state.dict()
-        params["q"] = query # Override default query construction
-        
-        hotels = search_google_hotels(params)
-        
-        if hotels:
-            logger.info(f"✅ Found {len(hotels)} hotels from SerpAPI.")
-            state.accommodations = hotels
-        else:
-            logger.warning("⚠️ No hotels found via SerpAPI.")
-            state.accommodations = []
+        hotels = search_google_hotels(_search_params(state, query))
+        _apply_hotels(state, hotels)
             
     except Exception as e:
         logger.error(f"Search failed: {e}")
         state.accommodations = []
 
-    return state
\ No newline at end of file
+    return state
+
+async def alive_search(state):
+    """
+    Async variant of live_search (ainvoke + async SerpAPI client).
+    """
+    try:
+        query = _rule_query(state) or await _query_chain().ainvoke(_query_inputs(state))
+        logger.info(f"🔎 Generated Query: {query}")
+
+        hotels = await asearch_google_hotels(_search_params(state, query))
+        _apply_hotels(state, hotels)
+
+    except Exception as e:
+        logger.error(f"Search failed: {e}")
+        state.accommodations = []
+
+    return state
@@ -0,0 +1,186 @@
+import os
+import csv
+import bisect
+import threading
+import unicodedata
+from typing import List, Dict, Any, Optional
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+DEFAULT_AIRPORTS_PATH = os.path.join(os.path.dirname(__file__), "data", "airports.csv")
+
+def normalize(text: str) -> str:
+    """Lowercase, strip accents and punctuation, collapse whitespace."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c if c.isalnum() else " " for c in text if not unicodedata.combining(c))
+    return " ".join(text.lower().split())
+
+def _word_suffixes(text: str) -> List[str]:
+    # "Paris Charles de Gaulle Airport" is also found by "charles", "gaulle", ...
+    words = normalize(text).split()
+    return [" ".join(words[i:]) for i in range(len(words))]
+
+class AirportIndex:
+    """
+    In-process prefix index over airports and cities.
+
+    Keys live in a sorted list and prefix lookups are two bisects, so a
+    keystroke costs microseconds. Suggestions use the same shape as
+    `_parse_autocomplete` so the frontend cannot tell the sources apart.
+    """
+
+    def __init__(self, max_learned: int = 5000):
+        self.max_learned = max_learned
+        self._keys: List[str] = []
+        self._refs: List[tuple] = []     # (rank, entry_idx), parallel to _keys
+        self._entries: List[Dict[str, Any]] = []
+        self._by_id: Dict[str, int] = {}
+        self._exact: Dict[str, int] = {}
+        self._city_airports: Dict[int, List[int]] = {}
+        self._learned = 0
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_csv(cls, path: str = DEFAULT_AIRPORTS_PATH, **kwargs) -> "AirportIndex":
+        """Build the index from a bundled `iata,name,city,country,aliases` file."""
+        index = cls(**kwargs)
+        try:
+            with open(path, newline="", encoding="utf-8") as f:
+                rows = list(csv.DictReader(f))
+        except OSError as e:
+            logger.warning(f"⚠️ Airport dataset unavailable ({e}). Index starts empty.")
+            return index
+
+        # Multi-airport cities get a comma-joined ID ("JFK,LGA,EWR"), which
+        # Google Flights accepts as departure_id / arrival_id.
+        cities: Dict[tuple, Dict[str, Any]] = {}
+        for row in rows:
+            city = cities.setdefault((row["city"], row["country"]), {"rows": [], "aliases": []})
+            city["rows"].append(row)
+            city["aliases"] += [a for a in (row.get("aliases") or "").split("|") if a]
+
+        for (city_name, country), city in cities.items():
+            if len(city["rows"]) == 1:
+                # Single-airport city: the airport itself answers city queries
+                row = city["rows"][0]
+                index._add_airport(row["iata"], row["name"], city_name, country, None,
+                                   extra_keys=[city_name] + city["aliases"])
+                continue
+            codes = ",".join(row["iata"] for row in city["rows"])
+            city_idx = index._add_city(codes, city_name, country, city["aliases"])
+            for row in city["rows"]:
+                index._add_airport(row["iata"], row["name"], city_name, country, city_idx)
+
+        logger.info(f"🛫 Airport index loaded: {len(index._entries)} entries from {path}")
+        return index
+
+    def _add_entry(self, entry: Dict[str, Any], full_keys: List[str], suffix_keys: List[str]) -> int:
+        idx = len(self._entries)
+        self._entries.append(entry)
+        self._by_id[entry["id"]] = idx
+        for rank, keys in ((0, full_keys), (1, suffix_keys)):
+            for key in keys:
+                if not key:
+                    continue
+                pos = bisect.bisect_right(self._keys, key)
+                self._keys.insert(pos, key)
+                self._refs.insert(pos, (rank, idx))
+                if rank == 0:
+                    self._exact.setdefault(key, idx)
+        return idx
+
+    def _add_city(self, city_id: str, name: str, country: str, aliases: List[str]) -> int:
+        entry = {"id": city_id, "name": name, "city_name": name, "country": country, "type": "City",
+                 "code": city_id if len(city_id) == 3 and city_id.isupper() else None}
+        full = [normalize(name)] + [normalize(a) for a in aliases]
+        suffixes = [s for s in _word_suffixes(name)[1:] if s not in full]
+        idx = self._add_entry(entry, full, suffixes)
+        self._city_airports[idx] = []
+        return idx
+
+    def _add_airport(self, code: str, name: str, city_name: str, country: str, city_idx: Optional[int],
+                     extra_keys: Optional[List[str]] = None) -> int:
+        entry = {"id": code, "name": f"{name} ({code})", "city_name": city_name, "country": country,
+                 "code": code, "type": "Airport"}
+        full = [code.lower(), normalize(name)] + [normalize(k) for k in extra_keys or []]
+        suffixes = [s for s in _word_suffixes(name)[1:] if s not in full]
+        idx = self._add_entry(entry, full, suffixes)
+        if city_idx is not None:
+            self._city_airports.setdefault(city_idx, []).append(idx)
+        return idx
+
+    def learn(self, suggestions: List[Dict[str, Any]]) -> int:
+        """Add SerpAPI autocomplete suggestions not yet indexed. Returns the number added."""
+        added = 0
+        with self._lock:
+            city_idx = None
+            for s in suggestions:
+                raw_id = s.get("id")
+                if not raw_id or self._learned >= self.max_learned:
+                    continue
+                if s.get("type") == "City":
+                    city_idx = self._by_id.get(raw_id)
+                    if city_idx is None:
+                        city_idx = self._add_city(raw_id, s.get("name") or "", "", [])
+                        added += 1
+                elif raw_id not in self._by_id:
+                    name = (s.get("name") or "").replace(f"({raw_id})", "").strip()
+                    self._add_airport(raw_id, name, s.get("city_name") or "", "", city_idx)
+                    added += 1
+            self._learned += added
+        if added:
+            logger.info(f"🧠 Airport index learned {added} new entries")
+        return added
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Prefix search: cities are followed by their airports, exact codes rank first."""
+        q = normalize(query)
+        if not q:
+            return []
+        with self._lock:
+            lo = bisect.bisect_left(self._keys, q)
+            hi = bisect.bisect_left(self._keys, q + "\uffff")
+            best: Dict[int, tuple] = {}
+            for rank, idx in self._refs[lo:hi]:
+                exact = 0 if self._entries[idx].get("code", "") and self._entries[idx]["code"].lower() == q else 1
+                score = (exact, rank, idx)
+                if idx not in best or score < best[idx]:
+                    best[idx] = score
+
+            results, seen = [], set()
+            for idx in sorted(best, key=best.get):
+                for member in [idx] + self._city_airports.get(idx, []):
+                    if member not in seen:
+                        seen.add(member)
+                        results.append(self._public(self._entries[member]))
+                if len(results) >= limit:
+                    break
+        return results[:limit]
+
+    def resolve(self, name: str) -> Optional[str]:
+        """
+        Exact lookup of a city/airport name or IATA code to a flight ID
+        ("Paris" -> "CDG,ORY", "heathrow airport" -> "LHR"). None if unknown.
+        """
+        candidates = [name]
+        if name and "," in name:
+            candidates.append(name.split(",")[0])   # "Paris, France"
+        with self._lock:
+            for candidate in candidates:
+                idx = self._exact.get(normalize(candidate))
+                if idx is not None:
+                    return self._entries[idx]["id"]
+        return None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _public(entry: Dict[str, Any]) -> Dict[str, Any]:
+        return {k: entry[k] for k in ("id", "name", "city_name", "code", "type")}
+
+airport_index = AirportIndex.from_csv(
+    os.getenv("AIRPORT_DATA_PATH", DEFAULT_AIRPORTS_PATH),
+    max_learned=int(os.getenv("AIRPORT_INDEX_MAX_LEARNED", "5000")),
+)
@@ -1,6 +1,8 @@
 import os
 import json
-from typing import List, Dict, Any
+import time
+import hashlib
+from typing import List, Dict, Any, Optional
 from serpapi import GoogleSearch
 from dotenv import load_dotenv
 from utils.logger import setup_logger
@@ -8,48 +10,211 @@ from utils.logger import setup_logger
 load_dotenv()
 logger = setup_logger()
 from utils.retry import with_retry
-
-@with_retry(max_retries=3, backoff_factor=2)
-def search_google_flights(full_state: Dict[str, Any]) -> List[Dict[str, Any]]:
+from utils.http_client import get_async_client
+from utils.cache import TieredCache
+from utils.metrics import metrics
+from agents.tools.airport_index import airport_index, normalize
+
+SERPAPI_ENDPOINT = "https://serpapi.com/search.json"
+
+MINUTE, HOUR, DAY = 60, 60 * 60, 24 * 60 * 60
+
+# Response cache TTL per SerpAPI engine (seconds).
+# Prices move within minutes; sights, places and forums change over days.
+SERP_CACHE_TTLS = {
+    "google_flights": 15 * MINUTE,
+    "google_hotels": 30 * MINUTE,
+    "google_flights_autocomplete": 7 * DAY,
+    "google": 3 * DAY,         # top sights + discussions
+    "google_local": 3 * DAY,
+    "google_news": 3 * HOUR,
+}
+DEFAULT_SERP_TTL = HOUR
+
+def _default_serp_cache():
+    if os.getenv("SERP_CACHE_ENABLED", "true").lower() == "false":
+        return None
+    return TieredCache(
+        "serp",
+        path=os.getenv("SERP_CACHE_PATH", ".cache/serp_cache.sqlite"),
+        max_entries=int(os.getenv("SERP_CACHE_MAX_ENTRIES", "512")),
+        max_disk_entries=int(os.getenv("SERP_CACHE_MAX_DISK_ENTRIES", "20000")),
+    )
+
+_serp_cache = _default_serp_cache()
+
+def set_serp_cache(cache) -> None:
     """
-    Search for flights using SerpAPI Google Flights engine.
+    Swap the response cache backend. Any object with get(key) / set(key, value, ttl)
+    works (e.g. a Redis-backed cache); pass None to disable caching.
     """
-    if not os.getenv("SERPAPI_KEY"):
-        logger.error("SERPAPI_KEY not found in environment")
-        return []
+    global _serp_cache
+    _serp_cache = cache
+
+def serp_cache_key(params: Dict[str, Any]) -> str:
+    """Cache key from normalized params (api_key stripped, case/whitespace folded)."""
+    normalized = {
+        k: " ".join(str(v).split()).lower()
+        for k, v in params.items()
+        if k != "api_key" and v not in (None, "")
+    }
+    digest = hashlib.sha256(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+    return f"{params.get('engine', 'unknown')}:{digest}"
+
+def _cache_lookup(params: Dict[str, Any]):
+    if _serp_cache is None:
+        return None, None
+    key = serp_cache_key(params)
+    results = _serp_cache.get(key)
+    outcome = "hit" if results is not None else "miss"
+    metrics.incr(f"serp_cache.{params.get('engine')}.{outcome}")
+    return key, results
+
+def _cache_store(key: str, params: Dict[str, Any], results: Dict[str, Any]) -> None:
+    # Never cache errors (quota, bad params) so the next call retries upstream
+    if key is None or _serp_cache is None or "error" in results:
+        return
+    _serp_cache.set(key, results, SERP_CACHE_TTLS.get(params.get("engine"), DEFAULT_SERP_TTL))
+
+def _serp_search(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Blocking SerpAPI request (used by the sync tools)."""
+    key, results = _cache_lookup(params)
+    if results is not None:
+        return results
+    results = GoogleSearch(params).get_dict()
+    _cache_store(key, params, results)
+    return results
+
+async def _aserp_search(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Non-blocking SerpAPI request over the shared async HTTP client."""
+    key, results = _cache_lookup(params)
+    if results is not None:
+        return results
+    client = get_async_client()
+    resp = await client.get(SERPAPI_ENDPOINT, params=params)
+    results = resp.json()
+    _cache_store(key, params, results)
+    return results
+
+def _is_iata(val):
+    return len(val) == 3 and val.isupper()
+
+def _is_valid_id(val):
+    """IATA code, comma-separated IATA codes (multi-airport city) or Google Knowledge Graph ID (/m/...)."""
+    return val and (all(_is_iata(code) for code in val.split(",")) or val.startswith("/m/"))
+
+# Name -> flight ID resolutions (including "no match") are kept much longer
+# than raw autocomplete responses and shared by all workers via the disk tier.
+LOCATION_ID_TTL = 30 * DAY
+LOCATION_MISS_TTL = DAY
+
+def _default_location_cache():
+    if os.getenv("SERP_CACHE_ENABLED", "true").lower() == "false":
+        return None
+    return TieredCache(
+        "location_ids",
+        path=os.getenv("LOCATION_CACHE_PATH", ".cache/location_ids.sqlite"),
+        max_entries=2048,
+        max_disk_entries=int(os.getenv("LOCATION_CACHE_MAX_DISK_ENTRIES", "50000")),
+    )
+
+_location_cache = _default_location_cache()
+
+def _location_key(raw_id: str) -> str:
+    return f"location:{normalize(raw_id)}"
+
+def _known_location(raw_id: str):
+    """
+    (True, id) if the name was resolved before (id is None for a cached miss),
+    (False, None) if SerpAPI has to be asked.
+    """
+    new_id = airport_index.resolve(raw_id)
+    metrics.incr(f"airport_index.resolve.{'hit' if new_id else 'miss'}")
+    if new_id:
+        logger.info(f"✅ Resolved '{raw_id}' -> '{new_id}' (airport index)")
+        return True, new_id
+
+    if _location_cache is None:
+        return False, None
+    entry = _location_cache.get(_location_key(raw_id))
+    metrics.incr(f"location_cache.{'hit' if entry is not None else 'miss'}")
+    if entry is None:
+        return False, None
+    if entry["id"]:
+        logger.info(f"✅ Resolved '{raw_id}' -> '{entry['id']}' (cached)")
+    return True, entry["id"]
+
+def known_location_id(raw_id: str) -> Optional[str]:
+    """Flight ID for a name from the index or resolution cache only (never calls SerpAPI)."""
+    if not raw_id or _is_valid_id(raw_id):
+        return raw_id or None
+    return _known_location(raw_id)[1]
+
+def _remember_location(raw_id: str, results: Dict[str, Any]) -> Optional[str]:
+    """Cache the top autocomplete suggestion (or the miss) and return its ID."""
+    if "error" in results and "returned any results" not in results["error"]:
+        # Quota / auth errors are not a real "no match"; ask again next time
+        logger.error(f"SerpAPI Autocomplete Error: {results['error']}")
+        return None
+
+    suggestions = _parse_autocomplete(results)
+    top = suggestions[0] if suggestions else None
+    if _location_cache is not None:
+        _location_cache.set(
+            _location_key(raw_id),
+            {"id": top and top.get("id"), "suggestion": top, "resolved_at": time.time()},
+            LOCATION_ID_TTL if top else LOCATION_MISS_TTL,
+        )
+    if top:
+        logger.info(f"✅ Resolved '{raw_id}' -> '{top.get('id')}'")
+        return top.get("id")
+    logger.warning(f"⚠️ No location match for '{raw_id}'")
+    return None
+
+def resolve_location_id(raw_id: str) -> str:
+    """
+    Resolve a location name to a flight ID: offline airport index, then the
+    persistent resolution cache, then SerpAPI autocomplete.
+    Names that cannot be resolved are returned unchanged.
+    """
+    if not raw_id or _is_valid_id(raw_id):
+        return raw_id
+    found, new_id = _known_location(raw_id)
+    if not found and os.getenv("SERPAPI_KEY"):
+        try:
+            new_id = _remember_location(raw_id, _serp_search(_autocomplete_params(raw_id)))
+        except Exception as e:
+            logger.error(f"SerpAPI Autocomplete Error: {e}")
+    return new_id or raw_id
+
+async def aresolve_location_id(raw_id: str) -> str:
+    """
+    Async variant of resolve_location_id.
+    """
+    if not raw_id or _is_valid_id(raw_id):
+        return raw_id
+    found, new_id = _known_location(raw_id)
+    if not found and os.getenv("SERPAPI_KEY"):
+        try:
+            new_id = _remember_location(raw_id, await _aserp_search(_autocomplete_params(raw_id)))
+        except Exception as e:
+            logger.error(f"SerpAPI Autocomplete Error: {e}")
+    return new_id or raw_id
+
+def _flight_ids(full_state: Dict[str, Any]):
+    # CRITICAL: Use ID (e.g. SFO, /m/0vzm) for flights if available, else name
+    dep_id = full_state.get("origin_id") or full_state.get("origin", "")
+    arr_id = full_state.get("destination_id") or full_state.get("destination", "")
+    return dep_id, arr_id
 
+def _flights_params(full_state: Dict[str, Any], dep_id: str, arr_id: str) -> Dict[str, Any]:
     # Determine trip type: 1 = Round Trip, 2 = One Way
     trip_type = 1
     return_date = full_state.get("end_date", "")
     if not return_date:
         trip_type = 2
 
-    # CRITICAL: Use ID (e.g. SFO, /m/0vzm) for flights if available, else name
-    dep_id = full_state.get("origin_id") or full_state.get("origin", "")
-    arr_id = full_state.get("destination_id") or full_state.get("destination", "")
-
-    # If valid ID format (3 chars uppercase or starts with /m/), use it.
-    # Otherwise, try to resolve it via autocomplete.
-    def is_valid_id(val):
-        return val and ((len(val) == 3 and val.isupper()) or val.startswith("/m/"))
-
-    if dep_id and not is_valid_id(dep_id):
-        logger.warning(f"⚠️ Invalid Departure ID '{dep_id}'. Attempting resolution...")
-        suggestions = search_google_flights_autocomplete(dep_id)
-        if suggestions:
-            new_id = suggestions[0].get("id")
-            logger.info(f"✅ Resolved '{dep_id}' -> '{new_id}'")
-            dep_id = new_id
-    
-    if arr_id and not is_valid_id(arr_id):
-        logger.warning(f"⚠️ Invalid Arrival ID '{arr_id}'. Attempting resolution...")
-        suggestions = search_google_flights_autocomplete(arr_id)
-        if suggestions:
-            new_id = suggestions[0].get("id")
-            logger.info(f"✅ Resolved '{arr_id}' -> '{new_id}'")
-            arr_id = new_id
-
-    params = {
+    return {
         "engine": "google_flights",
         "departure_id": dep_id,
         "arrival_id": arr_id,
@@ -60,83 +225,124 @@ def search_google_flights(full_state: Dict[str, Any]) -> List[Dict[str, Any]]:
         "hl": "en",
         "api_key": os.getenv("SERPAPI_KEY")
     }
+
+def _parse_flights(results: Dict[str, Any], dep_id: str, arr_id: str) -> List[Dict[str, Any]]:
+    if "error" in results:
+        logger.error(f"SerpAPI Flights Error: {results['error']}")
+        return []
+
+    search_url = results.get("search_metadata", {}).get("google_flights_url", "https://www.google.com/travel/flights")
+    flights_data = []
+    
+    def process_flight_list(key, f_type):
+        if key in results:
+            for flight in results[key]:
+                first_slice = flight.get("flights", [{}])[0]
+                
+                # Extract departure and arrival details
+                dep_airport = first_slice.get("departure_airport", {})
+                arr_airport = first_slice.get("arrival_airport", {})
+                
+                flights_data.append({
+                    "airline": first_slice.get("airline", "Unknown"),
+                    "airline_logo": first_slice.get("airline_logo"),
+                    "flight_number": first_slice.get("flight_number"),
+                    "airplane": first_slice.get("airplane"),
+                    "travel_class": first_slice.get("travel_class"),
+                    
+                    # Airport codes (ID)
+                    "origin": dep_id,
+                    "destination": arr_id,
+                    
+                    # Airport full names
+                    "origin_name": dep_airport.get("name"),
+                    "destination_name": arr_airport.get("name"),
+                    
+                    # Times
+                    "departure_time": dep_airport.get("time"),
+                    "arrival_time": arr_airport.get("time"),
+                    
+                    # Airport IDs from actual flight data
+                    "departure_airport_id": dep_airport.get("id"),
+                    "arrival_airport_id": arr_airport.get("id"),
+                    
+                    "price": flight.get("price", 0),
+                    "duration": flight.get("total_duration", "N/A"),
+                    "stops": "Nonstop" if len(flight.get("layovers", [])) == 0 else f"{len(flight.get('layovers', []))} stops",
+                    "layovers": flight.get("layovers", []),
+                    "extensions": flight.get("extensions", []),
+                    "carbon_emissions": flight.get("carbon_emissions", {}),
+                    "url": search_url,
+                    "type": f_type,
+                    "details": flight 
+                })
+
+    process_flight_list("best_flights", "Best")
+    process_flight_list("other_flights", "Other")
     
+    return flights_data
+
+@with_retry(max_retries=3, backoff_factor=2)
+def search_google_flights(full_state: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Search for flights using SerpAPI Google Flights engine.
+    """
+    if not os.getenv("SERPAPI_KEY"):
+        logger.error("SERPAPI_KEY not found in environment")
+        return []
+
+    dep_id, arr_id = _flight_ids(full_state)
+
+    # If valid ID format (IATA code(s) or starts with /m/), use it.
+    # Otherwise resolve it (normally already done by the resolve_ids node).
+    if dep_id and not _is_valid_id(dep_id):
+        logger.warning(f"⚠️ Invalid Departure ID '{dep_id}'. Attempting resolution...")
+        dep_id = resolve_location_id(dep_id)
+    
+    if arr_id and not _is_valid_id(arr_id):
+        logger.warning(f"⚠️ Invalid Arrival ID '{arr_id}'. Attempting resolution...")
+        arr_id = resolve_location_id(arr_id)
+
+    params = _flights_params(full_state, dep_id, arr_id)
     #logger.info(f"✈️ FLIGHT SEARCH PARAMS: {params}")
 
     try:
-        search = GoogleSearch(params)
-        results = search.get_dict()
-        
+        results = _serp_search(params)
         # EXTENSIVE LOGGING
         #logger.info(f"✈️ RAW FLIGHT RESULTS: {json.dumps(results, indent=2)}")
-
-        if "error" in results:
-            logger.error(f"SerpAPI Flights Error: {results['error']}")
-            return []
-
-        search_url = results.get("search_metadata", {}).get("google_flights_url", "https://www.google.com/travel/flights")
-        flights_data = []
-        
-        def process_flight_list(key, f_type):
-            if key in results:
-                for flight in results[key]:
-                    first_slice = flight.get("flights", [{}])[0]
-                    
-                    # Extract departure and arrival details
-                    dep_airport = first_slice.get("departure_airport", {})
-                    arr_airport = first_slice.get("arrival_airport", {})
-                    
-                    flights_data.append({
-                        "airline": first_slice.get("airline", "Unknown"),
-                        "airline_logo": first_slice.get("airline_logo"),
-                        "flight_number": first_slice.get("flight_number"),
-                        "airplane": first_slice.get("airplane"),
-                        "travel_class": first_slice.get("travel_class"),
-                        
-                        # Airport codes (ID)
-                        "origin": dep_id,
-                        "destination": arr_id,
-                        
-                        # Airport full names
-                        "origin_name": dep_airport.get("name"),
-                        "destination_name": arr_airport.get("name"),
-                        
-                        # Times
-                        "departure_time": dep_airport.get("time"),
-                        "arrival_time": arr_airport.get("time"),
-                        
-                        # Airport IDs from actual flight data
-                        "departure_airport_id": dep_airport.get("id"),
-                        "arrival_airport_id": arr_airport.get("id"),
-                        
-                        "price": flight.get("price", 0),
-                        "duration": flight.get("total_duration", "N/A"),
-                        "stops": "Nonstop" if len(flight.get("layovers", [])) == 0 else f"{len(flight.get('layovers', []))} stops",
-                        "layovers": flight.get("layovers", []),
-                        "extensions": flight.get("extensions", []),
-                        "carbon_emissions": flight.get("carbon_emissions", {}),
-                        "url": search_url,
-                        "type": f_type,
-                        "details": flight 
-                    })
-
-        process_flight_list("best_flights", "Best")
-        process_flight_list("other_flights", "Other")
-        
-        return flights_data
+        return _parse_flights(results, dep_id, arr_id)
     except Exception as e:
         logger.error(f"❌ SerpAPI Flights Exception: {e}")
         return []
 
 @with_retry(max_retries=3, backoff_factor=2)
-def search_google_flights_autocomplete(query: str) -> List[Dict[str, Any]]:
+async def asearch_google_flights(full_state: Dict[str, Any]) -> List[Dict[str, Any]]:
     """
-    Autocomplete for airports using SerpAPI.
+    Async variant of search_google_flights.
     """
     if not os.getenv("SERPAPI_KEY"):
+        logger.error("SERPAPI_KEY not found in environment")
+        return []
+
+    dep_id, arr_id = _flight_ids(full_state)
+
+    if dep_id and not _is_valid_id(dep_id):
+        logger.warning(f"⚠️ Invalid Departure ID '{dep_id}'. Attempting resolution...")
+        dep_id = await aresolve_location_id(dep_id)
+
+    if arr_id and not _is_valid_id(arr_id):
+        logger.warning(f"⚠️ Invalid Arrival ID '{arr_id}'. Attempting resolution...")
+        arr_id = await aresolve_location_id(arr_id)
+
+    try:
+        results = await _aserp_search(_flights_params(full_state, dep_id, arr_id))
+        return _parse_flights(results, dep_id, arr_id)
+    except Exception as e:
+        logger.error(f"❌ SerpAPI Flights Exception: {e}")
         return []
 
-    params = {
+def _autocomplete_params(query: str) -> Dict[str, Any]:
+    return {
         "engine": "google_flights_autocomplete",
         "q": query,
         "hl": "en",
@@ -144,58 +350,76 @@ def search_google_flights_autocomplete(query: str) -> List[Dict[str, Any]]:
         "api_key": os.getenv("SERPAPI_KEY")
     }
 
+def _parse_autocomplete(results: Dict[str, Any]) -> List[Dict[str, Any]]:
+    suggestions = []
+    if "suggestions" in results:
+        for item in results["suggestions"]:
+             # Top level (City or Region)
+             raw_id = item.get("id", "")
+             raw_name = item.get("name", "")
+             display_code = raw_id if len(raw_id) == 3 and raw_id.isupper() else None
+             
+             suggestions.append({
+                 "id": raw_id, 
+                 "name": raw_name,
+                 "city_name": raw_name, # Current item is the city
+                 "code": display_code,
+                 "type": "City"
+             })
+             
+             # Nested airports
+             if "airports" in item:
+                 for airport in item["airports"]:
+                     air_id = airport.get("id", "")
+                     suggestions.append({
+                         "id": air_id,
+                         "name": f"{airport.get('name')} ({air_id})",
+                         "city_name": airport.get("city"),
+                         "code": air_id,
+                         "type": "Airport"
+                     })
+
+    suggestions = suggestions[:10]
+    # Feed the offline index so the next lookup for this place never leaves the process
+    airport_index.learn(suggestions)
+    return suggestions
+
+@with_retry(max_retries=3, backoff_factor=2)
+def search_google_flights_autocomplete(query: str) -> List[Dict[str, Any]]:
+    """
+    Autocomplete for airports using SerpAPI.
+    """
+    if not os.getenv("SERPAPI_KEY"):
+        return []
+
     try:
-        search = GoogleSearch(params)
-        results = search.get_dict()
-
-
-        suggestions = []
-        if "suggestions" in results:
-            for item in results["suggestions"]:
-                 # Top level (City or Region)
-                 raw_id = item.get("id", "")
-                 raw_name = item.get("name", "")
-                 display_code = raw_id if len(raw_id) == 3 and raw_id.isupper() else None
-                 
-                 suggestions.append({
-                     "id": raw_id, 
-                     "name": raw_name,
-                     "city_name": raw_name, # Current item is the city
-                     "code": display_code,
-                     "type": "City"
-                 })
-                 
-                 # Nested airports
-                 if "airports" in item:
-                     for airport in item["airports"]:
-                         air_id = airport.get("id", "")
-                         suggestions.append({
-                             "id": air_id,
-                             "name": f"{airport.get('name')} ({air_id})",
-                             "city_name": airport.get("city"),
-                             "code": air_id,
-                             "type": "Airport"
-                         })
-
-        return suggestions[:10]
+        return _parse_autocomplete(_serp_search(_autocomplete_params(query)))
     except Exception as e:
         logger.error(f"SerpAPI Autocomplete Error: {e}")
         return []
 
 @with_retry(max_retries=3, backoff_factor=2)
-def search_google_hotels(full_state: Dict[str, Any]) -> List[Dict[str, Any]]:
+async def asearch_google_flights_autocomplete(query: str) -> List[Dict[str, Any]]:
     """
-    Search for hotels using SerpAPI Google Hotels engine.
+    Async variant of search_google_flights_autocomplete.
     """
     if not os.getenv("SERPAPI_KEY"):
         return []
 
+    try:
+        return _parse_autocomplete(await _aserp_search(_autocomplete_params(query)))
+    except Exception as e:
+        logger.error(f"SerpAPI Autocomplete Error: {e}")
+        return []
+
+def _hotels_dest(full_state: Dict[str, Any]) -> str:
     # Use City Name (e.g. Austin) for Hotels if available, else destination
-    dest_query = full_state.get("destination_city") or full_state.get("destination", "")
-    
-    params = {
+    return full_state.get("destination_city") or full_state.get("destination", "")
+
+def _hotels_params(full_state: Dict[str, Any]) -> Dict[str, Any]:
+    return {
         "engine": "google_hotels",
-        "q": f"hotels in {dest_query}",
+        "q": full_state.get("q") or f"hotels in {_hotels_dest(full_state)}",
         "check_in_date": full_state.get("start_date", ""),
         "check_out_date": full_state.get("end_date", ""),
         "adults": "1",
@@ -204,53 +428,70 @@ def search_google_hotels(full_state: Dict[str, Any]) -> List[Dict[str, Any]]:
         "hl": "en",
         "api_key": os.getenv("SERPAPI_KEY")
     }
+
+def _parse_hotels(results: Dict[str, Any], dest_query: str) -> List[Dict[str, Any]]:
+    if "error" in results:
+        logger.error(f"SerpAPI Hotels Error: {results['error']}")
+        return []
+    
+    hotels = []
+    if "properties" in results:
+        for prop in results["properties"]:
+            price_val = 0
+            if prop.get("rate_per_night") and "lowest" in prop["rate_per_night"]:
+                price_str = prop["rate_per_night"]["lowest"]
+                price_val = float(price_str.replace('$', '').replace(',', ''))
+            
+            hotels.append({
+                "name": prop.get("name"),
+                "city": dest_query,
+                "country": "", 
+                "price": price_val,
+                "rating": prop.get("overall_rating", 0.0),
+                "url": prop.get("link"),
+                "image": prop.get("images", [{}])[0].get("thumbnail") if prop.get("images") else None,
+                "description": prop.get("description")
+            })
     
+    return hotels[:10]
+
+@with_retry(max_retries=3, backoff_factor=2)
+def search_google_hotels(full_state: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Search for hotels using SerpAPI Google Hotels engine.
+    """
+    if not os.getenv("SERPAPI_KEY"):
+        return []
+
+    params = _hotels_params(full_state)
     #logger.info(f"🏨 HOTEL SEARCH PARAMS: {params}")
 
     try:
-        search = GoogleSearch(params)
-        results = search.get_dict()
-        
+        results = _serp_search(params)
         # EXTENSIVE LOGGING
         #logger.info(f"🏨 RAW HOTEL RESULTS: {json.dumps(results, indent=2)}")
-
-        if "error" in results:
-            logger.error(f"SerpAPI Hotels Error: {results['error']}")
-            return []
-        
-        hotels = []
-        if "properties" in results:
-            for prop in results["properties"]:
-                price_val = 0
-                if prop.get("rate_per_night") and "lowest" in prop["rate_per_night"]:
-                    price_str = prop["rate_per_night"]["lowest"]
-                    price_val = float(price_str.replace('$', '').replace(',', ''))
-                
-                hotels.append({
-                    "name": prop.get("name"),
-                    "city": dest_query,
-                    "country": "", 
-                    "price": price_val,
-                    "rating": prop.get("overall_rating", 0.0),
-                    "url": prop.get("link"),
-                    "image": prop.get("images", [{}])[0].get("thumbnail") if prop.get("images") else None,
-                    "description": prop.get("description")
-                })
-        
-        return hotels[:10]
+        return _parse_hotels(results, _hotels_dest(full_state))
     except Exception as e:
         logger.error(f"❌ SerpAPI Hotels Exception: {e}")
         return []
 
 @with_retry(max_retries=3, backoff_factor=2)
-def search_google_sights(location: str) -> List[Dict[str, Any]]:
+async def asearch_google_hotels(full_state: Dict[str, Any]) -> List[Dict[str, Any]]:
     """
-    Search for top sights using Google Search (or specialized engine if available).
+    Async variant of search_google_hotels.
     """
     if not os.getenv("SERPAPI_KEY"):
         return []
 
-    params = {
+    try:
+        results = await _aserp_search(_hotels_params(full_state))
+        return _parse_hotels(results, _hotels_dest(full_state))
+    except Exception as e:
+        logger.error(f"❌ SerpAPI Hotels Exception: {e}")
+        return []
+
+def _sights_params(location: str) -> Dict[str, Any]:
+    return {
         "engine": "google", # Using standard google search for broad coverage, or google_local
         "q": f"top sights in {location}",
         "google_domain": "google.com",
@@ -259,48 +500,63 @@ def search_google_sights(location: str) -> List[Dict[str, Any]]:
         "api_key": os.getenv("SERPAPI_KEY")
     }
 
-    try:
-        search = GoogleSearch(params)
-        results = search.get_dict()
-        
-        sights = []
-        # Attempt to parse knowledge graph or organic results
-        if "knowledge_graph" in results:
-             kg = results["knowledge_graph"]
-             if "title" in kg:
-                 sights.append({
-                     "title": kg.get("title"),
-                     "type": kg.get("type"),
-                     "description": kg.get("description"),
-                     "image": kg.get("header_images", [{}])[0].get("image") if kg.get("header_images") else None
-                 })
-        
-        # Parse 'Top Sights' carousel if available
-        if "top_sights" in results:
-             for sight in results["top_sights"].get("sights", []):
-                 sights.append({
-                     "title": sight.get("title"),
-                     "description": sight.get("description"),
-                     "price": sight.get("price"),
-                     "rating": sight.get("rating"),
-                     "reviews": sight.get("reviews"),
-                     "image": sight.get("thumbnail")
-                 })
+def _parse_sights(results: Dict[str, Any]) -> List[Dict[str, Any]]:
+    sights = []
+    # Attempt to parse knowledge graph or organic results
+    if "knowledge_graph" in results:
+         kg = results["knowledge_graph"]
+         if "title" in kg:
+             sights.append({
+                 "title": kg.get("title"),
+                 "type": kg.get("type"),
+                 "description": kg.get("description"),
+                 "image": kg.get("header_images", [{}])[0].get("image") if kg.get("header_images") else None
+             })
+    
+    # Parse 'Top Sights' carousel if available
+    if "top_sights" in results:
+         for sight in results["top_sights"].get("sights", []):
+             sights.append({
+                 "title": sight.get("title"),
+                 "description": sight.get("description"),
+                 "price": sight.get("price"),
+                 "rating": sight.get("rating"),
+                 "reviews": sight.get("reviews"),
+                 "image": sight.get("thumbnail")
+             })
+
+    return sights[:10]
+
+@with_retry(max_retries=3, backoff_factor=2)
+def search_google_sights(location: str) -> List[Dict[str, Any]]:
+    """
+    Search for top sights using Google Search (or specialized engine if available).
+    """
+    if not os.getenv("SERPAPI_KEY"):
+        return []
 
-        return sights[:10]
+    try:
+        return _parse_sights(_serp_search(_sights_params(location)))
     except Exception as e:
         logger.error(f"❌ SerpAPI Sights Exception: {e}")
         return []
 
 @with_retry(max_retries=3, backoff_factor=2)
-def search_google_local(location: str) -> List[Dict[str, Any]]:
+async def asearch_google_sights(location: str) -> List[Dict[str, Any]]:
     """
-    Search for local gems (restaurants/attractions) using Google Local.
+    Async variant of search_google_sights.
     """
     if not os.getenv("SERPAPI_KEY"):
         return []
 
-    params = {
+    try:
+        return _parse_sights(await _aserp_search(_sights_params(location)))
+    except Exception as e:
+        logger.error(f"❌ SerpAPI Sights Exception: {e}")
+        return []
+
+def _local_params(location: str) -> Dict[str, Any]:
+    return {
         "engine": "google_local",
         "q": f"places to visit in {location}", # Broad query
         "location": location,
@@ -310,36 +566,51 @@ def search_google_local(location: str) -> List[Dict[str, Any]]:
         "api_key": os.getenv("SERPAPI_KEY")
     }
 
+def _parse_local(results: Dict[str, Any]) -> List[Dict[str, Any]]:
+    places = []
+    if "local_results" in results:
+        for place in results["local_results"]:
+            places.append({
+                "title": place.get("title"),
+                "rating": place.get("rating"),
+                "reviews": place.get("reviews"),
+                "type": place.get("type"),
+                "address": place.get("address"),
+                "thumbnail": place.get("thumbnail"),
+                "description": place.get("description") # Sometimes available
+            })
+    return places[:10]
+
+@with_retry(max_retries=3, backoff_factor=2)
+def search_google_local(location: str) -> List[Dict[str, Any]]:
+    """
+    Search for local gems (restaurants/attractions) using Google Local.
+    """
+    if not os.getenv("SERPAPI_KEY"):
+        return []
+
     try:
-        search = GoogleSearch(params)
-        results = search.get_dict()
-        
-        places = []
-        if "local_results" in results:
-            for place in results["local_results"]:
-                places.append({
-                    "title": place.get("title"),
-                    "rating": place.get("rating"),
-                    "reviews": place.get("reviews"),
-                    "type": place.get("type"),
-                    "address": place.get("address"),
-                    "thumbnail": place.get("thumbnail"),
-                    "description": place.get("description") # Sometimes available
-                })
-        return places[:10]
+        return _parse_local(_serp_search(_local_params(location)))
     except Exception as e:
         logger.error(f"❌ SerpAPI Local Exception: {e}")
         return []
 
 @with_retry(max_retries=3, backoff_factor=2)
-def search_google_news(location: str) -> List[Dict[str, Any]]:
+async def asearch_google_local(location: str) -> List[Dict[str, Any]]:
     """
-    Search for local news using Google News engine.
+    Async variant of search_google_local.
     """
     if not os.getenv("SERPAPI_KEY"):
         return []
 
-    params = {
+    try:
+        return _parse_local(await _aserp_search(_local_params(location)))
+    except Exception as e:
+        logger.error(f"❌ SerpAPI Local Exception: {e}")
+        return []
+
+def _news_params(location: str) -> Dict[str, Any]:
+    return {
         "engine": "google_news",
         "q": location,
         "gl": "us",
@@ -347,38 +618,52 @@ def search_google_news(location: str) -> List[Dict[str, Any]]:
         "api_key": os.getenv("SERPAPI_KEY")
     }
 
+def _parse_news(results: Dict[str, Any]) -> List[Dict[str, Any]]:
+    news_items = []
+    if "news_results" in results:
+        for item in results["news_results"]:
+            news_items.append({
+                "title": item.get("title"),
+                "source": item.get("source", {}).get("title"),
+                "date": item.get("date"),
+                "snippet": item.get("snippet"),
+                "image": item.get("thumbnail"),
+                "link": item.get("link")
+            })
+    return news_items[:5]
+
+@with_retry(max_retries=3, backoff_factor=2)
+def search_google_news(location: str) -> List[Dict[str, Any]]:
+    """
+    Search for local news using Google News engine.
+    """
+    if not os.getenv("SERPAPI_KEY"):
+        return []
+
     try:
-        search = GoogleSearch(params)
-        results = search.get_dict()
-        
-        news_items = []
-        if "news_results" in results:
-            for item in results["news_results"]:
-                news_items.append({
-                    "title": item.get("title"),
-                    "source": item.get("source", {}).get("title"),
-                    "date": item.get("date"),
-                    "snippet": item.get("snippet"),
-                    "image": item.get("thumbnail"),
-                    "link": item.get("link")
-                })
-        return news_items[:5]
+        return _parse_news(_serp_search(_news_params(location)))
     except Exception as e:
         logger.error(f"❌ SerpAPI News Exception: {e}")
         return []
 
 @with_retry(max_retries=3, backoff_factor=2)
-def search_google_discussions(location: str) -> List[Dict[str, Any]]:
+async def asearch_google_news(location: str) -> List[Dict[str, Any]]:
     """
-    Search for forum discussions (Reddit, TripAdvisor, etc.).
+    Async variant of search_google_news.
     """
     if not os.getenv("SERPAPI_KEY"):
         return []
-    
+
+    try:
+        return _parse_news(await _aserp_search(_news_params(location)))
+    except Exception as e:
+        logger.error(f"❌ SerpAPI News Exception: {e}")
+        return []
+
+def _discussions_params(location: str) -> Dict[str, Any]:
     # We use standard google search with "Discussions" filter logic or specific site queries
     # A reliable way is checking 'discussions_and_forums' block in standard search
-    
-    params = {
+    return {
         "engine": "google",
         "q": f"{location} travel tips forum",
         "google_domain": "google.com",
@@ -387,34 +672,56 @@ def search_google_discussions(location: str) -> List[Dict[str, Any]]:
         "api_key": os.getenv("SERPAPI_KEY")
     }
 
-    try:
-        search = GoogleSearch(params)
-        results = search.get_dict()
-        
-        discussions = []
-        if "discussions_and_forums" in results:
-            for item in results["discussions_and_forums"]:
+def _parse_discussions(results: Dict[str, Any]) -> List[Dict[str, Any]]:
+    discussions = []
+    if "discussions_and_forums" in results:
+        for item in results["discussions_and_forums"]:
+             discussions.append({
+                 "title": item.get("title"),
+                 "source": item.get("source"),
+                 "link": item.get("link"),
+                 "date": item.get("date"),
+                 "snippet": item.get("snippet")
+             })
+             
+    # Fallback to organic results if they look like forums
+    if not discussions and "organic_results" in results:
+         for item in results["organic_results"]:
+             link = item.get("link", "")
+             if "reddit.com" in link or "tripadvisor.com" in link or "lonelyplanet.com" in link:
                  discussions.append({
                      "title": item.get("title"),
-                     "source": item.get("source"),
-                     "link": item.get("link"),
-                     "date": item.get("date"),
+                     "source": item.get("source") or item.get("displayed_link"),
+                     "link": link,
                      "snippet": item.get("snippet")
                  })
-                 
-        # Fallback to organic results if they look like forums
-        if not discussions and "organic_results" in results:
-             for item in results["organic_results"]:
-                 link = item.get("link", "")
-                 if "reddit.com" in link or "tripadvisor.com" in link or "lonelyplanet.com" in link:
-                     discussions.append({
-                         "title": item.get("title"),
-                         "source": item.get("source") or item.get("displayed_link"),
-                         "link": link,
-                         "snippet": item.get("snippet")
-                     })
 
-        return discussions[:5]
+    return discussions[:5]
+
+@with_retry(max_retries=3, backoff_factor=2)
+def search_google_discussions(location: str) -> List[Dict[str, Any]]:
+    """
+    Search for forum discussions (Reddit, TripAdvisor, etc.).
+    """
+    if not os.getenv("SERPAPI_KEY"):
+        return []
+
+    try:
+        return _parse_discussions(_serp_search(_discussions_params(location)))
+    except Exception as e:
+        logger.error(f"❌ SerpAPI Discussions Exception: {e}")
+        return []
+
+@with_retry(max_retries=3, backoff_factor=2)
+async def asearch_google_discussions(location: str) -> List[Dict[str, Any]]:
+    """
+    Async variant of search_google_discussions.
+    """
+    if not os.getenv("SERPAPI_KEY"):
+        return []
+
+    try:
+        return _parse_discussions(await _aserp_search(_discussions_params(location)))
     except Exception as e:
         logger.error(f"❌ SerpAPI Discussions Exception: {e}")
         return []
@@ -0,0 +1,83 @@
+import json
+from typing import Any, Dict
+
+from state import MERGED_FIELDS, merge_dicts
+from utils.metrics import metrics
+
+# Websocket update encodings, chosen by the client's "protocol" request field
+FULL = "full"     # legacy: every update carries the whole accumulated state
+DELTA = "delta"   # only the keys a node changed, numbered by `seq`
+PROTOCOLS = (FULL, DELTA)
+
+def negotiate(req_data: Dict[str, Any]) -> str:
+    protocol = req_data.get("protocol")
+    return protocol if protocol in PROTOCOLS else FULL
+
+def changed_keys(previous: Dict[str, Any], update: Dict[str, Any]) -> Dict[str, Any]:
+    """Keys of `update` whose value differs from the accumulated state."""
+    return {k: v for k, v in update.items() if k not in previous or previous[k] != v}
+
+def merge_update(previous: Dict[str, Any], update: Dict[str, Any]) -> Dict[str, Any]:
+    """`update` with its reducer fields (e.g. node_timings) merged into the accumulated state's, like the graph does."""
+    return {k: merge_dicts(previous.get(k), v) if k in MERGED_FIELDS else v for k, v in update.items()}
+
+def encode(payload: Dict[str, Any], protocol: str, step: str) -> str:
+    text = json.dumps(payload, default=str)
+    metrics.observe(f"ws.payload_bytes.{protocol}.{step}", len(text))
+    metrics.incr(f"ws.bytes.{protocol}", len(text))
+    return text
+
+def delta_message(seq: int, step: str, message: str, changes: Dict[str, Any]) -> str:
+    return encode({"type": "delta", "seq": seq, "step": step, "message": message, "changes": changes}, DELTA, step)
+
+def snapshot_message(seq: int, data: Dict[str, Any], message: str = "Resynchronized") -> str:
+    """Full state for a client that asked to resync (after a gap in `seq`)."""
+    return encode({"type": "snapshot", "seq": seq, "message": message, "data": data}, DELTA, "snapshot")
+
+
+class PlanUpdate:
+    """
+    One node's contribution to a streamed plan. Encoded lazily, at most once
+    per protocol, and the text is shared by every subscriber of the run.
+    """
+
+    def __init__(self, seq: int, step: str, changes: Dict[str, Any], state: Dict[str, Any]):
+        self.seq = seq
+        self.step = step
+        self.changes = changes
+        self._state = state          # accumulated state as of this update
+        self._encoded: Dict[str, str] = {}
+
+    def encode(self, protocol: str) -> str:
+        if protocol not in self._encoded:
+            message = f"Completed {self.step}"
+            if protocol == DELTA:
+                text = delta_message(self.seq, self.step, message, self.changes)
+            else:
+                text = encode({"type": "update", "step": self.step, "message": message, "data": self._state},
+                              FULL, self.step)
+            self._encoded[protocol] = text
+        return self._encoded[protocol]
+
+
+class StreamChunk:
+    """
+    Partial node output streamed while the node runs (e.g. itinerary text).
+    Not numbered: `seq` is the last PlanUpdate's, so delta clients see no gap.
+    `reset` tells the client to discard the step's text received so far.
+    """
+
+    def __init__(self, seq: int, step: str, text: str, reset: bool = False):
+        self.seq = seq
+        self.step = step
+        self.text = text
+        self.reset = reset
+        self._encoded = None
+
+    def encode(self, protocol: str) -> str:
+        if self._encoded is None:
+            payload = {"type": "chunk", "step": self.step, "text": self.text}
+            if self.reset:
+                payload["reset"] = True
+            self._encoded = json.dumps(payload)
+        return self._encoded
@@ -5,13 +5,19 @@ from pydantic import BaseModel
 from typing import Optional, List, Any
 import uvicorn
 import asyncio
+import copy
 import json
+import uuid
 
 # Import the graph
 from graph import build_graph
-from state import TravelState
+from state import TravelState, DEFAULT_USER_ID
 from database.init_db import init_db
-from agents.tools.serp_tools import search_google_flights_autocomplete
+from database.singlestore_client import close_pool
+from agents.tools.serp_tools import asearch_google_flights_autocomplete
+from agents.tools.airport_index import airport_index
+from utils.http_client import close_async_client
+from utils.metrics import metrics
 from utils.logger import setup_logger
 
 logger = setup_logger()
@@ -20,7 +26,7 @@ app = FastAPI()
 
 @app.on_event("startup")
 async def startup_event():
-    """Run database initialization on startup."""
+    """Apply pending schema migrations on startup (never drops data)."""
     try:
         logger.info("Starting up AI Travel Agent Server...")
         init_db()
@@ -29,6 +35,12 @@ async def startup_event():
         logger.error(f"❌ Database initialization failed: {e}")
         print(f"❌ Database initialization failed: {e}")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release pooled HTTP and database connections."""
+    await close_async_client()
+    close_pool()
+
 # Enable CORS for React frontend
 app.add_middleware(
     CORSMiddleware,
@@ -40,7 +52,14 @@ app.add_middleware(
 
 graph = build_graph()
 
+def run_config() -> dict:
+    """Each API run gets its own checkpoint thread (the graph uses a checkpointer)."""
+    return {"configurable": {"thread_id": str(uuid.uuid4())}}
+
 class ChatRequest(BaseModel):
+    user_id: Optional[str] = DEFAULT_USER_ID
+    origin: Optional[str] = None
+    destination: Optional[str] = None
     origin_id: Optional[str] = None
     destination_id: Optional[str] = None
     origin_city: Optional[str] = None
@@ -62,20 +81,34 @@ class ChatRequest(BaseModel):
 async def autocomplete(query: str):
     """
     Autocomplete airport search.
+    Served from the in-process airport index; SerpAPI is only called on a miss.
     """
     if not query:
         return []
-    
-    # Run in thread pool to avoid blocking
-    results = await asyncio.to_thread(search_google_flights_autocomplete, query)
+
+    results = airport_index.search(query)
+    if results:
+        metrics.incr("autocomplete.local")
+        return results
+
+    metrics.incr("autocomplete.serpapi")
+    results = await asearch_google_flights_autocomplete(query)
     return results
 
+@app.get("/metrics")
+async def get_metrics():
+    """
+    In-process counters, timings and gauges (cache hit rates, pool usage...).
+    """
+    return metrics.snapshot()
+
 @app.post("/plan")
 async def plan_trip(req: ChatRequest):
     """
     Standard HTTP endpoint to run the full graph and return final state.
     """
     initial_state = TravelState(
+        user_id=req.user_id,
         origin=req.origin,
         destination=req.destination,
         origin_id=req.origin_id,
@@ -97,7 +130,7 @@ async def plan_trip(req: ChatRequest):
     )
     
     try:
-        final_state = await asyncio.to_thread(graph.invoke, initial_state)
+        final_state = await graph.ainvoke(initial_state, config=run_config())
         # Convert to dict for JSON response
         if isinstance(final_state, TravelState):
             return final_state.model_dump()
@@ -105,7 +138,116 @@ async def plan_trip(req: ChatRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-from database.ops import save_trip_plan, find_cached_trip
+from database.ops import asave_trip_plan, afind_cached_trip
+from database.cache_keys import trip_keys, plan_key
+from agents.modifier_agent import amodify_state
+from replan import areplan, changed_fields
+from utils.singleflight import SingleFlight
+from api.protocol import DELTA, PlanUpdate, StreamChunk, changed_keys, delta_message, merge_update, negotiate, snapshot_message
+
+# One background refresh per stale cache key, however many clients hit it
+_trip_refreshes = SingleFlight("trip_refresh")
+
+# One graph run per distinct plan request (see database.cache_keys.plan_key);
+# identical concurrent requests subscribe to the same run's updates
+_plan_runs = SingleFlight("plan")
+
+REFINEMENT_MESSAGES = {
+    "recommend_hotels": "Hotels updated!",
+    "recommend_flights": "Flights updated!",
+    "live_search": "Found new hotels",
+    "flight_api": "Found new flights",
+    "weather": "Weather updated",
+    "itinerary": "Itinerary updated!",
+    "reasoning": "Trip notes updated",
+}
+
+def _initial_state(req_data: dict) -> TravelState:
+    return TravelState(
+        user_id=req_data.get("user_id") or DEFAULT_USER_ID,
+        origin=req_data.get("origin"),
+        destination=req_data.get("destination"),
+        origin_id=req_data.get("origin_id"),
+        destination_id=req_data.get("destination_id"),
+        origin_city=req_data.get("origin_city"),
+        destination_city=req_data.get("destination_city"),
+        start_date=req_data.get("start_date"),
+        end_date=req_data.get("end_date"),
+        bedrooms=req_data.get("bedrooms", 1),
+        max_price_per_night=req_data.get("max_price", 200.0),
+        min_rating=req_data.get("min_rating", 4.0),
+        trip_purpose=req_data.get("trip_purpose", "vacation"),
+        travel_party=req_data.get("travel_party", "solo"),
+        traveler_age=req_data.get("traveler_age"),
+        group_age_min=req_data.get("group_age_min"),
+        group_age_max=req_data.get("group_age_max"),
+        transportation_mode=req_data.get("transportation_mode", "public"),
+        budget=req_data.get("budget"),
+    )
+
+async def _run_plan(initial_state: TravelState, stream) -> dict:
+    """
+    One graph run, streamed to every websocket subscribed to `stream` as
+    PlanUpdates (encoded once per protocol, shared by all subscribers).
+    """
+    # Keep track of the final state to send at the end
+    final_state_data = {}
+    seq = 0
+
+    # We need the accumulation of state because streaming gives partial updates.
+    # "custom" carries text chunks written by nodes while they run (itinerary).
+    async for mode, event in graph.astream(initial_state, config=run_config(), stream_mode=["updates", "custom"]):
+        if mode == "custom":
+            if isinstance(event, dict) and event.get("type") == "itinerary_chunk":
+                await stream.publish(StreamChunk(seq, "itinerary", event["text"]))
+            elif isinstance(event, dict) and event.get("type") == "itinerary_reset":
+                await stream.publish(StreamChunk(seq, "itinerary", "", reset=True))
+            continue
+
+        for key, value in event.items():
+            if key == "__end__":
+                continue
+
+            if isinstance(value, dict):
+                update = value
+            elif hasattr(value, "dict"):
+                update = value.dict()
+            else:
+                update = {}
+
+            # Update our tracking of the state (dict merge)
+            update = merge_update(final_state_data, update)
+            changes = changed_keys(final_state_data, update)
+            final_state_data.update(update)
+
+            seq += 1
+            await stream.publish(PlanUpdate(seq, key, changes, dict(final_state_data)))
+
+    # 3. SAVE to DB
+    # Re-construct TravelState from accumulated dict to safely pass to save_trip_plan
+    try:
+        full_state_dict = initial_state.dict()
+        full_state_dict.update(final_state_data)
+        await asave_trip_plan(TravelState(**full_state_dict))
+    except Exception as save_err:
+        logger.error(f"Failed to save plan: {save_err}")
+
+    return final_state_data
+
+async def _send_refinement(websocket, protocol, seq, step, message, changes, state) -> None:
+    if protocol == DELTA:
+        await websocket.send_text(delta_message(seq, step, message, changes))
+    else:
+        await websocket.send_text(json.dumps({"type": "update", "step": step, "message": message, "data": state}))
+
+async def _refresh_trip(req_data: dict) -> dict:
+    """Re-plan a stale trip in the background and save it as the new cache entry."""
+    logger.info(f"🔄 Refreshing stale plan: {req_data.get('origin')} -> {req_data.get('destination')}")
+    result = await graph.ainvoke(_initial_state(req_data), config=run_config())
+    final_state = result if isinstance(result, TravelState) else TravelState(**result)
+    await asave_trip_plan(final_state)
+    metrics.incr("trip_cache.refreshed")
+    return final_state.model_dump()
 
 @app.websocket("/ws/chat")
 async def websocket_endpoint(websocket: WebSocket):
@@ -119,13 +261,36 @@ async def websocket_endpoint(websocket: WebSocket):
         cache_params = {
             "origin": req_data.get("origin"),
             "destination": req_data.get("destination"),
+            "origin_id": req_data.get("origin_id"),
+            "destination_id": req_data.get("destination_id"),
             "start_date": req_data.get("start_date"),
             "end_date": req_data.get("end_date"),
             "trip_purpose": req_data.get("trip_purpose")
         }
         
-        cached_result = await asyncio.to_thread(find_cached_trip, cache_params)
+        cached_result = await afind_cached_trip(cache_params, allow_stale=True)
         
+        if cached_result and cached_result.get("stale"):
+            # STALE HIT: serve the old plan now, push the refreshed one when it lands
+            logger.info("⏳ Serving stale plan while refreshing")
+            await websocket.send_text(json.dumps({
+                "type": "complete",
+                "message": "Showing your last saved plan while we refresh prices...",
+                "data": cached_result
+            }))
+            try:
+                fresh = await _trip_refreshes.run(trip_keys(cache_params)["cache_key"], lambda: _refresh_trip(req_data))
+            except Exception as e:
+                logger.error(f"❌ Stale plan refresh failed: {e}")
+                await websocket.send_text(json.dumps({"type": "status", "message": "Could not refresh this plan right now."}))
+                return
+            await websocket.send_text(json.dumps({
+                "type": "complete",
+                "message": "Plan refreshed with live data!",
+                "data": fresh
+            }, default=str))
+            return
+
         if cached_result:
             # CACHE HIT: Send immediately
             logger.info("⚡️ Serving from cache")
@@ -134,9 +299,6 @@ async def websocket_endpoint(websocket: WebSocket):
                 "step": "cache",
                 "message": "⚡️ Found a recent matching itinerary! Loading from cache..."
             }))
-            
-            # Simulate a small delay for UX
-            await asyncio.sleep(0.5)
 
             await websocket.send_text(json.dumps({
                 "type": "complete",
@@ -145,76 +307,32 @@ async def websocket_endpoint(websocket: WebSocket):
             }))
             return 
         
-        # 2. NO CACHE: Run Agents
-        logger.info(f"🚀 Starting plan for: {req_data.get('origin')} -> {req_data.get('destination')}")
-        
-        initial_state = TravelState(
-            origin=req_data.get("origin"),
-            destination=req_data.get("destination"),
-            origin_id=req_data.get("origin_id"),
-            destination_id=req_data.get("destination_id"),
-            origin_city=req_data.get("origin_city"),
-            destination_city=req_data.get("destination_city"),
-            start_date=req_data.get("start_date"),
-            end_date=req_data.get("end_date"),
-            bedrooms=req_data.get("bedrooms", 1),
-            max_price_per_night=req_data.get("max_price", 200.0),
-            min_rating=req_data.get("min_rating", 4.0),
-            trip_purpose=req_data.get("trip_purpose", "vacation"),
-            travel_party=req_data.get("travel_party", "solo"),
-            traveler_age=req_data.get("traveler_age"),
-            group_age_min=req_data.get("group_age_min"),
-            group_age_max=req_data.get("group_age_max"),
-            transportation_mode=req_data.get("transportation_mode", "public"),
-            budget=req_data.get("budget"),
-        )
-        
+        # 2. NO CACHE: Run Agents (or join an identical run already in progress)
+        protocol = negotiate(req_data)
+        initial_state = _initial_state(req_data)
+        key = plan_key(initial_state.model_dump())
+        if _plan_runs.in_flight(key):
+            metrics.incr("plan.coalesced")
+            logger.info(f"🔗 Joining in-flight plan: {req_data.get('origin')} -> {req_data.get('destination')}")
+        else:
+            logger.info(f"🚀 Starting plan for: {req_data.get('origin')} -> {req_data.get('destination')}")
+
         await websocket.send_text(json.dumps({"type": "status", "message": "Starting travel planning..."}))
-        
-        # Keep track of the final state to send at the end
-        final_state_data = {}
-        # Also keep a real TravelState obj if possible, or construct one at end for saving
-        # Since we are iterating events, we update `final_state_data` dictionary.
-        
-        # We need the accumulation of state because streaming gives partial updates.
-        # Ideally, we should get the full state at the end.
-        
-        async for event in graph.astream(initial_state):
-             for key, value in event.items():
-                if key == "__end__":
-                    continue
-                
-                # Update our tracking of the state (dict merge)
-                if isinstance(value, dict):
-                    final_state_data.update(value)
-                elif hasattr(value, "dict"): 
-                     final_state_data.update(value.dict())
-                
-                # Send update to client with partial data
-                await websocket.send_text(json.dumps({
-                    "type": "update",
-                    "step": key,
-                    "message": f"Completed {key}",
-                    "data": final_state_data  # Send accumulated state
-                }))
-        
-        # 3. SAVE to DB
-        # Re-construct TravelState from accumulated dict to safely pass to save_trip_plan
-        # (save_trip_plan expects TravelState object)
-        try:
-             # Merge initial params with results
-             full_state_dict = initial_state.dict()
-             full_state_dict.update(final_state_data)
-             final_state_obj = TravelState(**full_state_dict)
-             
-             await asyncio.to_thread(save_trip_plan, final_state_obj)
-        except Exception as save_err:
-             logger.error(f"Failed to save plan: {save_err}")
+
+        run = _plan_runs.stream(key, lambda stream: _run_plan(initial_state, stream))
+        seq = 0
+        async for update in run.events():
+            seq = update.seq
+            await websocket.send_text(update.encode(protocol))
+
+        # Each connection refines its own copy of the shared result
+        final_state_data = copy.deepcopy(await run.result())
 
         # Send complete message with full final data for rendering
         await websocket.send_text(json.dumps({
             "type": "complete", 
             "message": "Planning complete!",
+            "seq": seq,
             "data": final_state_data
         }))
 
@@ -223,6 +341,11 @@ async def websocket_endpoint(websocket: WebSocket):
             try:
                 msg_text = await websocket.receive_text()
                 msg_json = json.loads(msg_text)
+
+                if msg_json.get("type") == "resync":
+                    # Client missed a delta: send the full state once
+                    await websocket.send_text(snapshot_message(seq, final_state_data))
+                    continue
                 
                 if msg_json.get("type") == "user_feedback":
                     user_msg = msg_json.get("message")
@@ -237,57 +360,27 @@ async def websocket_endpoint(websocket: WebSocket):
                     current_state_obj = TravelState(**current_full_dict)
 
                     # 2. Run Modifier
-                    from agents.modifier_agent import modify_state
-                    new_state, updates = await asyncio.to_thread(modify_state, current_state_obj, user_msg)
-                    
+                    new_state, _ = await amodify_state(current_state_obj, user_msg)
+
+                    # 3. Re-run only the nodes whose inputs changed (see replan.NODE_INPUTS)
+                    async def send_step(step, changes):
+                        nonlocal seq
+                        seq += 1
+                        final_state_data.update(changes)
+                        await _send_refinement(websocket, protocol, seq, step, REFINEMENT_MESSAGES.get(step, f"Updated {step}"),
+                                               changes, final_state_data)
+
+                    new_state = await areplan(new_state, changed_fields(current_state_obj, new_state), send_step)
+
                     # Update local tracking
                     final_state_data.update(new_state.dict())
                     initial_state = new_state # Update baseline for next loop
-                    
-                    # 3. Conditional Re-runs
-                    # If rerun_hotels -> Run hotels THEN itinerary
-                    # If rerun_itinerary -> Run itinerary only
-                    
-                    rerun_hotels = updates.get("rerun_hotels")
-                    rerun_itinerary = updates.get("rerun_itinerary")
-                    
-                    if rerun_hotels:
-                        logger.info("🏨 Re-running Hotel Recommendations...")
-                        await websocket.send_text(json.dumps({"type": "update", "step": "recommend_hotels", "message": "Finding new hotels..."}))
-                        
-                        # Invoke Agent Directly
-                        hotel_result = await asyncio.to_thread(recommend_hotels, new_state)
-                        # Update state
-                        if "accommodations" in hotel_result:
-                            new_state.accommodations = hotel_result["accommodations"]
-                            final_state_data["accommodations"] = hotel_result["accommodations"]
-                            
-                        # Send Partial Update
-                        await websocket.send_text(json.dumps({
-                            "type": "update", "step": "recommend_hotels", "message": "Hotels updated!", "data": final_state_data
-                        }))
-                        
-                        # Force Itinerary update if hotels changed
-                        rerun_itinerary = True
-
-                    if rerun_itinerary:
-                        logger.info("📝 Re-generating Itinerary...")
-                        await websocket.send_text(json.dumps({"type": "update", "step": "itinerary", "message": "Updating itinerary..."}))
-                        
-                        itin_result = await asyncio.to_thread(generate_itinerary, new_state)
-                        if "itinerary" in itin_result:
-                            new_state.itinerary = itin_result["itinerary"]
-                            final_state_data["itinerary"] = itin_result["itinerary"]
-                            
-                        await websocket.send_text(json.dumps({
-                            "type": "update", "step": "itinerary", "message": "Itinerary updated!", "data": final_state_data
-                        }))
 
                     # Save updated plan
-                    # await asyncio.to_thread(save_trip_plan, new_state) # Optional: save every refinement
+                    # await asave_trip_plan(new_state) # Optional: save every refinement
 
                     await websocket.send_text(json.dumps({
-                        "type": "complete", "message": "Plan updated!", "data": final_state_data
+                        "type": "complete", "message": "Plan updated!", "seq": seq, "data": final_state_data
                     }))
 
             except WebSocketDisconnect:
@@ -0,0 +1,27 @@
+import os
+from typing import List, Sequence
+
+from utils.metrics import metrics
+
+# Upper bound on rows per INSERT statement (keeps packets well under max_allowed_packet)
+DEFAULT_BATCH_SIZE = int(os.getenv("DB_INSERT_BATCH_SIZE", "500"))
+
+def insert_many(cur, table: str, columns: Sequence[str], rows: List[Sequence], batch_size: int = None) -> int:
+    """
+    Insert rows with one multi-row INSERT per batch instead of one per row.
+    Runs on the caller's cursor, so it is part of the caller's transaction.
+    Returns the number of rows written.
+    """
+    if not rows:
+        return 0
+    batch_size = max(1, batch_size or DEFAULT_BATCH_SIZE)
+    placeholders = "(" + ", ".join(["%s"] * len(columns)) + ")"
+    prefix = f"INSERT INTO {table} ({', '.join(columns)}) VALUES "
+
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        params = [value for row in batch for value in row]
+        cur.execute(prefix + ", ".join([placeholders] * len(batch)), params)
+
+    metrics.incr(f"db.rows_written.{table}", len(rows))
+    return len(rows)
@@ -0,0 +1,93 @@
+import json
+import hashlib
+from typing import Any, Dict, Optional
+
+from agents.tools.airport_index import normalize
+from agents.tools.serp_tools import known_location_id
+
+DEFAULT_TRIP_PURPOSE = "vacation"  # TravelState default
+
+def canonical_location(value: Optional[str]) -> str:
+    """
+    One spelling per place: "Mumbai", "mumbai " and "BOM" all become "BOM".
+    Uses the airport index / resolution cache; unknown names are normalized text.
+    """
+    if not value:
+        return ""
+    value = value.strip()
+    return known_location_id(value) or normalize(value)
+
+def _date(value: Any) -> str:
+    return str(value)[:10] if value else ""
+
+def _digest(*parts: str) -> str:
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+def input_fingerprint(inputs: Dict[str, Any]) -> str:
+    """Stable digest of a node's prompt inputs (see graph.fingerprinted_node)."""
+    return hashlib.sha1(json.dumps(inputs, sort_keys=True, default=str).encode()).hexdigest()
+
+def trip_keys(p: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Cache keys stored on trip_plans:
+    - cache_key: route + dates + purpose (exact hit)
+    - route_key: route + purpose (near-match on shifted dates)
+    - dest_key:  destination only (reuse of destination-level data)
+    """
+    origin = canonical_location(p.get("origin_id") or p.get("origin"))
+    destination = canonical_location(p.get("destination_id") or p.get("destination"))
+    purpose = normalize(p.get("trip_purpose") or DEFAULT_TRIP_PURPOSE)
+    return {
+        "cache_key": _digest(origin, destination, _date(p.get("start_date")), _date(p.get("end_date")), purpose),
+        "route_key": _digest(origin, destination, purpose),
+        "dest_key": destination[:255],
+    }
+
+def _preferences_digest(preferences) -> str:
+    return _digest(*sorted(normalize(p) for p in preferences or [])) if preferences else ""
+
+def component_key(component: str, p: Dict[str, Any]) -> Optional[str]:
+    """
+    Cache key for one fetch branch, built only from the inputs that branch uses:
+    - weather:         destination + date window
+    - live_search:     destination + dates + bedrooms (+ preferences, which shape the query)
+    - flight_api:      route + dates (+ user preferences, which filter airlines)
+    - community_agent: destination only
+    None when a required input is missing (the branch is then always fetched).
+    """
+    destination = canonical_location(p.get("destination_id") or p.get("destination"))
+    start, end = _date(p.get("start_date")), _date(p.get("end_date"))
+
+    if component == "weather":
+        parts = [destination, start, end]
+    elif component == "live_search":
+        parts = [destination, start, end, str(p.get("bedrooms") or 1), _preferences_digest(p.get("user_preferences"))]
+    elif component == "flight_api":
+        origin = canonical_location(p.get("origin_id") or p.get("origin"))
+        parts = [origin, destination, start, end, _preferences_digest(p.get("user_preferences"))]
+    elif component == "community_agent":
+        parts = [destination]
+    else:
+        return None
+
+    if not all(parts[:4]):   # the preferences digest may be empty
+        return None
+    return f"{component}:{_digest(*parts)}"
+
+# Request fields (besides the route) that change a plan's result
+PLAN_INPUT_FIELDS = (
+    "user_id", "start_date", "end_date", "trip_purpose", "bedrooms", "max_price_per_night",
+    "min_rating", "max_flight_price", "travel_party", "traveler_age", "group_age_min",
+    "group_age_max", "transportation_mode", "budget", "temp_unit",
+)
+
+def plan_key(p: Dict[str, Any]) -> str:
+    """
+    Identity of a plan request: two requests with the same key produce the
+    same plan, so a run in progress can be shared (see api/server.py).
+    """
+    inputs = {field: p.get(field) for field in PLAN_INPUT_FIELDS}
+    inputs["origin"] = canonical_location(p.get("origin_id") or p.get("origin"))
+    inputs["destination"] = canonical_location(p.get("destination_id") or p.get("destination"))
+    inputs["trip_purpose"] = normalize(p.get("trip_purpose") or DEFAULT_TRIP_PURPOSE)
+    return input_fingerprint(inputs)
@@ -0,0 +1,97 @@
+import os
+from typing import Any, Dict, Optional
+
+from database.cache_keys import component_key
+from agents.weather_agent import summarize_weather
+from utils.cache import TieredCache
+from utils.logger import setup_logger
+from utils.metrics import metrics
+
+logger = setup_logger("component_cache")
+
+MINUTE, HOUR = 60, 60 * 60
+
+# Per-branch results cached independently of the trip_plans row, so a new trip
+# that shares a destination (or a route) with an earlier one only fetches what
+# differs. Keys: see database.cache_keys.component_key.
+COMPONENT_FIELDS = {
+    "weather": ["weather_info"],          # weather_summary is rebuilt in the user's unit
+    "live_search": ["accommodations"],
+    "flight_api": ["flights"],
+    "community_agent": ["top_sights", "local_places", "local_news", "discussions", "generated_ui"],
+}
+
+# Fields that must be non-empty for a result to be worth caching. Failed
+# fetches are never cached so the next request (or the correction loop) retries.
+REQUIRED_FIELDS = {
+    "weather": ["weather_info"],
+    "live_search": ["accommodations"],
+    "flight_api": ["flights"],
+    "community_agent": ["top_sights", "local_places", "local_news", "discussions"],
+}
+
+COMPONENT_TTLS = {
+    "weather": float(os.getenv("COMPONENT_TTL_WEATHER_SECONDS", str(3 * HOUR))),
+    "live_search": float(os.getenv("COMPONENT_TTL_HOTELS_SECONDS", str(30 * MINUTE))),
+    "flight_api": float(os.getenv("COMPONENT_TTL_FLIGHTS_SECONDS", str(15 * MINUTE))),
+    "community_agent": float(os.getenv("COMPONENT_TTL_COMMUNITY_SECONDS", str(24 * HOUR))),
+}
+
+def _default_component_cache():
+    if os.getenv("COMPONENT_CACHE_ENABLED", "true").lower() == "false":
+        return None
+    return TieredCache(
+        "components",
+        path=os.getenv("COMPONENT_CACHE_PATH", ".cache/components.sqlite"),
+        max_entries=int(os.getenv("COMPONENT_CACHE_MAX_ENTRIES", "512")),
+        max_disk_entries=int(os.getenv("COMPONENT_CACHE_MAX_DISK_ENTRIES", "5000")),
+    )
+
+_component_cache = _default_component_cache()
+
+def set_component_cache(cache) -> None:
+    """Swap the component cache backend (anything with get/set); None disables it."""
+    global _component_cache
+    _component_cache = cache
+
+def _params(state) -> Dict[str, Any]:
+    return state if isinstance(state, dict) else state.model_dump()
+
+def component_cache_key(name: str, state) -> Optional[str]:
+    """Key of a branch's result for this state; None if caching does not apply."""
+    if _component_cache is None or name not in COMPONENT_FIELDS:
+        return None
+    return component_key(name, _params(state))
+
+def get_component(name: str, state) -> Optional[Dict[str, Any]]:
+    """Cached state updates for one fetch branch, or None on a miss."""
+    key = component_cache_key(name, state)
+    if key is None:
+        return None
+    cached = _component_cache.get(key)
+    metrics.incr(f"component_cache.{name}.{'hit' if cached is not None else 'miss'}")
+    if cached is not None:
+        logger.info(f"♻️ Reusing cached {name} results")
+        cached = component_updates(name, cached, state)
+    return cached
+
+def component_updates(name: str, payload: Dict[str, Any], state) -> Dict[str, Any]:
+    """State updates for this state from a shared component payload (COMPONENT_FIELDS only)."""
+    updates = dict(payload)
+    if name == "weather":
+        unit = _params(state).get("temp_unit") or "C"
+        updates["weather_summary"] = summarize_weather(updates.get("weather_info"), unit) or "Weather unavailable."
+    return updates
+
+def put_component(name: str, state, updates: Dict[str, Any]) -> bool:
+    """Cache a branch's fresh results under the key of the inputs that produced them."""
+    key = component_cache_key(name, state)
+    if key is None or not any(updates.get(field) for field in REQUIRED_FIELDS[name]):
+        return False
+    try:
+        _component_cache.set(key, {k: updates.get(k) for k in COMPONENT_FIELDS[name]}, COMPONENT_TTLS[name])
+    except Exception as e:
+        logger.warning(f"⚠️ Could not cache {name} results: {e}")
+        return False
+    metrics.incr(f"component_cache.{name}.store")
+    return True
@@ -1,184 +1,44 @@
-
+import sys
 from dotenv import load_dotenv
 from database.singlestore_client import get_conn
+from database.migrations import migrate, drop_all
 
 # Load environment variables
 load_dotenv()
 
 def init_db():
     """
-    Initialize database tables only (assumes database already exists).
-    Run this after ensuring your SingleStore database is created.
+    Bring the database schema up to date (assumes database already exists).
+    Non-destructive: existing tables and cached trips are kept.
     """
-    print("🛠️ Initializing Database Tables...")
-    
-    conn = get_conn()
-    cur = conn.cursor()
-
-    # 1. Trip Plans (Parent Table)
-    cur.execute("DROP TABLE IF EXISTS trip_plans")
-    cur.execute("""
-        CREATE TABLE trip_plans (
-            id BIGINT AUTO_INCREMENT PRIMARY KEY,
-            -- Search Parameters
-            origin VARCHAR(255),
-            destination VARCHAR(255),
-            origin_city VARCHAR(255),
-            destination_city VARCHAR(255),
-            start_date DATE,
-            end_date DATE,
-            trip_purpose VARCHAR(50),
-            travel_party VARCHAR(50),
-            traveler_age INT,
-            group_age_min INT,
-            group_age_max INT,
-            transportation_mode VARCHAR(50),
-            budget FLOAT,
-            bedrooms INT,
-            max_price_per_night FLOAT,
-            min_rating FLOAT,
-            
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            KEY cache_idx (origin, destination, start_date, end_date)
-        );
-    """)
-
-    # 2. Flights (Child)
-    cur.execute("DROP TABLE IF EXISTS flights")
-    cur.execute("""
-        CREATE TABLE flights (
-            id BIGINT AUTO_INCREMENT PRIMARY KEY,
-            trip_id BIGINT,
-            airline VARCHAR(255),
-            origin VARCHAR(10),
-            destination VARCHAR(10),
-            price FLOAT,
-            url TEXT,
-            details JSON, -- Stores rich data like flight number, extensions
-            search_id VARCHAR(255),
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            KEY(trip_id)
-        );
-    """)
-
-    # 3. Accommodations (Child)
-    cur.execute("DROP TABLE IF EXISTS accommodations")
-    cur.execute("""
-        CREATE TABLE accommodations (
-            id BIGINT AUTO_INCREMENT PRIMARY KEY,
-            trip_id BIGINT,
-            name VARCHAR(255),
-            city VARCHAR(255),
-            country VARCHAR(255),
-            price_per_night FLOAT,
-            rating FLOAT,
-            bedrooms INT,
-            url TEXT,
-            image_url TEXT,
-            description TEXT,
-            search_id VARCHAR(255),
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            KEY(trip_id)
-        );
-    """)
-    
-    # 4. Itineraries (Child)
-    cur.execute("DROP TABLE IF EXISTS itineraries")
-    cur.execute("""
-        CREATE TABLE itineraries (
-            id BIGINT AUTO_INCREMENT PRIMARY KEY,
-            trip_id BIGINT,
-            itinerary_text LONGTEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            KEY(trip_id)
-        );
-    """)
-
-    # 5. Weather (Child)
-    cur.execute("DROP TABLE IF EXISTS weather")
-    cur.execute("""
-        CREATE TABLE weather (
-            id BIGINT AUTO_INCREMENT PRIMARY KEY,
-            trip_id BIGINT,
-            summary TEXT,
-            weather_info JSON, -- Structured forecast
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            KEY(trip_id)
-        );
-    """)
-
-    # 6. Top Sights
-    cur.execute("DROP TABLE IF EXISTS top_sights")
-    cur.execute("""
-        CREATE TABLE top_sights (
-            id BIGINT AUTO_INCREMENT PRIMARY KEY,
-            trip_id BIGINT,
-            title VARCHAR(255),
-            description TEXT,
-            price VARCHAR(100),
-            rating FLOAT,
-            reviews INT,
-            image TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            KEY(trip_id)
-        );
-    """)
+    print("🛠️ Checking database schema...")
 
-    # 7. Local Places
-    cur.execute("DROP TABLE IF EXISTS local_places")
-    cur.execute("""
-        CREATE TABLE local_places (
-            id BIGINT AUTO_INCREMENT PRIMARY KEY,
-            trip_id BIGINT,
-            title VARCHAR(255),
-            type VARCHAR(100),
-            address TEXT,
-            rating FLOAT,
-            thumbnail TEXT,
-            description TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            KEY(trip_id)
-        );
-    """)
-
-    # 8. Local News
-    cur.execute("DROP TABLE IF EXISTS local_news")
-    cur.execute("""
-        CREATE TABLE local_news (
-            id BIGINT AUTO_INCREMENT PRIMARY KEY,
-            trip_id BIGINT,
-            title VARCHAR(255),
-            source VARCHAR(255),
-            date VARCHAR(100),
-            snippet TEXT,
-            image TEXT,
-            link TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            KEY(trip_id)
-        );
-    """)
+    conn = get_conn()
+    try:
+        applied = migrate(conn)
+    finally:
+        conn.close()
 
-    # 9. Discussions
-    cur.execute("DROP TABLE IF EXISTS discussions")
-    cur.execute("""
-        CREATE TABLE discussions (
-            id BIGINT AUTO_INCREMENT PRIMARY KEY,
-            trip_id BIGINT,
-            title VARCHAR(255),
-            source VARCHAR(255),
-            snippet TEXT,
-            link TEXT,
-            date VARCHAR(100),
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            KEY(trip_id)
-        );
-    """)
+    if applied:
+        print(f"✅ Applied {applied} schema migration(s).")
+    else:
+        print("✅ Database schema is up to date.")
 
-    conn.commit()
-    print("✅ Database tables initialized successfully.")
-    conn.close()
+def reset_db():
+    """
+    Drop and recreate every table. Deletes all saved trips.
+    Admin only: python -m database.init_db --reset
+    """
+    print("⚠️ Dropping all tables...")
+    conn = get_conn()
+    try:
+        drop_all(conn)
+    finally:
+        conn.close()
+    init_db()
 
 if __name__ == "__main__":
-    from dotenv import load_dotenv
-    load_dotenv()
-    init_db()
+    if "--reset" in sys.argv:
+        reset_db()
+    else:
+        init_db()
@@ -0,0 +1,267 @@
+import time
+from typing import Callable, List, Tuple
+
+from utils.logger import setup_logger
+
+logger = setup_logger("migrations")
+
+# Baseline schema. Every statement is create-if-missing, so running it
+# against an existing database never touches data.
+BASELINE_TABLES = [
+    # 1. Trip Plans (Parent Table)
+    ("trip_plans", """
+        CREATE TABLE IF NOT EXISTS trip_plans (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            -- Search Parameters
+            origin VARCHAR(255),
+            destination VARCHAR(255),
+            origin_city VARCHAR(255),
+            destination_city VARCHAR(255),
+            start_date DATE,
+            end_date DATE,
+            trip_purpose VARCHAR(50),
+            travel_party VARCHAR(50),
+            traveler_age INT,
+            group_age_min INT,
+            group_age_max INT,
+            transportation_mode VARCHAR(50),
+            budget FLOAT,
+            bedrooms INT,
+            max_price_per_night FLOAT,
+            min_rating FLOAT,
+
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            KEY cache_idx (origin, destination, start_date, end_date)
+        );
+    """),
+    # 2. Flights (Child)
+    ("flights", """
+        CREATE TABLE IF NOT EXISTS flights (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            trip_id BIGINT,
+            airline VARCHAR(255),
+            origin VARCHAR(10),
+            destination VARCHAR(10),
+            price FLOAT,
+            url TEXT,
+            details JSON, -- Stores rich data like flight number, extensions
+            search_id VARCHAR(255),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            KEY(trip_id)
+        );
+    """),
+    # 3. Accommodations (Child)
+    ("accommodations", """
+        CREATE TABLE IF NOT EXISTS accommodations (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            trip_id BIGINT,
+            name VARCHAR(255),
+            city VARCHAR(255),
+            country VARCHAR(255),
+            price_per_night FLOAT,
+            rating FLOAT,
+            bedrooms INT,
+            url TEXT,
+            image_url TEXT,
+            description TEXT,
+            search_id VARCHAR(255),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            KEY(trip_id)
+        );
+    """),
+    # 4. Itineraries (Child)
+    ("itineraries", """
+        CREATE TABLE IF NOT EXISTS itineraries (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            trip_id BIGINT,
+            itinerary_text LONGTEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            KEY(trip_id)
+        );
+    """),
+    # 5. Weather (Child)
+    ("weather", """
+        CREATE TABLE IF NOT EXISTS weather (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            trip_id BIGINT,
+            summary TEXT,
+            weather_info JSON, -- Structured forecast
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            KEY(trip_id)
+        );
+    """),
+    # 6. Top Sights
+    ("top_sights", """
+        CREATE TABLE IF NOT EXISTS top_sights (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            trip_id BIGINT,
+            title VARCHAR(255),
+            description TEXT,
+            price VARCHAR(100),
+            rating FLOAT,
+            reviews INT,
+            image TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            KEY(trip_id)
+        );
+    """),
+    # 7. Local Places
+    ("local_places", """
+        CREATE TABLE IF NOT EXISTS local_places (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            trip_id BIGINT,
+            title VARCHAR(255),
+            type VARCHAR(100),
+            address TEXT,
+            rating FLOAT,
+            thumbnail TEXT,
+            description TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            KEY(trip_id)
+        );
+    """),
+    # 8. Local News
+    ("local_news", """
+        CREATE TABLE IF NOT EXISTS local_news (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            trip_id BIGINT,
+            title VARCHAR(255),
+            source VARCHAR(255),
+            date VARCHAR(100),
+            snippet TEXT,
+            image TEXT,
+            link TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            KEY(trip_id)
+        );
+    """),
+    # 9. Discussions
+    ("discussions", """
+        CREATE TABLE IF NOT EXISTS discussions (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            trip_id BIGINT,
+            title VARCHAR(255),
+            source VARCHAR(255),
+            snippet TEXT,
+            link TEXT,
+            date VARCHAR(100),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            KEY(trip_id)
+        );
+    """),
+]
+
+def _column_exists(cur, table: str, column: str) -> bool:
+    cur.execute(
+        """
+        SELECT COUNT(*) FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+        """,
+        (table, column),
+    )
+    return cur.fetchone()[0] > 0
+
+def _index_exists(cur, table: str, index: str) -> bool:
+    cur.execute(
+        """
+        SELECT COUNT(*) FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+        """,
+        (table, index),
+    )
+    return cur.fetchone()[0] > 0
+
+# MySQL / SingleStore error codes for a column or index that already exists
+DUPLICATE_COLUMN = 1060
+DUPLICATE_KEY_NAME = 1061
+
+def _error_code(e: Exception):
+    code = getattr(e, "errno", None)
+    if code is None and e.args and isinstance(e.args[0], int):
+        code = e.args[0]
+    return code
+
+def _alter(cur, sql: str, already_applied: int) -> None:
+    # Another worker can add the same column / index between our check and
+    # the ALTER; its error just means the change is already in place.
+    try:
+        cur.execute(sql)
+    except Exception as e:
+        if _error_code(e) != already_applied:
+            raise
+        logger.info(f"⏭️ Skipped already applied change: {sql}")
+
+def add_column(cur, table: str, column: str, definition: str) -> None:
+    """Additive and idempotent: skipped when the column is already there."""
+    if not _column_exists(cur, table, column):
+        _alter(cur, f"ALTER TABLE {table} ADD COLUMN {column} {definition}", DUPLICATE_COLUMN)
+
+def add_index(cur, table: str, index: str, columns: str) -> None:
+    if not _index_exists(cur, table, index):
+        _alter(cur, f"ALTER TABLE {table} ADD INDEX {index} ({columns})", DUPLICATE_KEY_NAME)
+
+def _baseline(cur) -> None:
+    for _, ddl in BASELINE_TABLES:
+        cur.execute(ddl)
+
+def _trip_snapshot(cur) -> None:
+    add_column(cur, "trip_plans", "snapshot", "JSON")
+
+def _trip_cache_keys(cur) -> None:
+    # Canonical keys (see database/cache_keys.py), each fully covered by an index
+    add_column(cur, "trip_plans", "cache_key", "VARCHAR(40)")
+    add_column(cur, "trip_plans", "route_key", "VARCHAR(40)")
+    add_column(cur, "trip_plans", "dest_key", "VARCHAR(255)")
+    add_index(cur, "trip_plans", "cache_key_idx", "cache_key, created_at")
+    add_index(cur, "trip_plans", "route_key_idx", "route_key, start_date, end_date")
+    add_index(cur, "trip_plans", "dest_key_idx", "dest_key, created_at")
+
+# Ordered, append-only. Never edit a migration that has shipped; add a new one.
+MIGRATIONS: List[Tuple[int, str, Callable]] = [
+    (1, "baseline tables", _baseline),
+    (2, "trip_plans.snapshot", _trip_snapshot),
+    (3, "trip_plans cache keys", _trip_cache_keys),
+]
+
+def current_version(cur) -> int:
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INT PRIMARY KEY,
+            name VARCHAR(255),
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cur.execute("SELECT MAX(version) FROM schema_version")
+    row = cur.fetchone()
+    return (row[0] if row else None) or 0
+
+def migrate(conn) -> int:
+    """
+    Apply pending migrations in order and record each in schema_version.
+    When the schema is current this is two cheap statements.
+    Returns the number of migrations applied.
+    """
+    cur = conn.cursor()
+    version = current_version(cur)
+    pending = [m for m in MIGRATIONS if m[0] > version]
+    if not pending:
+        logger.info(f"✅ Database schema is current (version {version})")
+        return 0
+
+    for number, name, apply in pending:
+        started = time.perf_counter()
+        apply(cur)
+        # add_column / add_index tolerate a concurrent worker applying the
+        # same migration; IGNORE keeps the version row unique.
+        cur.execute("INSERT IGNORE INTO schema_version (version, name) VALUES (%s, %s)", (number, name))
+        conn.commit()
+        logger.info(f"🛠️ Applied migration {number}: {name} ({time.perf_counter() - started:.2f}s)")
+    return len(pending)
+
+def drop_all(conn) -> None:
+    """Drop every table, including schema_version. Destroys all cached trips."""
+    cur = conn.cursor()
+    for table, _ in reversed(BASELINE_TABLES):
+        cur.execute(f"DROP TABLE IF EXISTS {table}")
+    cur.execute("DROP TABLE IF EXISTS schema_version")
+    conn.commit()
@@ -1,16 +1,56 @@
+import os
 import json
+import time
+import asyncio
 from datetime import datetime, timedelta
 from typing import Union, List, Dict, Any
 from database.singlestore_client import get_conn
+from database.bulk import insert_many
+from database.cache_keys import trip_keys
 from state import TravelState
 from utils.logger import setup_logger
+from utils.metrics import metrics
 
 logger = setup_logger()
 
+TRIP_CACHE_HOURS = 24
+
+# Grace window past TRIP_CACHE_HOURS in which an exact match is still served,
+# flagged `stale`, while the caller refreshes it in the background (0 = off)
+TRIP_CACHE_STALE_HOURS = int(os.getenv("TRIP_CACHE_STALE_HOURS", "24"))
+
+# Optional near-match policy, comma-separated (off by default):
+#   dates        same route and purpose, start/end shifted by at most one day
+#   destination  reuse sights/places/news/discussions from any recent trip to
+#                the destination; everything else is fetched fresh
+TRIP_CACHE_NEAR_MATCH = {
+    policy.strip() for policy in os.getenv("TRIP_CACHE_NEAR_MATCH", "").lower().split(",") if policy.strip()
+}
+
+# Destination-level fields (independent of origin and dates)
+DESTINATION_FIELDS = ("top_sights", "local_places", "local_news", "discussions", "generated_ui")
+
+# Fields served on a cache hit. Stored together as one JSON snapshot on the
+# trip_plans row so a hit is a single query.
+SNAPSHOT_FIELDS = (
+    "origin_city", "destination_city", "weather_info", "weather_summary",
+    "flights", "accommodations", "top_sights", "local_places", "local_news",
+    "discussions", "generated_ui", "itinerary", "trip_analysis", "node_fingerprints",
+)
+
+def _trip_snapshot(state: TravelState) -> str:
+    return json.dumps({field: getattr(state, field) for field in SNAPSHOT_FIELDS}, default=str)
+
+def _load_json(value):
+    # The driver may return JSON columns as text or already decoded
+    return json.loads(value) if isinstance(value, (str, bytes)) else value
+
 def save_trip_plan(state: TravelState):
     """
     Saves the completed trip plan to the database (Normalized).
     """
+    conn = None
+    started = time.perf_counter()
     try:
         conn = get_conn()
         cur = conn.cursor()
@@ -21,14 +61,18 @@ def save_trip_plan(state: TravelState):
                 origin, destination, origin_city, destination_city, start_date, end_date, 
                 trip_purpose, travel_party, traveler_age, 
                 group_age_min, group_age_max, transportation_mode, 
-                budget, bedrooms, max_price_per_night, min_rating
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                budget, bedrooms, max_price_per_night, min_rating, snapshot,
+                cache_key, route_key, dest_key
+            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
         """
+        keys = trip_keys(state.model_dump())
         values_plan = (
             state.origin, state.destination, state.origin_city, state.destination_city, state.start_date, state.end_date,
             state.trip_purpose, state.travel_party, state.traveler_age,
             state.group_age_min, state.group_age_max, state.transportation_mode,
-            state.budget, state.bedrooms, state.max_price_per_night, state.min_rating
+            state.budget, state.bedrooms, state.max_price_per_night, state.min_rating,
+            _trip_snapshot(state),
+            keys["cache_key"], keys["route_key"], keys["dest_key"]
         )
         cur.execute(query_plan, values_plan)
         trip_id = cur.lastrowid
@@ -47,29 +91,26 @@ def save_trip_plan(state: TravelState):
                 (trip_id, state.weather_summary, json.dumps(state.weather_info))
             )
 
+        # Child tables: one multi-row INSERT per table (batched), same transaction
+        rows = 0
+
         # 4. Insert Flights (One-to-Many)
-        flight_query = """
-            INSERT INTO flights (trip_id, airline, origin, destination, price, url, details)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-        """
-        for f in state.flights:
-            cur.execute(flight_query, (
-                trip_id, 
-                f.get("airline"), 
-                f.get("origin"), 
-                f.get("destination"), 
-                f.get("price"), 
-                f.get("url"), 
+        rows += insert_many(cur, "flights",
+            ("trip_id", "airline", "origin", "destination", "price", "url", "details"),
+            [(
+                trip_id,
+                f.get("airline"),
+                f.get("origin"),
+                f.get("destination"),
+                f.get("price"),
+                f.get("url"),
                 json.dumps(f)  # store full object in details for reconstruction
-            ))
+            ) for f in state.flights])
 
         # 5. Insert Accommodations (One-to-Many)
-        hotel_query = """
-            INSERT INTO accommodations (trip_id, name, city, country, price_per_night, rating, bedrooms, url, image_url, description)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """
-        for h in state.accommodations:
-            cur.execute(hotel_query, (
+        rows += insert_many(cur, "accommodations",
+            ("trip_id", "name", "city", "country", "price_per_night", "rating", "bedrooms", "url", "image_url", "description"),
+            [(
                 trip_id,
                 h.get("name"),
                 h.get("city"),
@@ -80,174 +121,271 @@ def save_trip_plan(state: TravelState):
                 h.get("url"),
                 h.get("image"),
                 h.get("description")
-            ))
+            ) for h in state.accommodations])
 
         # 6. Insert Top Sights
-        if state.top_sights:
-            sights_query = """
-                INSERT INTO top_sights (trip_id, title, description, price, rating, reviews, image)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """
-            for s in state.top_sights:
-                cur.execute(sights_query, (
-                    trip_id, s.get("title"), s.get("description"), s.get("price"), s.get("rating"), s.get("reviews"), s.get("image")
-                ))
+        rows += insert_many(cur, "top_sights",
+            ("trip_id", "title", "description", "price", "rating", "reviews", "image"),
+            [(
+                trip_id, s.get("title"), s.get("description"), s.get("price"), s.get("rating"), s.get("reviews"), s.get("image")
+            ) for s in state.top_sights])
 
         # 7. Insert Local Places
-        if state.local_places:
-            local_query = """
-                INSERT INTO local_places (trip_id, title, type, address, rating, thumbnail, description)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """
-            for p in state.local_places:
-                cur.execute(local_query, (
-                    trip_id, p.get("title"), p.get("type"), p.get("address"), p.get("rating"), p.get("thumbnail"), p.get("description")
-                ))
-        
+        rows += insert_many(cur, "local_places",
+            ("trip_id", "title", "type", "address", "rating", "thumbnail", "description"),
+            [(
+                trip_id, p.get("title"), p.get("type"), p.get("address"), p.get("rating"), p.get("thumbnail"), p.get("description")
+            ) for p in state.local_places])
+
         # 8. Insert Local News
-        if state.local_news:
-            news_query = """
-                INSERT INTO local_news (trip_id, title, source, date, snippet, image, link)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """
-            for n in state.local_news:
-                cur.execute(news_query, (
-                    trip_id, n.get("title"), n.get("source"), n.get("date"), n.get("snippet"), n.get("image"), n.get("link")
-                ))
-        
+        rows += insert_many(cur, "local_news",
+            ("trip_id", "title", "source", "date", "snippet", "image", "link"),
+            [(
+                trip_id, n.get("title"), n.get("source"), n.get("date"), n.get("snippet"), n.get("image"), n.get("link")
+            ) for n in state.local_news])
+
         # 9. Insert Discussions
-        if state.discussions:
-            discuss_query = """
-                INSERT INTO discussions (trip_id, title, source, snippet, link, date)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            """
-            for d in state.discussions:
-                cur.execute(discuss_query, (
-                    trip_id, d.get("title"), d.get("source"), d.get("snippet"), d.get("link"), d.get("date")
-                ))
+        rows += insert_many(cur, "discussions",
+            ("trip_id", "title", "source", "snippet", "link", "date"),
+            [(
+                trip_id, d.get("title"), d.get("source"), d.get("snippet"), d.get("link"), d.get("date")
+            ) for d in state.discussions])
 
         conn.commit()
-        conn.close()
-        logger.info(f"💾 Trip plan saved for {state.destination} (ID: {trip_id})")
+        elapsed = time.perf_counter() - started
+        metrics.observe("db.save_trip_plan.seconds", elapsed)
+        logger.info(f"💾 Trip plan saved for {state.destination} (ID: {trip_id}, {rows} rows in {elapsed:.3f}s)")
         
     except Exception as e:
         logger.error(f"❌ Failed to save trip plan: {e}")
+    finally:
+        # Pooled connections go back to the pool (uncommitted work is rolled back)
+        if conn is not None:
+            conn.close()
 
-def find_cached_trip(params: Union[dict, TravelState]) -> Union[dict, None]:
+def _params_dict(params: Union[dict, TravelState]) -> dict:
+    # Handle both dict and TravelState (Pydantic model)
+    if hasattr(params, "model_dump"):
+        return params.model_dump()
+    return params
+
+def _record_lookup(outcome: str) -> None:
+    metrics.incr(f"trip_cache.{outcome}")
+
+def trip_cache_stats() -> dict:
+    stats = {o: metrics.counter(f"trip_cache.{o}") for o in ("exact", "stale", "near_dates", "partial", "miss")}
+    lookups = sum(stats.values())
+    stats["hit_rate"] = round((stats["exact"] + stats["stale"] + stats["near_dates"]) / lookups, 3) if lookups else 0.0
+    return stats
+
+metrics.register_gauge("trip_cache", trip_cache_stats)
+
+TRIP_COLUMNS = "id, created_at, origin_city, destination_city, snapshot"
+
+def _find_exact(cur, keys: dict):
+    cur.execute(f"""
+        SELECT {TRIP_COLUMNS}
+        FROM trip_plans
+        WHERE cache_key = %s
+            AND created_at > DATE_SUB(NOW(), INTERVAL {TRIP_CACHE_HOURS} HOUR)
+        ORDER BY created_at DESC
+        LIMIT 1
+    """, (keys["cache_key"],))
+    return cur.fetchone()
+
+def _find_stale(cur, keys: dict):
+    # Most recent exact match that expired less than TRIP_CACHE_STALE_HOURS ago
+    cur.execute(f"""
+        SELECT {TRIP_COLUMNS}
+        FROM trip_plans
+        WHERE cache_key = %s
+            AND created_at > DATE_SUB(NOW(), INTERVAL {TRIP_CACHE_HOURS + TRIP_CACHE_STALE_HOURS} HOUR)
+        ORDER BY created_at DESC
+        LIMIT 1
+    """, (keys["cache_key"],))
+    return cur.fetchone()
+
+def _find_shifted_dates(cur, keys: dict, p: dict):
+    start, end = p.get("start_date"), p.get("end_date")
+    if not start or not end:
+        return None
+    cur.execute(f"""
+        SELECT {TRIP_COLUMNS}
+        FROM trip_plans
+        WHERE route_key = %s
+            AND start_date BETWEEN DATE_SUB(%s, INTERVAL 1 DAY) AND DATE_ADD(%s, INTERVAL 1 DAY)
+            AND end_date BETWEEN DATE_SUB(%s, INTERVAL 1 DAY) AND DATE_ADD(%s, INTERVAL 1 DAY)
+            AND created_at > DATE_SUB(NOW(), INTERVAL {TRIP_CACHE_HOURS} HOUR)
+        ORDER BY ABS(DATEDIFF(start_date, %s)) + ABS(DATEDIFF(end_date, %s)), created_at DESC
+        LIMIT 1
+    """, (keys["route_key"], start, start, end, end, start, end))
+    return cur.fetchone()
+
+def _find_destination_data(cur, keys: dict):
+    if not keys["dest_key"]:
+        return None
+    cur.execute(f"""
+        SELECT snapshot
+        FROM trip_plans
+        WHERE dest_key = %s
+            AND snapshot IS NOT NULL
+            AND created_at > DATE_SUB(NOW(), INTERVAL {TRIP_CACHE_HOURS} HOUR)
+        ORDER BY created_at DESC
+        LIMIT 1
+    """, (keys["dest_key"],))
+    row = cur.fetchone()
+    if not row:
+        return None
+    snapshot = _load_json(row[0])
+    partial = {field: snapshot.get(field) or [] for field in DESTINATION_FIELDS}
+    partial["cached_components"] = ["community_agent"]
+    return partial
+
+def find_cached_trip(params: Union[dict, TravelState], allow_partial: bool = False,
+                     allow_stale: bool = False) -> Union[dict, None]:
     """
-    Attempts to find a recent matching trip plan (Normalized).
+    Attempts to find a recent matching trip plan by canonical cache key.
+    With TRIP_CACHE_NEAR_MATCH enabled, also accepts the same route with dates
+    shifted by a day ("dates") and, when allow_partial is set, reuses
+    destination-level data from any recent trip there ("destination").
+    With allow_stale, an exact match up to TRIP_CACHE_STALE_HOURS past the
+    cutoff is returned with `stale=True`; the caller must refresh it.
     Returns None if no cache hit.
     """
+    conn = None
+    started = time.perf_counter()
     try:
+        p = _params_dict(params)
+        keys = trip_keys(p)
+
         conn = get_conn()
         cur = conn.cursor()
-        
-        # Handle both dict and TravelState (Pydantic model)
-        if hasattr(params, "dict"):
-            p = params.dict()
-        elif hasattr(params, "model_dump"): # Pydantic v2
-            p = params.model_dump()
-        else:
-            p = params
-
-        # 1. Find Trip ID
-        query = """
-            SELECT id, created_at, origin_city, destination_city
-            FROM trip_plans
-            WHERE 
-                origin = %s 
-                AND destination = %s 
-                AND start_date = %s 
-                AND end_date = %s
-                AND trip_purpose = %s
-                AND created_at > DATE_SUB(NOW(), INTERVAL 24 HOUR)
-            ORDER BY created_at DESC
-            LIMIT 1
-        """
-        cur.execute(query, (
-            p.get("origin"), p.get("destination"), 
-            p.get("start_date"), p.get("end_date"), 
-            p.get("trip_purpose")
-        ))
-        row = cur.fetchone()
-        
-        if not row:
-            conn.close()
-            return None
-            
-        trip_id = row[0]
-        logger.info(f"⚡️ Cache HIT: Found Trip ID {trip_id}")
 
-        # 2. Fetch Components
-        
-        # Itinerary
-        cur.execute("SELECT itinerary_text FROM itineraries WHERE trip_id = %s LIMIT 1", (trip_id,))
-        itinerary_row = cur.fetchone()
-        itinerary = itinerary_row[0] if itinerary_row else None
-        
-        # Weather
-        cur.execute("SELECT summary, weather_info FROM weather WHERE trip_id = %s LIMIT 1", (trip_id,))
-        weather_row = cur.fetchone()
-        weather_summary = weather_row[0] if weather_row else None
-        weather_info = json.loads(weather_row[1]) if weather_row and weather_row[1] else None
-        
-        # Flights 
-        cur.execute("SELECT details FROM flights WHERE trip_id = %s", (trip_id,))
-        flight_rows = cur.fetchall()
-        flights = [json.loads(r[0]) for r in flight_rows]
-        
-        # Accommodations
-        cur.execute("""
-            SELECT name, city, country, price_per_night, rating, bedrooms, url, image_url, description 
-            FROM accommodations WHERE trip_id = %s
-        """, (trip_id,))
-        
-        columns = [col[0] for col in cur.description]
-        hotel_rows = cur.fetchall()
-        hotels = []
-        for r in hotel_rows:
-            h = dict(zip(columns, r))
-            h['price'] = h['price_per_night'] 
-            h['image'] = h['image_url']
-            hotels.append(h)
-        
-        # Sights
-        cur.execute("SELECT title, description, price, rating, reviews, image FROM top_sights WHERE trip_id = %s", (trip_id,))
-        sights_columns = [col[0] for col in cur.description]
-        sights = [dict(zip(sights_columns, r)) for r in cur.fetchall()]
-
-        # Local Places
-        cur.execute("SELECT title, type, address, rating, thumbnail, description FROM local_places WHERE trip_id = %s", (trip_id,))
-        places_columns = [col[0] for col in cur.description]
-        local_places = [dict(zip(places_columns, r)) for r in cur.fetchall()]
-        
-        # News
-        cur.execute("SELECT title, source, date, snippet, image, link FROM local_news WHERE trip_id = %s", (trip_id,))
-        news_columns = [col[0] for col in cur.description]
-        local_news = [dict(zip(news_columns, r)) for r in cur.fetchall()]
-        
-        # Discussions
-        cur.execute("SELECT title, source, snippet, link, date FROM discussions WHERE trip_id = %s", (trip_id,))
-        discuss_columns = [col[0] for col in cur.description]
-        discussions = [dict(zip(discuss_columns, r)) for r in cur.fetchall()]
-
-        conn.close()
-
-        return {
-            "origin_city": row[2],
-            "destination_city": row[3],
-            "weather_info": weather_info,
-            "weather_summary": weather_summary,
-            "flights": flights,
-            "accommodations": hotels,
-            "top_sights": sights,
-            "local_places": local_places,
-            "local_news": local_news,
-            "discussions": discussions,
-            "itinerary": itinerary,
-            "cached": True
-        }
+        outcome = "exact"
+        row = _find_exact(cur, keys)
+        if not row and "dates" in TRIP_CACHE_NEAR_MATCH:
+            outcome = "near_dates"
+            row = _find_shifted_dates(cur, keys, p)
+        if not row and allow_stale and TRIP_CACHE_STALE_HOURS > 0:
+            outcome = "stale"
+            row = _find_stale(cur, keys)
+
+        if row:
+            _record_lookup(outcome)
+            result = _hydrate_trip(cur, row)
+            result["cached"] = True
+            if outcome == "near_dates":
+                result["near_match"] = "dates"
+            result["stale"] = outcome == "stale"
+            return result
+
+        if allow_partial and "destination" in TRIP_CACHE_NEAR_MATCH:
+            partial = _find_destination_data(cur, keys)
+            if partial:
+                _record_lookup("partial")
+                logger.info(f"♻️ Reusing destination data for {keys['dest_key']}")
+                return partial
+
+        _record_lookup("miss")
+        return None
 
     except Exception as e:
         logger.error(f"⚠️ Cache lookup failed: {e}")
         return None
+    finally:
+        if conn is not None:
+            conn.close()
+        metrics.observe("db.find_cached_trip.seconds", time.perf_counter() - started)
+
+def _hydrate_trip(cur, row) -> dict:
+    trip_id = row[0]
+    if row[4]:
+        metrics.incr("trip_cache.hydrate.snapshot")
+        logger.info(f"⚡️ Cache HIT: Found Trip ID {trip_id} (snapshot)")
+        return _load_json(row[4])
+
+    metrics.incr("trip_cache.hydrate.legacy")
+    logger.info(f"⚡️ Cache HIT: Found Trip ID {trip_id}")
+
+    # Fetch Components (trips saved before snapshots existed)
+
+    # Itinerary
+    cur.execute("SELECT itinerary_text FROM itineraries WHERE trip_id = %s LIMIT 1", (trip_id,))
+    itinerary_row = cur.fetchone()
+    itinerary = itinerary_row[0] if itinerary_row else None
+
+    # Weather
+    cur.execute("SELECT summary, weather_info FROM weather WHERE trip_id = %s LIMIT 1", (trip_id,))
+    weather_row = cur.fetchone()
+    weather_summary = weather_row[0] if weather_row else None
+    weather_info = json.loads(weather_row[1]) if weather_row and weather_row[1] else None
+
+    # Flights 
+    cur.execute("SELECT details FROM flights WHERE trip_id = %s", (trip_id,))
+    flight_rows = cur.fetchall()
+    flights = [json.loads(r[0]) for r in flight_rows]
+
+    # Accommodations
+    cur.execute("""
+        SELECT name, city, country, price_per_night, rating, bedrooms, url, image_url, description 
+        FROM accommodations WHERE trip_id = %s
+    """, (trip_id,))
+
+    columns = [col[0] for col in cur.description]
+    hotel_rows = cur.fetchall()
+    hotels = []
+    for r in hotel_rows:
+        h = dict(zip(columns, r))
+        h['price'] = h['price_per_night'] 
+        h['image'] = h['image_url']
+        hotels.append(h)
+
+    # Sights
+    cur.execute("SELECT title, description, price, rating, reviews, image FROM top_sights WHERE trip_id = %s", (trip_id,))
+    sights_columns = [col[0] for col in cur.description]
+    sights = [dict(zip(sights_columns, r)) for r in cur.fetchall()]
+
+    # Local Places
+    cur.execute("SELECT title, type, address, rating, thumbnail, description FROM local_places WHERE trip_id = %s", (trip_id,))
+    places_columns = [col[0] for col in cur.description]
+    local_places = [dict(zip(places_columns, r)) for r in cur.fetchall()]
+
+    # News
+    cur.execute("SELECT title, source, date, snippet, image, link FROM local_news WHERE trip_id = %s", (trip_id,))
+    news_columns = [col[0] for col in cur.description]
+    local_news = [dict(zip(news_columns, r)) for r in cur.fetchall()]
+
+    # Discussions
+    cur.execute("SELECT title, source, snippet, link, date FROM discussions WHERE trip_id = %s", (trip_id,))
+    discuss_columns = [col[0] for col in cur.description]
+    discussions = [dict(zip(discuss_columns, r)) for r in cur.fetchall()]
+
+    return {
+        "origin_city": row[2],
+        "destination_city": row[3],
+        "weather_info": weather_info,
+        "weather_summary": weather_summary,
+        "flights": flights,
+        "accommodations": hotels,
+        "top_sights": sights,
+        "local_places": local_places,
+        "local_news": local_news,
+        "discussions": discussions,
+        "itinerary": itinerary,
+    }
+
+def check_trip_cache(state: TravelState) -> Union[dict, None]:
+    """Graph cache node: full hits, or destination-level reuse (see find_cached_trip)."""
+    return find_cached_trip(state, allow_partial=True)
+
+# Async variants: the SingleStore driver is blocking, so queries run in a
+# worker thread and the event loop stays free for other plans.
+async def asave_trip_plan(state: TravelState):
+    return await asyncio.to_thread(save_trip_plan, state)
+
+async def afind_cached_trip(params: Union[dict, TravelState], allow_partial: bool = False,
+                            allow_stale: bool = False) -> Union[dict, None]:
+    return await asyncio.to_thread(find_cached_trip, params, allow_partial, allow_stale)
+
+async def acheck_trip_cache(state: TravelState) -> Union[dict, None]:
+    return await asyncio.to_thread(check_trip_cache, state)
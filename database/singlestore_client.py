@@ -1,16 +1,19 @@
 import os
+import time
+import threading
 import singlestoredb as s2
 from dotenv import load_dotenv
 
 load_dotenv()
 
 from utils.logger import setup_logger
+from utils.metrics import metrics
 
 logger = setup_logger("db_client")
 
-def get_conn():
+def connect():
     """
-    Create and return a SingleStore database connection.
+    Open a new (unpooled) SingleStore database connection.
     """
     host = os.getenv("SINGLESTORE_HOST")
     user = os.getenv("SINGLESTORE_USER")
@@ -34,3 +37,219 @@ def get_conn():
         logger.error(f"Failed to connect to SingleStore: {e}")
         raise RuntimeError(f"Database connection failed: {e}")
 
+
+class PooledConnection:
+    """
+    Proxy handed out by the pool. Behaves like the driver connection, but
+    close() returns it to the pool instead of tearing down the socket.
+    """
+
+    def __init__(self, pool, raw, created_at):
+        self._pool = pool
+        self._raw = raw
+        self._created_at = created_at
+
+    def close(self):
+        if self._raw is not None:
+            raw, self._raw = self._raw, None
+            self._pool._release(raw, self._created_at)
+
+    def __getattr__(self, name):
+        if self._raw is None:
+            raise RuntimeError("Connection already returned to the pool")
+        return getattr(self._raw, name)
+
+    def __del__(self):
+        # Safety net for code paths that forget to close()
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ConnectionPool:
+    """
+    Thread-safe connection pool.
+
+    - `size` connections are kept open between requests; up to `max_overflow`
+      extra ones are opened under load and closed when returned.
+    - Connections idle longer than `ping_after` seconds are pinged on checkout
+      and replaced if dead; connections older than `max_lifetime` are recycled.
+    - Checkout waits up to `timeout` seconds when the pool is exhausted.
+
+    The driver is blocking, so async callers check out from a worker thread
+    (see the asyncio.to_thread wrappers in database/ops.py).
+    """
+
+    def __init__(self, connect_fn=connect, size=5, max_overflow=10, max_lifetime=1800,
+                 timeout=10, ping_after=10, name="db_pool"):
+        self._connect = connect_fn
+        self.size = size
+        self.max_overflow = max_overflow
+        self.max_lifetime = max_lifetime
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self._idle = []            # [(raw, created_at, returned_at)], most recent last
+        self._open = 0
+        self._waiting = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._stats = {"checkouts": 0, "connects": 0, "waits": 0, "timeouts": 0, "recycled": 0, "dead": 0}
+        metrics.register_gauge(name, self.stats)
+
+    def get_conn(self) -> PooledConnection:
+        started = time.perf_counter()
+        deadline = started + self.timeout
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed")
+                entry = self._idle.pop() if self._idle else None
+                if entry is None:
+                    if self._open < self.size + self.max_overflow:
+                        self._open += 1      # reserve a slot, connect outside the lock
+                    else:
+                        remaining = deadline - time.perf_counter()
+                        if remaining <= 0:
+                            self._stats["timeouts"] += 1
+                            raise RuntimeError(
+                                f"Database pool exhausted ({self._open} connections in use)"
+                            )
+                        self._stats["waits"] += 1
+                        self._waiting += 1
+                        self._cond.wait(remaining)
+                        self._waiting -= 1
+                        continue
+
+            if entry is None:
+                raw, created_at = self._new_connection()
+            else:
+                raw, created_at, returned_at = entry
+                if not self._usable(raw, created_at, returned_at):
+                    self._discard(raw)
+                    continue
+
+            with self._cond:
+                self._stats["checkouts"] += 1
+            metrics.observe("db_pool.checkout_seconds", time.perf_counter() - started)
+            return PooledConnection(self, raw, created_at)
+
+    def _new_connection(self):
+        try:
+            raw = self._connect()
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._stats["connects"] += 1
+        return raw, time.time()
+
+    def _usable(self, raw, created_at, returned_at) -> bool:
+        now = time.time()
+        if now - created_at > self.max_lifetime:
+            with self._cond:
+                self._stats["recycled"] += 1
+            return False
+        if now - returned_at > self.ping_after:
+            try:
+                cur = raw.cursor()
+                cur.execute("SELECT 1")
+                cur.fetchall()
+            except Exception as e:
+                logger.warning(f"⚠️ Dropping dead pooled connection: {e}")
+                with self._cond:
+                    self._stats["dead"] += 1
+                return False
+        return True
+
+    def _release(self, raw, created_at):
+        try:
+            raw.rollback()   # never hand out a connection with an open transaction
+        except Exception:
+            self._discard(raw)
+            return
+        with self._cond:
+            keep = (
+                not self._closed
+                and len(self._idle) < self.size
+                and time.time() - created_at < self.max_lifetime
+            )
+            if keep:
+                self._idle.append((raw, created_at, time.time()))
+                self._cond.notify()
+                return
+        self._discard(raw)
+
+    def _discard(self, raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._open -= 1
+            self._cond.notify()
+
+    def close(self):
+        """Close idle connections; checked-out ones are closed when returned."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for raw, _, _ in idle:
+            self._discard(raw)
+
+    def stats(self) -> dict:
+        with self._cond:
+            stats = dict(self._stats)
+            idle = len(self._idle)
+            stats.update({
+                "size": self.size,
+                "max_overflow": self.max_overflow,
+                "open": self._open,
+                "idle": idle,
+                "in_use": self._open - idle,
+                "waiting": self._waiting,
+            })
+        stats["saturation"] = round(stats["in_use"] / (self.size + self.max_overflow), 3)
+        return stats
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(
+                size=int(os.getenv("DB_POOL_SIZE", "5")),
+                max_overflow=int(os.getenv("DB_POOL_MAX_OVERFLOW", "10")),
+                max_lifetime=float(os.getenv("DB_POOL_MAX_LIFETIME_SECONDS", "1800")),
+                timeout=float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "10")),
+                ping_after=float(os.getenv("DB_POOL_PING_AFTER_SECONDS", "10")),
+            )
+        return _pool
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+def get_conn():
+    """
+    Return a SingleStore database connection.
+    Pooled by default: conn.close() hands it back for reuse.
+    Set DB_POOL_ENABLED=false to open a fresh connection per call.
+    """
+    if os.getenv("DB_POOL_ENABLED", "true").lower() == "false":
+        return connect()
+    return get_pool().get_conn()
@@ -1,6 +1,8 @@
 from .singlestore_client import get_conn
+from .bulk import insert_many
 from utils.logger import setup_logger
 import json
+import asyncio
 
 logger = setup_logger("store_results")
 
@@ -13,52 +15,36 @@ def store_results(state):
     cur = conn.cursor()
 
     try:
+        # One multi-row INSERT per table (batched), committed together
         # Accommodations
         if state.accommodations:
             logger.info(f"Storing {len(state.accommodations)} accommodations")
-            for h in state.accommodations:
-                cur.execute(
-                    """
-                    INSERT INTO accommodations
-                        (name, city, country, price_per_night, rating, url, bedrooms, description)
-                    VALUES
-                        (%s, %s, %s, %s, %s, %s, %s, %s)
-                    """,
-                    (
-                        h.get("name"),
-                        h.get("city"),
-                        h.get("country", ""),
-                        h.get("price"),
-                        h.get("rating"),
-                        h.get("url"),
-                        h.get("bedrooms", 1),
-                        h.get("description", "")
-                    )
-                )
+            insert_many(cur, "accommodations",
+                ("name", "city", "country", "price_per_night", "rating", "url", "bedrooms", "description"),
+                [(
+                    h.get("name"),
+                    h.get("city"),
+                    h.get("country", ""),
+                    h.get("price"),
+                    h.get("rating"),
+                    h.get("url"),
+                    h.get("bedrooms", 1),
+                    h.get("description", "")
+                ) for h in state.accommodations])
 
         # Flights
         if state.flights:
             logger.info(f"Storing {len(state.flights)} flights")
-            for f in state.flights:
-                # details might be a dict, stash it as JSON
-                details_json = json.dumps(f.get("details", {}))
-                
-                cur.execute(
-                    """
-                    INSERT INTO flights
-                        (airline, origin, destination, price, url, details)
-                    VALUES
-                        (%s, %s, %s, %s, %s, %s)
-                    """,
-                    (
-                        f.get("airline"),
-                        f.get("origin"),
-                        f.get("destination"),
-                        f.get("price"),
-                        f.get("url"),
-                        details_json
-                    )
-                )
+            insert_many(cur, "flights",
+                ("airline", "origin", "destination", "price", "url", "details"),
+                [(
+                    f.get("airline"),
+                    f.get("origin"),
+                    f.get("destination"),
+                    f.get("price"),
+                    f.get("url"),
+                    json.dumps(f.get("details", {}))  # details might be a dict, stash it as JSON
+                ) for f in state.flights])
 
         conn.commit()
         logger.info("✅ Results stored successfully.")
@@ -68,4 +54,8 @@ def store_results(state):
         # Don't raise, just log, so graph can continue
     finally:
         conn.close()
-        return state
\ No newline at end of file
+        return state
+
+async def astore_results(state):
+    """Async variant of store_results (blocking driver runs in a worker thread)."""
+    return await asyncio.to_thread(store_results, state)
@@ -92,14 +92,35 @@ export default function HomePage() {
         budget: formData.budget ? parseFloat(formData.budget as any) : null,
         bedrooms: formData.bedrooms,
         max_price: formData.maxPrice,
-        min_rating: formData.minRating
+        min_rating: formData.minRating,
+        protocol: 'delta' // Only changed keys per step; full state on complete
       }));
     };
 
+    let lastSeq = 0;
+    let streamedItinerary = '';
+
     // ... existing onmessage and onerror ...
     ws.onmessage = (event) => {
       const data = JSON.parse(event.data);
-      if (data.type === 'update') {
+      if (data.type === 'chunk') {
+        // Itinerary text as it is generated; the final update replaces it.
+        // `reset` means the server restarted generation (e.g. fallback after a failed section)
+        if (data.reset) streamedItinerary = '';
+        streamedItinerary += data.text;
+        setResults((prev: any) => ({ ...(prev || {}), itinerary: streamedItinerary }));
+      } else if (data.type === 'delta') {
+        setLogs(prev => [...prev, `Checking ${data.step}...`]);
+        if (data.seq !== lastSeq + 1) {
+          // Missed an update: ask for the full state
+          ws.send(JSON.stringify({ type: 'resync' }));
+        }
+        lastSeq = data.seq;
+        setResults((prev: any) => ({ ...(prev || {}), ...data.changes }));
+      } else if (data.type === 'snapshot') {
+        lastSeq = data.seq;
+        setResults(data.data);
+      } else if (data.type === 'update') {
         // It's a log/step update
         setLogs(prev => [...prev, `Checking ${data.step}...`]);
         // Update results with partial data if available
@@ -107,6 +128,9 @@ export default function HomePage() {
           setResults(data.data);
         }
       } else if (data.type === 'complete' || data.itinerary) {
+        if (typeof data.seq === 'number') {
+          lastSeq = data.seq;
+        }
         if (data.data) {
           setResults(data.data); // If wrapped
         } else {
@@ -1,20 +1,41 @@
-from langgraph.graph import StateGraph, END
+import copy
+import time
+import asyncio
+
+from langchain_core.runnables import RunnableLambda
+from langgraph.graph import StateGraph, START, END
 from langgraph.checkpoint.memory import MemorySaver
 
-from state import TravelState
-from agents.weather_agent import fetch_weather
-from agents.search_agent import live_search
+from state import TravelState, DEFAULT_USER_ID
+from agents.weather_agent import fetch_weather, afetch_weather
+from agents.search_agent import live_search, alive_search
 from agents.recommend_agent import recommend_hotels
 from agents.flights_agent import recommend_flights
-from agents.flight_api_agent import fetch_flights_from_api
-from agents.itinerary_agent import generate_itinerary
-from database.ops import find_cached_trip as check_cache
-from database.store_results import store_results
+from agents.flight_api_agent import fetch_flights_from_api, afetch_flights_from_api
+from agents.itinerary_agent import generate_itinerary, agenerate_itinerary, _itinerary_inputs, ITINERARY_FALLBACK
+from database.ops import check_trip_cache as check_cache, acheck_trip_cache as acheck_cache
+from database.store_results import store_results, astore_results
+from database.component_cache import (
+    get_component, put_component, component_cache_key, component_updates, COMPONENT_FIELDS,
+)
+from database.cache_keys import input_fingerprint
+from agents.tools.serp_tools import resolve_location_id, aresolve_location_id
+
+
+# Independent fetch nodes fanned out after a cache miss, with the state keys
+# each one owns. Branches only write their own keys so parallel updates never
+# collide on the same channel within a superstep.
+FETCH_BRANCHES = {
+    "weather": ["weather_summary", "weather_info"],
+    "live_search": ["accommodations"],
+    "flight_api": ["flights"],
+    "community_agent": ["top_sights", "local_places", "local_news", "discussions", "generated_ui", "node_timings"],
+}
 
 
 def route_cache(state):
     if state is None:
-        return "live_search"
+        return list(FETCH_BRANCHES)
 
     if isinstance(state, dict):
         accommodations = state.get("accommodations") or []
@@ -25,26 +46,35 @@ def route_cache(state):
 
     if accommodations and flights:
         return "recommend_hotels"
-    return "live_search"
+    return list(FETCH_BRANCHES)
 
 
-from agents.community_agent import fetch_community_data
+from agents.community_agent import fetch_community_data, afetch_community_data
 from agents.constraint_agent import check_constraints
 from agents.correction_agent import correction_node, should_correct
-from agents.reasoning_agent import reasoning_node
+from agents.reasoning_agent import reasoning_node, areasoning_node, _reasoning_inputs, REASONING_FALLBACK
 from utils.memory import MemoryManager
 from utils.logger import logger
+from utils.metrics import metrics
+from utils.singleflight import SingleFlight
 
-def load_memories(state: TravelState) -> dict:
-    mem_mgr = MemoryManager()
-    user_id = "default_user" 
-    
+# Concurrent plans (e.g. different users, same destination) missing the same
+# component share one fetch instead of each calling the external API
+_component_fetches = SingleFlight("component_fetch")
+
+def _memory_query(state: TravelState) -> str:
     # Semantic search: use last message or origin/destination as query
     query = ""
     if state.messages:
         query = str(state.messages[-1])
     elif state.origin and state.destination:
         query = f"trip from {state.origin} to {state.destination}"
+    return query
+
+def load_memories(state: TravelState) -> dict:
+    mem_mgr = MemoryManager()
+    user_id = state.user_id or DEFAULT_USER_ID
+    query = _memory_query(state)
     
     try:
         if query:
@@ -59,14 +89,52 @@ def load_memories(state: TravelState) -> dict:
         logger.error(f"Error loading memories: {e}")
         return {"user_preferences": []}
 
-def save_memory_node(state: TravelState):
-    """Summarizes and saves key trip preferences to semantic memory."""
+async def aload_memories(state: TravelState) -> dict:
     mem_mgr = MemoryManager()
-    user_id = "default_user"
-    
+    user_id = state.user_id or DEFAULT_USER_ID
+    query = _memory_query(state)
+
+    try:
+        prefs = await mem_mgr.aget_memories(user_id, query=query or None)
+        logger.info(f"Loaded {len(prefs)} memories for query: {query or '<all>'}")
+        return {"user_preferences": prefs}
+    except Exception as e:
+        logger.error(f"Error loading memories: {e}")
+        return {"user_preferences": []}
+
+def _ids_to_resolve(state: TravelState) -> dict:
+    return {
+        "origin_id": state.origin_id or state.origin,
+        "destination_id": state.destination_id or state.destination,
+    }
+
+def _resolved_ids(raw: dict, resolved: dict) -> dict:
+    # Only write IDs that actually resolved; unknown names stay as they were
+    return {k: v for k, v in resolved.items() if v and v != raw[k]}
+
+def resolve_ids(state: TravelState) -> dict:
+    """Resolves origin/destination names to flight IDs at intake (runs next to load_profile)."""
+    raw = _ids_to_resolve(state)
+    return _resolved_ids(raw, {k: resolve_location_id(v) for k, v in raw.items()})
+
+async def aresolve_ids(state: TravelState) -> dict:
+    """Async variant of resolve_ids."""
+    raw = _ids_to_resolve(state)
+    keys = list(raw)
+    values = await asyncio.gather(*(aresolve_location_id(raw[k]) for k in keys))
+    return _resolved_ids(raw, dict(zip(keys, values)))
+
+def _memory_text(state: TravelState) -> str:
     memory_text = f"User planned a trip from {state.origin} to {state.destination}."
     if state.trip_analysis:
         memory_text += f" Analysis: {state.trip_analysis}"
+    return memory_text
+
+def save_memory_node(state: TravelState):
+    """Summarizes and saves key trip preferences to semantic memory."""
+    mem_mgr = MemoryManager()
+    user_id = state.user_id or DEFAULT_USER_ID
+    memory_text = _memory_text(state)
     
     try:
         mem_mgr.add_memory(user_id, memory_text)
@@ -76,57 +144,182 @@ def save_memory_node(state: TravelState):
     
     return state
 
+async def asave_memory_node(state: TravelState):
+    """Async variant of save_memory_node."""
+    memory_text = _memory_text(state)
+
+    try:
+        await MemoryManager().aadd_memory(state.user_id or DEFAULT_USER_ID, memory_text)
+        logger.info(f"🧠 Saved trip memory: {memory_text}")
+    except Exception as e:
+        logger.error(f"Failed to save trip memory: {e}")
+
+    return state
+
+def node(func, afunc=None):
+    """
+    Registers a node with both a sync and an async implementation so
+    graph.invoke (main.py) and graph.astream/ainvoke (API server) each run
+    natively. Pure in-memory nodes without I/O run inline on the event loop.
+    """
+    if afunc is None:
+        async def afunc(state):
+            return func(state)
+    return RunnableLambda(func, afunc=afunc, name=func.__name__)
+
+def branch_node(name, func, afunc):
+    """
+    Wraps a fetch agent as a fan-out branch: returns only the keys the branch
+    owns (see FETCH_BRANCHES) plus its wall-clock time in `node_timings`.
+    Results are served from / stored in the component cache, so only the
+    components missing for this trip are actually fetched.
+    """
+    keys = FETCH_BRANCHES[name]
+
+    def updates_from(result, started):
+        if isinstance(result, dict):
+            updates = {k: result[k] for k in keys if k in result}
+        else:
+            updates = {k: getattr(result, k) for k in keys}
+        # Keep any finer-grained timings the agent reported (merged by the reducer)
+        updates["node_timings"] = {**(updates.get("node_timings") or {}), name: round(time.perf_counter() - started, 3)}
+        return updates
+
+    def cached_updates(state, started):
+        if name in state.cached_components:
+            return updates_from(state, started)   # reused from the trip cache
+        cached = get_component(name, state)
+        return updates_from(cached, started) if cached is not None else None
+
+    def sync_branch(state: TravelState) -> dict:
+        started = time.perf_counter()
+        updates = cached_updates(state, started)
+        if updates is None:
+            updates = updates_from(func(state), started)
+            put_component(name, state, updates)
+        return updates
+
+    async def async_branch(state: TravelState) -> dict:
+        started = time.perf_counter()
+        updates = cached_updates(state, started)
+        if updates is not None:
+            return updates
+
+        own = {}
+
+        async def fetch():
+            own.update(updates_from(await afunc(state), started))
+            put_component(name, state, own)
+            # Only the component payload is shared; summaries and timings are per plan
+            return {k: own.get(k) for k in COMPONENT_FIELDS[name]}
+
+        key = component_cache_key(name, state)
+        if key is None:
+            await fetch()
+            return own
+        payload = await _component_fetches.run(key, fetch)
+        if own:     # this plan ran the fetch
+            return own
+        return updates_from(component_updates(name, copy.deepcopy(payload), state), started)
+
+    return RunnableLambda(sync_branch, afunc=async_branch, name=f"{name}_branch")
+
+def fingerprinted_node(name, field, inputs, fallback, func, afunc):
+    """
+    Wraps an LLM node whose output (`field`) depends only on `inputs(state)`.
+    If the state already holds output generated from identical inputs (e.g. a
+    trip cache hit, or a re-run where only unrelated fields changed) the LLM
+    call is skipped; otherwise the node runs and records the new fingerprint.
+    """
+    def reusable(state, fingerprint):
+        if getattr(state, field) and state.node_fingerprints.get(name) == fingerprint:
+            metrics.incr(f"node_skip.{name}")
+            logger.info(f"⏭️ Skipping {name}: inputs unchanged since it was generated")
+            return True
+        return False
+
+    def updates_from(result, fingerprint):
+        value = result.get(field) if isinstance(result, dict) else getattr(result, field)
+        # Fallback text (LLM failure) is never reused
+        return {field: value, "node_fingerprints": {name: fingerprint if value and value != fallback else ""}}
+
+    def sync_node(state: TravelState) -> dict:
+        fingerprint = input_fingerprint(inputs(state))
+        if reusable(state, fingerprint):
+            return {}
+        return updates_from(func(state), fingerprint)
+
+    async def async_node(state: TravelState) -> dict:
+        fingerprint = input_fingerprint(inputs(state))
+        if reusable(state, fingerprint):
+            return {}
+        return updates_from(await afunc(state), fingerprint)
+
+    return RunnableLambda(sync_node, afunc=async_node, name=func.__name__)
+
+def join_node(state: TravelState) -> dict:
+    """Synchronization point for parallel branches (no state changes)."""
+    return {}
+
+def graph_nodes() -> dict:
+    """Node name -> runnable, shared by build_graph and replan."""
+    return {
+        "load_profile": node(load_memories, aload_memories),
+        "resolve_ids": node(resolve_ids, aresolve_ids),
+        "cache": node(check_cache, acheck_cache),
+        "weather": branch_node("weather", fetch_weather, afetch_weather),
+        "live_search": branch_node("live_search", live_search, alive_search),
+        "flight_api": branch_node("flight_api", fetch_flights_from_api, afetch_flights_from_api),
+        "community_agent": branch_node("community_agent", fetch_community_data, afetch_community_data),
+        "search_join": node(join_node),
+        "fetch_join": node(join_node),
+        "store": node(store_results, astore_results),
+        "recommend_hotels": node(recommend_hotels),
+        "recommend_flights": node(recommend_flights),
+        "check_constraints": node(check_constraints),
+        "itinerary": fingerprinted_node(
+            "itinerary", "itinerary", _itinerary_inputs, ITINERARY_FALLBACK, generate_itinerary, agenerate_itinerary),
+        "correction": node(correction_node),
+        "reasoning": fingerprinted_node(
+            "reasoning", "trip_analysis", _reasoning_inputs, REASONING_FALLBACK, reasoning_node, areasoning_node),
+        "save_memory": node(save_memory_node, asave_memory_node),
+    }
+
 def build_graph():
     graph = StateGraph(TravelState)
 
-    graph.add_node("load_profile", load_memories) 
-    graph.add_node("weather", fetch_weather)
-    graph.add_node("cache", check_cache)
-    graph.add_node("live_search", live_search)
-    graph.add_node("flight_api", fetch_flights_from_api)
-    graph.add_node("store", store_results)
-    graph.add_node("recommend_hotels", recommend_hotels)
-    graph.add_node("recommend_flights", recommend_flights)
-    graph.add_node("check_constraints", check_constraints)
-    graph.add_node("itinerary", generate_itinerary)
-    graph.add_node("community_agent", fetch_community_data)
-    
-    
-    graph.add_node("correction", correction_node)
-    graph.add_node("reasoning", reasoning_node)
-    graph.add_node("save_memory", save_memory_node)
+    for name, runnable in graph_nodes().items():
+        graph.add_node(name, runnable)
 
-    graph.set_entry_point("load_profile") 
-
-    graph.add_edge("load_profile", "weather")
-    graph.add_edge("weather", "cache")
+    # Memories and flight IDs are independent; both are ready before the cache check
+    graph.add_edge(START, "load_profile")
+    graph.add_edge(START, "resolve_ids")
+    graph.add_edge(["load_profile", "resolve_ids"], "cache")
 
+    # Cache hit goes straight to ranking; a miss fans out all fetch branches
     graph.add_conditional_edges(
         "cache",
         route_cache,
-        {
-            "live_search": "live_search",
-            "recommend_hotels": "recommend_hotels",
-        },
+        ["recommend_hotels", *FETCH_BRANCHES],
     )
 
-    # Cache miss path
-    graph.add_edge("live_search", "flight_api")
-    
-    # Conditional Edge for Correction (After Flights)
+    # Hotels + flights join first so the correction check sees both results
+    graph.add_edge(["live_search", "flight_api"], "search_join")
     graph.add_conditional_edges(
-        "flight_api",
+        "search_join",
         should_correct,
         {
             "correction": "correction",
-            "continue": "community_agent"
+            "continue": "fetch_join"
         }
     )
-    
-    # Correction Loop
-    graph.add_edge("correction", "live_search") # Restart search with new params
 
-    graph.add_edge("community_agent", "store")
+    # Correction Loop: retry only the searches, weather/community are kept
+    graph.add_edge("correction", "live_search")
+    graph.add_edge("correction", "flight_api")
+
+    # Wait for every branch before persisting
+    graph.add_edge(["weather", "community_agent", "fetch_join"], "store")
     graph.add_edge("store", "recommend_hotels")
 
     # Common path
@@ -87,6 +87,7 @@ def main():
         input_data["max_price_per_night"] = max_price
         input_data["min_rating"] = min_rating
         input_data["temp_unit"] = temp_unit # Pass user preference
+        input_data["user_id"] = user_id     # Memories are per user
 
         final_state = graph.invoke(input_data, config=config)
 
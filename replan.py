@@ -0,0 +1,137 @@
+import asyncio
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from state import TravelState, MERGED_FIELDS
+from graph import graph_nodes, FETCH_BRANCHES
+from utils.logger import logger
+from utils.metrics import metrics
+
+# Incremental re-planning after a refinement: only the nodes whose inputs
+# changed re-run, then whichever later nodes read an output that actually
+# changed. Fetch branches still go through the component cache and the LLM
+# nodes still skip on unchanged fingerprints, so re-runs reuse what they can.
+
+# State fields each re-plannable node reads. Hotel price / rating limits are
+# applied when ranking (recommend_hotels), not by the hotel search.
+NODE_INPUTS = {
+    "resolve_ids": ["origin", "destination"],
+    "weather": ["destination", "destination_id", "destination_city", "start_date", "end_date", "temp_unit"],
+    "community_agent": ["destination", "destination_id", "destination_city"],
+    "live_search": ["destination", "destination_id", "destination_city", "start_date", "end_date",
+                    "bedrooms", "user_preferences"],
+    "flight_api": ["origin_id", "destination_id", "start_date", "end_date", "user_preferences"],
+    "recommend_hotels": ["accommodations", "max_price_per_night", "min_rating"],
+    "recommend_flights": ["flights"],
+    "check_constraints": ["budget", "flights", "accommodations"],
+    "itinerary": ["origin", "destination", "start_date", "end_date", "trip_purpose", "travel_party", "traveler_age",
+                  "group_age_min", "group_age_max", "transportation_mode", "budget", "accessibility_needs",
+                  "location_scope", "travel_pace", "interests", "accommodations", "flights"],
+    "reasoning": ["destination", "flights", "accommodations", "constraint_violations", "weather_summary"],
+}
+
+NODE_OUTPUTS = {
+    "resolve_ids": ["origin_id", "destination_id"],
+    **FETCH_BRANCHES,
+    "recommend_hotels": ["recommended_hotels"],
+    "recommend_flights": ["flights"],
+    "check_constraints": ["constraint_violations"],
+    "itinerary": ["itinerary", "node_fingerprints"],
+    "reasoning": ["trip_analysis", "node_fingerprints"],
+}
+
+# Execution order; nodes within a stage are independent and run concurrently
+REPLAN_STAGES = [
+    ["resolve_ids"],
+    ["weather", "community_agent", "live_search", "flight_api"],
+    ["recommend_hotels", "recommend_flights"],
+    ["check_constraints"],
+    ["itinerary"],
+    ["reasoning"],
+]
+
+OnUpdate = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+@lru_cache(maxsize=None)
+def _nodes() -> dict:
+    return graph_nodes()
+
+def changed_fields(old: TravelState, new: TravelState) -> List[str]:
+    """Re-plan inputs whose value differs between two states."""
+    fields = {f for reads in NODE_INPUTS.values() for f in reads}
+    return sorted(f for f in fields if getattr(old, f) != getattr(new, f))
+
+def affected_nodes(fields: Iterable[str]) -> List[str]:
+    """Every node a change to `fields` may re-run (upper bound; replan skips nodes whose inputs end up equal)."""
+    changed, nodes = set(fields), []
+    for stage in REPLAN_STAGES:
+        hit = [name for name in stage if changed & set(NODE_INPUTS[name])]
+        for name in hit:
+            changed |= set(NODE_OUTPUTS[name])
+        nodes += hit
+    return nodes
+
+def _prepare(state: TravelState, fields: Iterable[str]) -> TravelState:
+    state = state.model_copy(deep=True)
+    fields = set(fields)
+    # A renamed place must be resolved again, not kept from the old ID
+    for name in ("origin", "destination"):
+        if name in fields and f"{name}_id" not in fields:
+            setattr(state, f"{name}_id", None)
+    # Trip-cache results only stand for the inputs they were cached with
+    rerun = set(affected_nodes(fields))
+    state.cached_components = [c for c in state.cached_components if c not in rerun]
+    return state
+
+def _changes(state: TravelState, name: str, result) -> Dict[str, Any]:
+    if isinstance(result, dict):
+        updates = {k: v for k, v in result.items() if k in NODE_OUTPUTS[name]}
+    else:
+        updates = {k: getattr(result, k) for k in NODE_OUTPUTS[name]}
+    changes = {}
+    for key, value in updates.items():
+        if key in MERGED_FIELDS:
+            value = {**getattr(state, key), **value}
+        if getattr(state, key) != value:
+            changes[key] = value
+    return changes
+
+def _to_run(stage: List[str], changed: set) -> List[str]:
+    return [name for name in stage if changed & set(NODE_INPUTS[name])]
+
+def _record(state: TravelState, changed: set, name: str, changes: Dict[str, Any]) -> None:
+    metrics.incr(f"replan.ran.{name}")
+    for key, value in changes.items():
+        setattr(state, key, value)
+    # Fingerprints are bookkeeping; they never trigger another node
+    changed.update(k for k in changes if k not in MERGED_FIELDS)
+
+def replan(state: TravelState, fields: Iterable[str]) -> TravelState:
+    """
+    Re-executes the part of the plan affected by `fields` (the state already
+    holds their new values) and returns the updated state.
+    """
+    state, changed = _prepare(state, fields), set(fields)
+    for stage in REPLAN_STAGES:
+        for name in _to_run(stage, changed):
+            # Nodes may mutate their input (e.g. recommend_flights); give them a copy
+            result = _nodes()[name].invoke(state.model_copy(deep=True))
+            _record(state, changed, name, _changes(state, name, result))
+    return state
+
+async def areplan(state: TravelState, fields: Iterable[str], on_update: Optional[OnUpdate] = None) -> TravelState:
+    """
+    Async variant of replan. Independent nodes run concurrently and
+    `on_update(step, changes)` is awaited for every node whose output changed.
+    """
+    state, changed = _prepare(state, fields), set(fields)
+    logger.info(f"🔁 Re-planning {affected_nodes(changed) or 'nothing'} for changed {sorted(changed)}")
+    for stage in REPLAN_STAGES:
+        names = _to_run(stage, changed)
+        results = await asyncio.gather(*(_nodes()[name].ainvoke(state.model_copy(deep=True)) for name in names))
+        for name, result in zip(names, results):
+            changes = _changes(state, name, result)
+            _record(state, changed, name, changes)
+            if on_update and changes:
+                await on_update(name, changes)
+    return state
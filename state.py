@@ -1,7 +1,22 @@
-from typing import List, Optional, Dict, Any
+from typing import Annotated, List, Optional, Dict, Any
 from pydantic import BaseModel
 
+
+def merge_dicts(left: Dict[str, Any], right: Dict[str, Any]) -> Dict[str, Any]:
+    """Reducer for dict channels written by parallel branches in the same step."""
+    merged = dict(left or {})
+    merged.update(right or {})
+    return merged
+
+# Dict fields reduced with merge_dicts: updates add keys rather than replace the dict
+MERGED_FIELDS = ("node_fingerprints", "node_timings")
+
+
+DEFAULT_USER_ID = "default_user"
+
+
 class TravelState(BaseModel):
+    user_id: Optional[str] = DEFAULT_USER_ID # Memory namespace (Mem0)
     origin: Optional[str] = None
     destination: Optional[str] = None
     origin_id: Optional[str] = None # For Flight API (IATA or KG ID)
@@ -62,4 +77,13 @@ class TravelState(BaseModel):
     last_error: Optional[str] = None
 
     # Generative UI
-    generated_ui: List[Dict[str, Any]] = [] # List of widget objects
\ No newline at end of file
+    generated_ui: List[Dict[str, Any]] = [] # List of widget objects
+
+    # Fetch branches whose results were reused from the trip cache (skipped)
+    cached_components: List[str] = []
+
+    # LLM node name -> fingerprint of the inputs its stored output was generated from
+    node_fingerprints: Annotated[Dict[str, str], merge_dicts] = {}
+
+    # Observability (merged across parallel branches)
+    node_timings: Annotated[Dict[str, float], merge_dicts] = {} # Node name -> seconds
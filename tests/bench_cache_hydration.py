@@ -0,0 +1,98 @@
+"""
+Benchmark: cache-hit latency of find_cached_trip on the websocket fast path.
+
+Legacy rows (no snapshot) are hydrated with nine sequential queries; rows
+saved with a snapshot are served by the lookup query alone. The driver is a
+fake that charges one recorded network RTT per statement.
+
+Usage: PYTHONPATH=. python tests/bench_cache_hydration.py [--hits 50] [--rtt-ms 8]
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test-mock-key")
+
+from database import ops
+from state import TravelState
+
+
+def _trip():
+    return TravelState(
+        origin="SFO", destination="Paris", origin_city="San Francisco", destination_city="Paris",
+        start_date="2025-06-01", end_date="2025-06-05", trip_purpose="vacation",
+        itinerary="Day 1: Louvre", weather_summary="Sunny", weather_info={"daily": []},
+        flights=[{"airline": "Delta", "price": 320}] * 10,
+        accommodations=[{"name": "Hotel", "price": 120, "rating": 4.5}] * 20,
+        top_sights=[{"title": "Louvre"}] * 8,
+        local_places=[{"title": "Bistro"}] * 8,
+        local_news=[{"title": "News"}] * 5,
+        discussions=[{"title": "Tips"}] * 5,
+    )
+
+
+def fake_conn(rtt, snapshot, counters):
+    class Cursor:
+        description = [("title",)]
+
+        def execute(self, sql, params=None):
+            counters["statements"] += 1
+            self._sql = sql
+            time.sleep(rtt)
+
+        def fetchone(self):
+            if "FROM trip_plans" in self._sql:
+                return (1, None, "San Francisco", "Paris", snapshot)
+            return ("text", "{}")
+
+        def fetchall(self):
+            # Only flights are decoded row by row; other tables return no rows
+            return [("{}",)] * 10 if "FROM flights" in self._sql else []
+
+    class Connection:
+        def cursor(self):
+            return Cursor()
+
+        def close(self):
+            pass
+
+    return Connection
+
+
+def run(hits, rtt, snapshot):
+    counters = {"statements": 0}
+    ops.get_conn = fake_conn(rtt, snapshot, counters)
+    params = {"origin": "SFO", "destination": "Paris", "start_date": "2025-06-01",
+              "end_date": "2025-06-05", "trip_purpose": "vacation"}
+
+    async def hit_path():
+        # Same call the websocket handler awaits before sending "complete"
+        latencies = []
+        for _ in range(hits):
+            started = time.perf_counter()
+            assert await ops.afind_cached_trip(params)
+            latencies.append(time.perf_counter() - started)
+        return sorted(latencies)
+
+    latencies = asyncio.run(hit_path())
+    return {
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "queries": counters["statements"] / hits,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hits", type=int, default=50)
+    parser.add_argument("--rtt-ms", type=float, default=8.0, help="Recorded DB round-trip time")
+    args = parser.parse_args()
+
+    legacy = run(args.hits, args.rtt_ms / 1000, snapshot=None)
+    snap = run(args.hits, args.rtt_ms / 1000, snapshot=ops._trip_snapshot(_trip()))
+
+    print(f"{args.hits} cache hits, {args.rtt_ms:.0f} ms RTT")
+    for label, r in (("Legacy (9 queries)", legacy), ("Snapshot          ", snap)):
+        print(f"{label}: p50 {r['p50_ms']:.1f} ms, p95 {r['p95_ms']:.1f} ms, {r['queries']:.0f} queries/hit")
+    print(f"Speedup (p50): {legacy['p50_ms'] / snap['p50_ms']:.2f}x")
@@ -0,0 +1,110 @@
+"""
+Load test: concurrent plans per worker, thread-offloaded vs. async-native graph.
+
+Old path: every request does `asyncio.to_thread(graph.invoke, ...)`, so the
+number of plans in flight is capped by the default executor size.
+New path: `graph.ainvoke` with async nodes; waiting on I/O does not hold a thread.
+
+External I/O is simulated with recorded latencies (time.sleep for the sync
+nodes, asyncio.sleep for the async ones), so no API keys are needed.
+
+Usage: PYTHONPATH=. python tests/bench_concurrent_plans.py [--plans 64] [--scale 0.05]
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test-mock-key")
+os.environ["COMPONENT_CACHE_ENABLED"] = "false"   # measure fetches, not cache hits
+
+import graph as graph_module
+from state import TravelState
+
+# Median latencies (seconds) of the I/O-bound nodes, taken from app.log
+RECORDED_LATENCIES = {
+    "load_profile": 0.35,
+    "cache": 0.25,
+    "weather": 0.65,
+    "live_search": 2.9,
+    "flight_api": 3.4,
+    "community_agent": 4.1,
+    "store": 0.3,
+    "itinerary": 9.5,
+    "reasoning": 1.6,
+    "save_memory": 0.4,
+}
+
+
+def _stubs(name, scale, updates):
+    delay = RECORDED_LATENCIES[name] * scale
+
+    def sync_node(state):
+        time.sleep(delay)
+        return updates
+
+    async def async_node(state):
+        await asyncio.sleep(delay)
+        return updates
+
+    return sync_node, async_node
+
+
+def _patch_graph(scale):
+    patches = {
+        "load_memories": ("load_profile", {"user_preferences": []}),
+        "check_cache": ("cache", {}),
+        "fetch_weather": ("weather", {"weather_summary": "Sunny"}),
+        "live_search": ("live_search", {"accommodations": [{"name": "Hotel", "price": 120, "rating": 4.5}]}),
+        "fetch_flights_from_api": ("flight_api", {"flights": [{"airline": "Delta", "price": 320}]}),
+        "fetch_community_data": ("community_agent", {"top_sights": []}),
+        "store_results": ("store", {}),
+        "generate_itinerary": ("itinerary", {"itinerary": "stub"}),
+        "reasoning_node": ("reasoning", {"trip_analysis": "stub"}),
+        "save_memory_node": ("save_memory", {}),
+    }
+    for attr, (name, updates) in patches.items():
+        sync_node, async_node = _stubs(name, scale, updates)
+        setattr(graph_module, attr, sync_node)
+        # Async variants follow the a<name> convention (afetch_weather, ...)
+        setattr(graph_module, f"a{attr}", async_node)
+
+
+def _inputs(i):
+    return TravelState(origin="SFO", destination=f"City {i}", start_date="2025-06-01", end_date="2025-06-05")
+
+
+async def run_threaded(app, plans):
+    async def one(i):
+        config = {"configurable": {"thread_id": f"threaded-{i}"}}
+        return await asyncio.to_thread(app.invoke, _inputs(i), config)
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(plans)))
+    return time.perf_counter() - started
+
+
+async def run_native(app, plans):
+    async def one(i):
+        config = {"configurable": {"thread_id": f"native-{i}"}}
+        return await app.ainvoke(_inputs(i), config=config)
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(plans)))
+    return time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--plans", type=int, default=64, help="Concurrent plan requests")
+    parser.add_argument("--scale", type=float, default=0.05, help="Multiply recorded latencies")
+    args = parser.parse_args()
+
+    _patch_graph(args.scale)
+    app = graph_module.build_graph()
+
+    threaded = asyncio.run(run_threaded(app, args.plans))
+    native = asyncio.run(run_native(app, args.plans))
+
+    print(f"{args.plans} concurrent plans (latencies x{args.scale}), executor workers: {min(32, (os.cpu_count() or 1) + 4)}")
+    print(f"to_thread(graph.invoke): {threaded:.2f}s -> {args.plans / threaded:.1f} plans/s")
+    print(f"graph.ainvoke (async):   {native:.2f}s -> {args.plans / native:.1f} plans/s")
+    print(f"Speedup:                 {threaded / native:.2f}x")
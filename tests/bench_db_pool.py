@@ -0,0 +1,105 @@
+"""
+Benchmark: pooled vs. per-call SingleStore connections under concurrent /plan traffic.
+
+Each simulated plan runs the real database code paths of a cache miss:
+afind_cached_trip -> astore_results -> asave_trip_plan (asyncio.to_thread,
+as in the API server). The driver is replaced by a fake whose connect and
+query latencies come from recorded values, so no database is needed.
+
+Usage: PYTHONPATH=. python tests/bench_db_pool.py [--plans 50] [--scale 1.0]
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test-mock-key")
+
+from database import ops, store_results as store_module
+from database.singlestore_client import ConnectionPool
+from state import TravelState
+from utils.metrics import metrics
+
+# Recorded latencies (seconds): TCP + TLS + auth handshake, and one query RTT
+CONNECT_LATENCY = 0.12
+QUERY_LATENCY = 0.008
+
+
+def fake_driver(scale):
+    class Cursor:
+        lastrowid = 1
+        description = []
+
+        def execute(self, sql, params=None):
+            time.sleep(QUERY_LATENCY * scale)
+
+        def fetchone(self):
+            return None          # cache miss
+
+        def fetchall(self):
+            return []
+
+    class Connection:
+        def __init__(self):
+            time.sleep(CONNECT_LATENCY * scale)
+
+        def cursor(self):
+            return Cursor()
+
+        def commit(self):
+            time.sleep(QUERY_LATENCY * scale)
+
+        def rollback(self):
+            pass
+
+        def close(self):
+            pass
+
+    return Connection
+
+
+def _state(i):
+    return TravelState(
+        origin="SFO", destination=f"City {i}", start_date="2025-06-01", end_date="2025-06-05",
+        flights=[{"airline": "Delta", "price": 320}] * 5,
+        accommodations=[{"name": "Hotel", "price": 120, "rating": 4.5}] * 5,
+        itinerary="stub",
+    )
+
+
+async def run(get_conn, plans):
+    ops.get_conn = get_conn
+    store_module.get_conn = get_conn
+
+    async def one(i):
+        state = _state(i)
+        await ops.afind_cached_trip(state)
+        await store_module.astore_results(state)
+        await ops.asave_trip_plan(state)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(plans)))
+    return time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--plans", type=int, default=50, help="Concurrent plan requests")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply recorded latencies")
+    parser.add_argument("--pool-size", type=int, default=5)
+    parser.add_argument("--max-overflow", type=int, default=10)
+    args = parser.parse_args()
+
+    driver = fake_driver(args.scale)
+    per_call = asyncio.run(run(driver, args.plans))
+
+    pool = ConnectionPool(driver, size=args.pool_size, max_overflow=args.max_overflow, name="bench_pool")
+    pooled = asyncio.run(run(pool.get_conn, args.plans))
+    stats = pool.stats()
+
+    print(f"{args.plans} concurrent plans, 3 DB sessions each (latencies x{args.scale})")
+    print(f"Per-call connections: {per_call:.2f}s -> {args.plans / per_call:.1f} plans/s, {args.plans * 3} handshakes")
+    print(f"Pooled connections:   {pooled:.2f}s -> {args.plans / pooled:.1f} plans/s, {stats['connects']} handshakes")
+    print(f"Speedup:              {per_call / pooled:.2f}x")
+    print(f"Pool: waits={stats['waits']} timeouts={stats['timeouts']} "
+          f"checkout p95={metrics.percentile('db_pool.checkout_seconds', 95) * 1000:.1f}ms")
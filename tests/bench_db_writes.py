@@ -0,0 +1,97 @@
+"""
+Benchmark: per-row vs. batched multi-row inserts in save_trip_plan / store_results.
+
+batch_size=1 reproduces the old behaviour (one round-trip per child row).
+The driver is replaced by a fake that charges one recorded network RTT per
+statement plus a small per-row server cost, so no database is needed.
+
+Usage: PYTHONPATH=. python tests/bench_db_writes.py [--trips 20] [--scale 1.0]
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test-mock-key")
+
+from database import bulk, ops, store_results as store_module
+from state import TravelState
+
+# Recorded latencies (seconds): one statement round-trip, and server time per row
+STATEMENT_RTT = 0.008
+ROW_COST = 0.00005
+
+
+def fake_conn(scale, counters):
+    class Cursor:
+        lastrowid = 1
+
+        def execute(self, sql, params=None):
+            rows = max(1, sql.count("), (") + 1)
+            counters["statements"] += 1
+            time.sleep((STATEMENT_RTT + ROW_COST * rows) * scale)
+
+    class Connection:
+        def cursor(self):
+            return Cursor()
+
+        def commit(self):
+            time.sleep(STATEMENT_RTT * scale)
+
+        def close(self):
+            pass
+
+    return Connection
+
+
+def _state():
+    # Typical trip: 10 flights, 20 hotels, 8 sights, 8 places, 5 news, 5 discussions
+    return TravelState(
+        origin="SFO", destination="Paris", start_date="2025-06-01", end_date="2025-06-05",
+        itinerary="stub", weather_info={"daily": []}, weather_summary="Sunny",
+        flights=[{"airline": "Delta", "price": 320, "details": {"n": 1}}] * 10,
+        accommodations=[{"name": "Hotel", "price": 120, "rating": 4.5}] * 20,
+        top_sights=[{"title": "Louvre"}] * 8,
+        local_places=[{"title": "Bistro"}] * 8,
+        local_news=[{"title": "News"}] * 5,
+        discussions=[{"title": "Tips"}] * 5,
+    )
+
+
+def run(trips, scale, batch_size):
+    counters = {"statements": 0}
+    connection = fake_conn(scale, counters)
+    ops.get_conn = connection
+    store_module.get_conn = connection
+    bulk.DEFAULT_BATCH_SIZE = batch_size
+
+    state = _state()
+    rows = len(state.flights) * 2 + len(state.accommodations) * 2 + len(state.top_sights) \
+        + len(state.local_places) + len(state.local_news) + len(state.discussions) + 3
+    latencies = []
+    for _ in range(trips):
+        started = time.perf_counter()
+        store_module.store_results(state)
+        ops.save_trip_plan(state)
+        latencies.append(time.perf_counter() - started)
+    total = sum(latencies)
+    return {
+        "per_trip_ms": total / trips * 1000,
+        "rows_per_sec": rows * trips / total,
+        "statements_per_trip": counters["statements"] / trips,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trips", type=int, default=20)
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply recorded latencies")
+    args = parser.parse_args()
+
+    before = run(args.trips, args.scale, batch_size=1)
+    after = run(args.trips, args.scale, batch_size=500)
+
+    print(f"{args.trips} trips saved (store_results + save_trip_plan), latencies x{args.scale}")
+    for label, r in (("Per-row inserts", before), ("Batched inserts", after)):
+        print(f"{label}: {r['per_trip_ms']:.1f} ms/trip, {r['rows_per_sec']:.0f} rows/s, "
+              f"{r['statements_per_trip']:.0f} statements/trip")
+    print(f"Speedup: {before['per_trip_ms'] / after['per_trip_ms']:.2f}x")
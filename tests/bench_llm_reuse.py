@@ -0,0 +1,65 @@
+"""
+Per-request LLM setup cost: building clients and chains on every call (the
+old itinerary path) vs the shared client registry and precompiled chains.
+
+No requests are sent; this measures only construction overhead and how many
+client objects a burst of concurrent plans leaves behind.
+
+Usage: PYTHONPATH=. python tests/bench_llm_reuse.py [--requests 200]
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test-mock-key")
+for key in ("ANTHROPIC_API_KEY", "GROQ_API_KEY"):
+    os.environ.pop(key, None)         # fallback SDKs may not be installed here
+
+from langchain_openai import ChatOpenAI
+from agents import itinerary_agent
+from utils import llm_factory
+
+CHAINS = ("_itinerary_chain", "_skeleton_chain", "_day_chain", "_closing_chain")
+
+def _fresh_chains():
+    """Old behavior: new clients and chains for every itinerary request."""
+    llm_factory.clear_llm_clients()
+    for name in CHAINS:
+        getattr(itinerary_agent, name).cache_clear()
+    return [getattr(itinerary_agent, name)() for name in CHAINS]
+
+def _shared_chains():
+    return [getattr(itinerary_agent, name)() for name in CHAINS]
+
+def _run(label, build, requests):
+    created = []
+    original_init = ChatOpenAI.__init__
+
+    def counting_init(self, *args, **kwargs):
+        created.append(1)
+        original_init(self, *args, **kwargs)
+
+    ChatOpenAI.__init__ = counting_init
+    try:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            list(pool.map(lambda _: build(), range(requests)))
+        elapsed = time.perf_counter() - started
+    finally:
+        ChatOpenAI.__init__ = original_init
+    print(f"{label:<10}{elapsed * 1000 / requests:>12.2f} ms/request{len(created):>10} clients built")
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    fresh = _run("fresh", _fresh_chains, args.requests)
+    _fresh_chains()           # leave one set cached, as after the first request
+    shared = _run("shared", _shared_chains, args.requests)
+    print(f"Speedup: {fresh / shared:.0f}x less setup time per request")
+
+if __name__ == "__main__":
+    main()
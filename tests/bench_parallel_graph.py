@@ -0,0 +1,83 @@
+"""
+Benchmark: serial fetch chain vs. parallel fan-out in build_graph.
+
+External calls are replaced by stubs that sleep for latencies recorded from
+production logs, so the run is deterministic and needs no API keys.
+
+Usage: PYTHONPATH=. python tests/bench_parallel_graph.py [--scale 0.1]
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test-mock-key")
+os.environ["COMPONENT_CACHE_ENABLED"] = "false"   # measure fetches, not cache hits
+
+import graph as graph_module
+from state import TravelState
+
+# Median latencies (seconds) of the cache-miss fetch nodes, taken from app.log
+RECORDED_LATENCIES = {
+    "weather": 0.65,          # geocode + 5 day forecast
+    "live_search": 2.9,       # query LLM + google_hotels
+    "flight_api": 3.4,        # google_flights + airline preference LLM
+    "community_agent": 4.1,   # sights + local + news + discussions
+}
+
+
+def _stub(name, scale, updates):
+    def node(state):
+        time.sleep(RECORDED_LATENCIES[name] * scale)
+        for key, value in updates.items():
+            setattr(state, key, value)
+        return state
+    return node
+
+
+def _patch_graph(scale):
+    graph_module.load_memories = lambda state: {"user_preferences": []}
+    graph_module.check_cache = lambda state: None
+    graph_module.store_results = lambda state: state
+    graph_module.generate_itinerary = lambda state: {"itinerary": "stub"}
+    graph_module.reasoning_node = lambda state: {"trip_analysis": "stub"}
+    graph_module.save_memory_node = lambda state: state
+
+    graph_module.fetch_weather = _stub("weather", scale, {"weather_summary": "Sunny"})
+    graph_module.live_search = _stub("live_search", scale, {"accommodations": [{"name": "Hotel", "price": 120, "rating": 4.5}]})
+    graph_module.fetch_flights_from_api = _stub("flight_api", scale, {"flights": [{"airline": "Delta", "price": 320}]})
+    graph_module.fetch_community_data = _stub("community_agent", scale, {"top_sights": [{"title": "Museum"}]})
+
+
+def run_serial(scale):
+    state = TravelState(origin="SFO", destination="JFK")
+    started = time.perf_counter()
+    graph_module.fetch_weather(state)
+    graph_module.live_search(state)
+    graph_module.fetch_flights_from_api(state)
+    graph_module.fetch_community_data(state)
+    return time.perf_counter() - started
+
+
+def run_parallel():
+    app = graph_module.build_graph()
+    config = {"configurable": {"thread_id": "bench"}}
+    started = time.perf_counter()
+    final_state = app.invoke(TravelState(origin="SFO", destination="JFK"), config=config)
+    return time.perf_counter() - started, final_state
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply recorded latencies")
+    args = parser.parse_args()
+
+    _patch_graph(args.scale)
+
+    serial = run_serial(args.scale)
+    parallel, final_state = run_parallel()
+
+    print(f"Recorded latencies (x{args.scale}): {RECORDED_LATENCIES}")
+    print(f"Serial fetch chain:   {serial:.2f}s")
+    print(f"Parallel fan-out:     {parallel:.2f}s (full graph run)")
+    print(f"Speedup:              {serial / parallel:.2f}x")
+    print(f"Branch timings:       {final_state.get('node_timings')}")
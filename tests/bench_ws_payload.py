@@ -0,0 +1,53 @@
+"""
+Bytes sent over the websocket for one plan run: full-state updates vs deltas.
+
+Replays the graph's step order with payload sizes typical of a real run
+(raw flight `details`, hotel listings, community data) through PlanUpdate.
+
+Usage: PYTHONPATH=. python tests/bench_ws_payload.py
+"""
+from api.protocol import DELTA, FULL, PlanUpdate, changed_keys
+
+def _items(n, size):
+    return [{"name": f"item {i}", "details": "x" * size} for i in range(n)]
+
+STEPS = [
+    ("load_profile", {"user_preferences": ["Prefers aisle seats", "No red-eyes"]}),
+    ("resolve_ids", {"origin_id": "SFO", "destination_id": "CDG,ORY"}),
+    ("cache", {}),
+    ("weather", {"weather_summary": "Sunny " * 20, "weather_info": {"daily": _items(5, 100)}}),
+    ("community_agent", {"top_sights": _items(10, 400), "local_places": _items(10, 400),
+                         "local_news": _items(8, 300), "discussions": _items(8, 600),
+                         "generated_ui": _items(20, 300)}),
+    ("flight_api", {"flights": _items(40, 2500)}),
+    ("live_search", {"accommodations": _items(20, 1200)}),
+    ("search_join", {}),
+    ("fetch_join", {}),
+    ("store", {}),
+    ("recommend_hotels", {"recommended_hotels": _items(5, 1200)}),
+    ("recommend_flights", {}),
+    ("check_constraints", {"constraint_violations": []}),
+    ("itinerary", {"itinerary": "Day 1 ... " * 400}),
+    ("reasoning", {"trip_analysis": "Great value trip. " * 5}),
+    ("save_memory", {}),
+]
+
+def main():
+    state, updates = {}, []
+    for seq, (step, update) in enumerate(STEPS, 1):
+        changes = changed_keys(state, update)
+        state.update(update)
+        updates.append(PlanUpdate(seq, step, changes, dict(state)))
+
+    totals = {FULL: 0, DELTA: 0}
+    print(f"{'step':<20}{'full':>12}{'delta':>12}")
+    for u in updates:
+        full, delta = len(u.encode(FULL)), len(u.encode(DELTA))
+        totals[FULL] += full
+        totals[DELTA] += delta
+        print(f"{u.step:<20}{full:>12,}{delta:>12,}")
+    print(f"{'total':<20}{totals[FULL]:>12,}{totals[DELTA]:>12,}")
+    print(f"Reduction: {totals[FULL] / totals[DELTA]:.1f}x fewer bytes (plus one full snapshot at complete)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import os
+os.environ.setdefault("OPENAI_API_KEY", "sk-test-mock-key")
+
+import asyncio
+import pytest
+from agents import flight_api_agent
+from state import TravelState
+from utils.cache import TieredCache
+
+FLIGHTS = [{"airline": "Spirit Airlines", "price": 90}, {"airline": "United", "price": 300},
+           {"airline": "Delta Air Lines", "price": 350}]
+
+class FakeChain:
+    def __init__(self):
+        self.calls = []
+
+    def invoke(self, inputs):
+        self.calls.append(inputs["memories"])
+        return {"preferred_airlines": ["Delta"], "excluded_airlines": ["spirit"]}
+
+    async def ainvoke(self, inputs):
+        return self.invoke(inputs)
+
+@pytest.fixture(autouse=True)
+def shared_cache():
+    cache = TieredCache("test_airline_profiles")
+    flight_api_agent.set_profile_cache(cache)
+    flight_api_agent._profiles.clear()
+    yield cache
+    flight_api_agent.set_profile_cache(None)
+
+def test_profile_is_compiled_once_per_memory_set(monkeypatch):
+    fake = FakeChain()
+    monkeypatch.setattr(flight_api_agent, "chain", fake)
+    monkeypatch.setattr(flight_api_agent, "search_google_flights", lambda params: [dict(f) for f in FLIGHTS])
+
+    async def asearch(params):
+        return [dict(f) for f in FLIGHTS]
+    monkeypatch.setattr(flight_api_agent, "asearch_google_flights", asearch)
+
+    state = TravelState(user_id="profile-test", origin="SFO", destination="JFK",
+                        user_preferences=["I love Delta", "Never Spirit"])
+    flights = flight_api_agent.fetch_flights_from_api(state.model_copy()).flights
+    assert [f["airline"] for f in flights] == ["Delta Air Lines", "United"]
+
+    asyncio.run(flight_api_agent.afetch_flights_from_api(state.model_copy()))
+    assert len(fake.calls) == 1                      # correction retries reuse the profile
+
+    changed = state.model_copy(update={"user_preferences": state.user_preferences + ["Avoid Ryanair"]})
+    flight_api_agent.fetch_flights_from_api(changed)
+    assert len(fake.calls) == 2
+
+def test_other_routes_and_workers_reuse_the_profile(monkeypatch):
+    fake = FakeChain()
+    monkeypatch.setattr(flight_api_agent, "chain", fake)
+
+    # Contextual searches for two routes return different memories for the same user
+    first = TravelState(user_id="route-test", origin="SFO", destination="JFK",
+                        user_preferences=["I love Delta", "Never Spirit", "Likes museums"])
+    second = TravelState(user_id="route-test", origin="LAX", destination="CDG",
+                         user_preferences=["Never Spirit", "Enjoys hiking", "I love Delta",
+                                           "User planned a trip from SFO to JFK. Analysis: cheap flights."])
+    flight_api_agent.airline_profile(first)
+    profile = asyncio.run(flight_api_agent.aairline_profile(second))
+    assert fake.calls == ["I love Delta\nNever Spirit"]
+
+    flight_api_agent._profiles.clear()                # another worker: only the shared tier is warm
+    assert flight_api_agent.airline_profile(second).prefs == profile.prefs
+    assert len(fake.calls) == 1
+
+    flight_api_agent.airline_profile(TravelState(user_id="no-airlines", user_preferences=["Likes museums"]))
+    assert len(fake.calls) == 1                       # nothing airline-related: no extraction
@@ -0,0 +1,84 @@
+import os
+os.environ.setdefault("OPENAI_API_KEY", "sk-test-mock-key")
+
+from agents.tools import serp_tools
+from agents.tools.airport_index import AirportIndex, airport_index
+
+def test_prefix_search_groups_city_airports():
+    """
+    A city prefix returns the city (comma-joined ID) followed by its airports.
+    """
+    ids = [s["id"] for s in airport_index.search("lon")]
+    assert ids[0] == "LHR,LGW,STN,LTN,LCY"
+    assert {"LHR", "LGW"} <= set(ids)
+    assert airport_index.search("Lon")[0]["type"] == "City"
+
+def test_exact_code_and_aliases():
+    """
+    IATA codes rank first; aliases, accents and airport-name words match.
+    """
+    assert airport_index.search("lhr")[0]["id"] == "LHR"
+    assert airport_index.search("bombay")[0]["id"] == "BOM"
+    assert airport_index.search("Sao Paulo")[0]["id"] == "GRU,CGH"
+    assert airport_index.search("gaulle")[0]["id"] == "CDG"
+    assert airport_index.search("zzzz") == []
+
+def test_resolve_names_to_flight_ids():
+    assert airport_index.resolve("Paris, France") == "CDG,ORY"
+    assert airport_index.resolve("new york city") == "JFK,LGA,EWR"
+    assert airport_index.resolve("Atlantis") is None
+    assert serp_tools._is_valid_id("CDG,ORY")
+    assert not serp_tools._is_valid_id("Paris")
+
+def test_learns_serpapi_suggestions():
+    """
+    Suggestions seen from SerpAPI are indexed, so the next lookup stays local.
+    """
+    index = AirportIndex()
+    suggestions = [
+        {"id": "/m/0f04v", "name": "Reno", "city_name": "Reno", "code": None, "type": "City"},
+        {"id": "RNO", "name": "Reno-Tahoe International Airport (RNO)", "city_name": "Reno", "code": "RNO", "type": "Airport"},
+    ]
+    assert index.learn(suggestions) == 2
+    assert index.learn(suggestions) == 0
+    assert [s["id"] for s in index.search("ren")] == ["/m/0f04v", "RNO"]
+    assert index.resolve("Reno") == "/m/0f04v"
+
+def test_flight_search_resolves_without_autocomplete(monkeypatch):
+    """
+    Known cities are resolved offline; SerpAPI autocomplete is not called.
+    """
+    captured = {}
+    monkeypatch.setenv("SERPAPI_KEY", "k")
+    monkeypatch.setattr(serp_tools, "search_google_flights_autocomplete",
+                        lambda q: (_ for _ in ()).throw(AssertionError("autocomplete called")))
+    monkeypatch.setattr(serp_tools, "_serp_search", lambda params: captured.update(params) or {})
+
+    serp_tools.search_google_flights({"origin": "San Francisco", "destination": "Tokyo", "start_date": "2025-06-01"})
+    assert captured["departure_id"] == "SFO"
+    assert captured["arrival_id"] == "NRT,HND"
+
+def test_location_resolution_is_cached(monkeypatch, tmp_path):
+    """
+    Names missing from the index hit SerpAPI once; hits and misses are both cached.
+    """
+    from utils.cache import TieredCache
+    calls = []
+
+    def fake_search(params):
+        calls.append(params["q"])
+        if params["q"] == "Nowhere":
+            return {"error": "Google Flights Autocomplete hasn't returned any results for this query."}
+        return {"suggestions": [{"id": "/m/0x1", "name": "Smallville", "airports": []}]}
+
+    monkeypatch.setenv("SERPAPI_KEY", "k")
+    monkeypatch.setattr(serp_tools, "_serp_search", fake_search)
+    monkeypatch.setattr(serp_tools, "_location_cache", TieredCache("test_locations", path=str(tmp_path / "loc.sqlite")))
+    monkeypatch.setattr(serp_tools.airport_index, "learn", lambda suggestions: 0)
+
+    assert serp_tools.resolve_location_id("Smallville") == "/m/0x1"
+    assert serp_tools.resolve_location_id("smallville ") == "/m/0x1"
+    assert serp_tools.resolve_location_id("Nowhere") == "Nowhere"
+    assert serp_tools.resolve_location_id("Nowhere") == "Nowhere"
+    assert serp_tools.resolve_location_id("Tokyo") == "NRT,HND"
+    assert calls == ["Smallville", "Nowhere"]
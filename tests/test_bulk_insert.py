@@ -0,0 +1,61 @@
+import os
+os.environ.setdefault("OPENAI_API_KEY", "sk-test-mock-key")
+
+from database import ops
+from database.bulk import insert_many
+from state import TravelState
+
+class RecordingCursor:
+    lastrowid = 42
+
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, sql, params=None):
+        self.statements.append((sql, params))
+
+class RecordingConn:
+    def __init__(self):
+        self.cur = RecordingCursor()
+        self.commits = 0
+
+    def cursor(self):
+        return self.cur
+
+    def commit(self):
+        self.commits += 1
+
+    def close(self):
+        pass
+
+def test_insert_many_batches_rows():
+    cur = RecordingCursor()
+    rows = [(i, f"name {i}") for i in range(5)]
+    assert insert_many(cur, "flights", ("trip_id", "airline"), rows, batch_size=2) == 5
+
+    assert len(cur.statements) == 3
+    sql, params = cur.statements[0]
+    assert sql == "INSERT INTO flights (trip_id, airline) VALUES (%s, %s), (%s, %s)"
+    assert params == [0, "name 0", 1, "name 1"]
+    assert cur.statements[2][1] == [4, "name 4"]
+    assert insert_many(cur, "flights", ("trip_id",), []) == 0
+
+def test_save_trip_plan_uses_one_statement_per_table(monkeypatch):
+    """
+    30 child rows are written with 4 statements (plan, flights, hotels, sights)
+    in a single transaction.
+    """
+    conn = RecordingConn()
+    monkeypatch.setattr(ops, "get_conn", lambda: conn)
+    state = TravelState(
+        origin="SFO", destination="Paris",
+        flights=[{"airline": "Delta", "price": 320}] * 10,
+        accommodations=[{"name": "Hotel", "price": 120}] * 10,
+        top_sights=[{"title": "Louvre"}] * 10,
+    )
+    ops.save_trip_plan(state)
+
+    tables = [sql.split()[2] for sql, _ in conn.cur.statements]
+    assert tables == ["trip_plans", "flights", "accommodations", "top_sights"]
+    assert conn.commits == 1
+    assert conn.cur.statements[1][1][0] == 42      # trip_id of the parent row
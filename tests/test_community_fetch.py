@@ -0,0 +1,58 @@
+import os
+os.environ.setdefault("OPENAI_API_KEY", "sk-test-mock-key")
+
+import time
+import asyncio
+from agents import community_agent
+from state import TravelState
+
+def _patch_sources(monkeypatch, slow="news", delay=0.5):
+    def sync_search(name, results):
+        def search(query):
+            time.sleep(delay if name == slow else 0.05)
+            return results
+        return search
+
+    def async_search(name, results):
+        async def search(query):
+            await asyncio.sleep(delay if name == slow else 0.05)
+            return results
+        return search
+
+    sources = {
+        "sights": [{"title": "Louvre"}],
+        "local": [{"title": "Bistro"}],
+        "news": [{"title": "Strike"}],
+        "discussions": [{"title": "Tips"}],
+    }
+    for name, results in sources.items():
+        monkeypatch.setattr(community_agent, f"search_google_{name}", sync_search(name, results))
+        monkeypatch.setattr(community_agent, f"asearch_google_{name}", async_search(name, results))
+    monkeypatch.setattr(community_agent, "COMMUNITY_FETCH_TIMEOUT", 0.3)
+
+def test_sync_fetch_is_concurrent_and_skips_slow_source(monkeypatch):
+    """
+    Fast sources run in parallel; a slow one is dropped at the deadline.
+    """
+    _patch_sources(monkeypatch)
+    started = time.perf_counter()
+    state = community_agent.fetch_community_data(TravelState(destination="Paris"))
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.45
+    assert state.top_sights and state.local_places and state.discussions
+    assert state.local_news == []
+    assert {w["data"]["name"] for w in state.generated_ui} == {"Louvre", "Bistro"}
+    assert state.node_timings["community_agent.news"] == 0.3
+    assert state.node_timings["community_agent.sights"] < 0.3
+
+def test_async_fetch_is_concurrent_and_skips_slow_source(monkeypatch):
+    _patch_sources(monkeypatch)
+    started = time.perf_counter()
+    state = asyncio.run(community_agent.afetch_community_data(TravelState(destination="Paris")))
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.45
+    assert state.local_news == []
+    assert len(state.generated_ui) == 2
+    assert set(state.node_timings) == {f"community_agent.{s}" for s in ("sights", "local", "news", "discussions")}
@@ -0,0 +1,99 @@
+import os
+os.environ.setdefault("OPENAI_API_KEY", "sk-test-mock-key")
+
+import pytest
+import graph as graph_module
+from database import component_cache
+from database.cache_keys import component_key
+from state import TravelState
+from utils.cache import TieredCache
+
+TRIP = {"origin": "San Francisco", "destination": "Paris", "start_date": "2025-06-01",
+        "end_date": "2025-06-05", "bedrooms": 1}
+
+@pytest.fixture
+def cache():
+    cache = TieredCache("test_components")
+    component_cache.set_component_cache(cache)
+    yield cache
+    component_cache.set_component_cache(None)
+
+def test_component_keys_only_use_their_inputs():
+    other_origin = dict(TRIP, origin="New York")
+    for name in ("weather", "live_search", "community_agent"):
+        assert component_key(name, TRIP) == component_key(name, other_origin)
+    assert component_key("flight_api", TRIP) != component_key("flight_api", other_origin)
+
+    assert component_key("live_search", TRIP) != component_key("live_search", dict(TRIP, bedrooms=2))
+    assert component_key("weather", TRIP) != component_key("weather", dict(TRIP, end_date="2025-06-06"))
+    assert component_key("community_agent", TRIP) == component_key("community_agent", dict(TRIP, start_date="2025-09-01"))
+    assert component_key("flight_api", dict(TRIP, start_date=None)) is None
+
+def test_branch_fetches_only_missing_components(cache):
+    """
+    A second trip to the same destination from another origin reuses hotels
+    but fetches flights again; empty results are never cached.
+    """
+    calls = []
+
+    def fetch_hotels(state):
+        calls.append(("hotels", state.origin))
+        state.accommodations = [{"name": "Hotel Lutetia"}]
+        return state
+
+    def fetch_flights(state):
+        calls.append(("flights", state.origin))
+        state.flights = [] if state.origin == "Nowhere" else [{"airline": "Air France"}]
+        return state
+
+    hotels = graph_module.branch_node("live_search", fetch_hotels, None)
+    flights = graph_module.branch_node("flight_api", fetch_flights, None)
+
+    for origin in ("San Francisco", "New York", "Nowhere", "Nowhere"):
+        state = TravelState(**dict(TRIP, origin=origin))
+        assert hotels.invoke(state)["accommodations"] == [{"name": "Hotel Lutetia"}]
+        flights.invoke(state)
+
+    assert [c for c in calls if c[0] == "hotels"] == [("hotels", "San Francisco")]
+    assert [c[1] for c in calls if c[0] == "flights"] == ["San Francisco", "New York", "Nowhere", "Nowhere"]
+
+def test_cached_weather_follows_the_temperature_unit(cache):
+    from agents.weather_agent import _apply_forecast
+    calls = []
+
+    def fetch_weather(state):
+        calls.append(state.temp_unit)
+        return _apply_forecast(state, {"list": [
+            {"dt_txt": "2025-06-01 12:00:00", "main": {"temp": -7.0}, "weather": [{"main": "Snow"}]},
+        ]})
+
+    weather = graph_module.branch_node("weather", fetch_weather, None)
+    celsius = weather.invoke(TravelState(**dict(TRIP, temp_unit="C")))
+    fahrenheit = weather.invoke(TravelState(**dict(TRIP, temp_unit="F")))
+
+    assert calls == ["C"]                                  # second plan is a cache hit
+    assert celsius["weather_summary"].endswith("-7--7°C")
+    assert fahrenheit["weather_summary"].endswith("19-19°F")
+
+def test_concurrent_plans_share_weather_in_their_own_unit(cache):
+    import asyncio
+    from agents.weather_agent import _apply_forecast
+    calls = []
+
+    async def afetch_weather(state):
+        calls.append(state.temp_unit)
+        await asyncio.sleep(0.05)
+        return _apply_forecast(state, {"list": [
+            {"dt_txt": "2025-06-01 12:00:00", "main": {"temp": 20.0}, "weather": [{"main": "Sun"}]},
+        ]})
+
+    weather = graph_module.branch_node("weather", None, afetch_weather)
+
+    async def plans():
+        return await asyncio.gather(*(weather.ainvoke(TravelState(**dict(TRIP, temp_unit=unit))) for unit in "CF"))
+
+    celsius, fahrenheit = asyncio.run(plans())
+    assert calls == ["C"]                                  # the °F plan joined the in-flight fetch
+    assert celsius["weather_summary"].endswith("20-20°C")
+    assert fahrenheit["weather_summary"].endswith("68-68°F")
+    assert celsius["weather_info"] == fahrenheit["weather_info"]
@@ -0,0 +1,83 @@
+import threading
+import time
+import pytest
+from database.singlestore_client import ConnectionPool
+
+class FakeConn:
+    opened = 0
+
+    def __init__(self):
+        FakeConn.opened += 1
+        self.closed = False
+        self.alive = True
+        self.rollbacks = 0
+
+    def cursor(self):
+        conn = self
+
+        class Cursor:
+            def execute(self, sql, params=None):
+                if not conn.alive:
+                    raise ConnectionError("server has gone away")
+            def fetchall(self):
+                return [(1,)]
+        return Cursor()
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+@pytest.fixture(autouse=True)
+def reset_counter():
+    FakeConn.opened = 0
+
+def test_connections_are_reused():
+    pool = ConnectionPool(FakeConn, size=2, max_overflow=0, name="test_pool_reuse")
+    for _ in range(5):
+        conn = pool.get_conn()
+        conn.cursor().execute("SELECT 1")
+        conn.close()
+    assert FakeConn.opened == 1
+    assert pool.stats()["checkouts"] == 5
+    assert pool.stats()["in_use"] == 0
+
+def test_overflow_is_closed_on_return_and_exhaustion_times_out():
+    pool = ConnectionPool(FakeConn, size=1, max_overflow=1, timeout=0.05, name="test_pool_overflow")
+    first, second = pool.get_conn(), pool.get_conn()
+    assert pool.stats()["saturation"] == 1.0
+    with pytest.raises(RuntimeError):
+        pool.get_conn()
+
+    raw_second = second._raw
+    first.close()
+    second.close()
+    assert raw_second.closed            # overflow connection is not kept
+    assert pool.stats()["idle"] == 1
+
+def test_waiter_gets_released_connection():
+    pool = ConnectionPool(FakeConn, size=1, max_overflow=0, timeout=2, name="test_pool_wait")
+    conn = pool.get_conn()
+    threading.Timer(0.05, conn.close).start()
+    assert pool.get_conn() is not None
+    assert pool.stats()["waits"] == 1
+
+def test_dead_and_expired_connections_are_replaced():
+    pool = ConnectionPool(FakeConn, size=1, max_overflow=0, ping_after=0, name="test_pool_health")
+    conn = pool.get_conn()
+    raw = conn._raw
+    conn.close()
+    raw.alive = False
+    time.sleep(0.01)
+
+    conn = pool.get_conn()            # ping fails -> new connection
+    assert conn._raw is not raw and raw.closed
+    assert pool.stats()["dead"] == 1
+    conn.close()
+
+    pool.max_lifetime = 0
+    conn = pool.get_conn()            # too old -> recycled
+    assert pool.stats()["recycled"] == 1
+    assert FakeConn.opened == 3
+    conn.close()
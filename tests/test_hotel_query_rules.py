@@ -0,0 +1,30 @@
+import os
+os.environ.setdefault("OPENAI_API_KEY", "sk-test-mock-key")
+
+from agents import search_agent
+from agents.search_agent import rule_based_query
+from agents.tools.serp_tools import _hotels_params
+from state import TravelState
+
+def _state(*preferences):
+    return TravelState(destination="Tokyo", user_preferences=list(preferences))
+
+def test_common_preferences_map_without_llm():
+    assert rule_based_query(_state()) == "hotels in Tokyo"
+    assert rule_based_query(_state("Hotel: Gym access", "Airline: Delta Only", "Needs a pool and gym")) \
+        == "hotels in Tokyo gym pool"
+    # Exclusions and free-form wishes still go to the LLM
+    assert rule_based_query(_state("Hotel: No Hostels")) is None
+    assert rule_based_query(_state("Somewhere with character")) is None
+    # Saved trip summaries mention amenities but are not hotel preferences
+    assert rule_based_query(_state("User planned a trip from NYC to Miami. Analysis: beach hotels "
+                                   "with a pool and fast wifi")) is None
+
+def test_live_search_uses_the_rule_query(monkeypatch):
+    searched = []
+    monkeypatch.setattr(search_agent, "search_google_hotels", lambda params: searched.append(_hotels_params(params)) or [])
+    monkeypatch.setattr(search_agent, "_query_chain", lambda: (_ for _ in ()).throw(AssertionError("LLM called")))
+
+    search_agent.live_search(_state("Hotel: Pet friendly"))
+    assert searched[0]["q"] == "hotels in Tokyo pet friendly"
+    assert search_agent.hotel_query_stats()["rules"] >= 1
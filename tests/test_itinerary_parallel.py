@@ -0,0 +1,88 @@
+import os
+os.environ.setdefault("OPENAI_API_KEY", "sk-test-mock-key")
+
+import time
+import asyncio
+from agents import itinerary_agent
+from state import TravelState
+
+DELAY = 0.2
+
+class FakeChain:
+    def __init__(self, render, delay=DELAY):
+        self.render = render
+        self.delay = delay
+
+    def invoke(self, inputs):
+        time.sleep(self.delay)
+        return self.render(inputs)
+
+    async def ainvoke(self, inputs):
+        await asyncio.sleep(self.delay)
+        return self.render(inputs)
+
+    def stream(self, inputs):
+        yield self.render(inputs)
+
+    async def astream(self, inputs):
+        yield self.render(inputs)
+
+def _skeleton(inputs):
+    return {"days": [{"day": i, "area": f"Area {i}", "focus": "Sights"} for i in range(1, inputs["num_days"] + 1)]}
+
+def _patch(monkeypatch, skeleton=_skeleton):
+    monkeypatch.setattr(itinerary_agent, "_skeleton_chain", lambda: FakeChain(skeleton, delay=0.05))
+    monkeypatch.setattr(itinerary_agent, "_day_chain", lambda: FakeChain(lambda i: f"## Day {i['day']}: {i['area']}"))
+    monkeypatch.setattr(itinerary_agent, "_closing_chain", lambda: FakeChain(lambda i: "## Why This Works"))
+    monkeypatch.setattr(itinerary_agent, "_itinerary_chain", lambda: FakeChain(lambda i: "Single call"))
+
+def _trip(end_date):
+    return TravelState(destination="Paris", start_date="2025-06-01", end_date=end_date)
+
+def test_long_trips_generate_days_concurrently(monkeypatch):
+    _patch(monkeypatch)
+    for generate in (itinerary_agent.generate_itinerary,
+                     lambda s: asyncio.run(itinerary_agent.agenerate_itinerary(s))):
+        started = time.perf_counter()
+        state = generate(_trip("2025-06-07"))
+        elapsed = time.perf_counter() - started
+
+        sections = state.itinerary.split("\n\n")
+        assert sections == [f"## Day {i}: Area {i}" for i in range(1, 8)] + ["## Why This Works"]
+        assert elapsed < 3 * DELAY        # skeleton + slowest section, not 8 sections in a row
+
+def test_short_trips_and_failures_use_a_single_call(monkeypatch):
+    _patch(monkeypatch)
+    assert itinerary_agent.generate_itinerary(_trip("2025-06-03")).itinerary == "Single call"
+
+    _patch(monkeypatch, skeleton=lambda inputs: {"days": []})
+    assert itinerary_agent.generate_itinerary(_trip("2025-06-07")).itinerary == "Single call"
+
+def test_failed_section_resets_the_streamed_text(monkeypatch):
+    from langgraph.graph import StateGraph, START, END
+    from graph import node
+
+    def day(inputs):
+        if inputs["day"] == 3:
+            raise RuntimeError("section failed")
+        return f"## Day {inputs['day']}"
+
+    _patch(monkeypatch)
+    monkeypatch.setattr(itinerary_agent, "_day_chain", lambda: FakeChain(day, delay=0.01))
+
+    g = StateGraph(TravelState)
+    g.add_node("itinerary", node(itinerary_agent.generate_itinerary, itinerary_agent.agenerate_itinerary))
+    g.add_edge(START, "itinerary")
+    g.add_edge("itinerary", END)
+
+    async def run():
+        client_text, events = "", []
+        async for mode, event in g.compile().astream(_trip("2025-06-07"), stream_mode=["custom", "updates"]):
+            if mode == "custom":
+                events.append(event["type"])
+                client_text = "" if event["type"] == "itinerary_reset" else client_text + event["text"]
+        return client_text, events
+
+    client_text, events = asyncio.run(run())
+    assert events[:3] == ["itinerary_chunk", "itinerary_chunk", "itinerary_reset"]   # days 1-2, then day 3 fails
+    assert client_text == "Single call"
@@ -0,0 +1,77 @@
+import os
+os.environ.setdefault("OPENAI_API_KEY", "sk-test-mock-key")
+
+import asyncio
+from langgraph.graph import StateGraph, START, END
+from agents import itinerary_agent
+from graph import node
+from state import TravelState
+from utils.metrics import metrics
+
+TOKENS = ["Day 1", ": Louvre", "\n", "\nDay 2", ": Orsay", " and a long walk along the Seine"]
+
+class FakeChain:
+    def stream(self, inputs):
+        yield from TOKENS
+
+    async def astream(self, inputs):
+        for token in TOKENS:
+            await asyncio.sleep(0)
+            yield token
+
+def _graph():
+    g = StateGraph(TravelState)
+    g.add_node("itinerary", node(itinerary_agent.generate_itinerary, itinerary_agent.agenerate_itinerary))
+    g.add_edge(START, "itinerary")
+    g.add_edge("itinerary", END)
+    return g.compile()
+
+def test_itinerary_chunks_are_streamed_and_assembled(monkeypatch):
+    monkeypatch.setattr(itinerary_agent, "_itinerary_chain", lambda: FakeChain())
+    monkeypatch.setattr(itinerary_agent, "STREAM_FLUSH_CHARS", 20)
+
+    async def run():
+        chunks, final = [], None
+        async for mode, event in _graph().astream(TravelState(destination="Paris"), stream_mode=["custom", "updates"]):
+            if mode == "custom":
+                chunks.append(event["text"])
+            else:
+                final = event["itinerary"]["itinerary"]
+        return chunks, final
+
+    chunks, final = asyncio.run(run())
+    assert final == "".join(TOKENS)
+    assert "".join(chunks) == final
+    assert chunks[0] == "Day 1: Louvre\n\nDay 2"       # flushed at the paragraph break
+    assert len(chunks) == 2
+    assert metrics.percentile("itinerary.ttft_seconds", 50) <= metrics.percentile("itinerary.total_seconds", 50)
+
+def test_sync_generation_outside_a_graph(monkeypatch):
+    monkeypatch.setattr(itinerary_agent, "_itinerary_chain", lambda: FakeChain())
+    state = itinerary_agent.generate_itinerary(TravelState(destination="Paris"))
+    assert state.itinerary == "".join(TOKENS)
+
+class FailingChain:
+    async def astream(self, inputs):
+        for token in TOKENS[:4]:
+            yield token
+        raise RuntimeError("connection dropped")
+
+def test_failure_mid_stream_resets_the_streamed_text(monkeypatch):
+    monkeypatch.setattr(itinerary_agent, "_itinerary_chain", lambda: FailingChain())
+    monkeypatch.setattr(itinerary_agent, "STREAM_FLUSH_CHARS", 20)
+
+    async def run():
+        events, client_text, final = [], "", None
+        async for mode, event in _graph().astream(TravelState(destination="Paris"), stream_mode=["custom", "updates"]):
+            if mode == "custom":
+                events.append(event["type"])
+                client_text = "" if event["type"] == "itinerary_reset" else client_text + event["text"]
+            else:
+                final = event["itinerary"]["itinerary"]
+        return events, client_text, final
+
+    events, client_text, final = asyncio.run(run())
+    assert events == ["itinerary_chunk", "itinerary_reset"]
+    assert client_text == ""
+    assert final == itinerary_agent.ITINERARY_FALLBACK
@@ -0,0 +1,42 @@
+import os
+os.environ.setdefault("OPENAI_API_KEY", "sk-test-mock-key")
+
+import asyncio
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+
+from utils import llm_cache
+from utils.cache import TieredCache
+from utils.llm_cache import CachedChain
+from utils.metrics import metrics
+
+PROMPT = ChatPromptTemplate.from_messages([("user", "Hotels in {city}")])
+
+def test_repeated_inputs_skip_the_llm(monkeypatch, tmp_path):
+    monkeypatch.setattr(llm_cache, "_llm_cache", TieredCache("test_llm", path=str(tmp_path / "llm.sqlite")))
+    llm = FakeListChatModel(responses=["hotels in paris", "hotels in rome", "unexpected"])
+    chain = CachedChain("test_query", PROMPT, llm, StrOutputParser())
+
+    assert chain.invoke({"city": "Paris"}) == "hotels in paris"
+    assert asyncio.run(chain.ainvoke({"city": "Paris"})) == "hotels in paris"
+    assert chain.invoke({"city": "Rome"}) == "hotels in rome"
+    assert chain.invoke({"city": "Paris"}) == "hotels in paris"
+
+    stats = llm_cache.llm_cache_stats()["test_query"]
+    assert (stats["hits"], stats["misses"]) == (2, 2)
+    assert metrics.counter("llm_cache.test_query.saved_seconds") > 0
+
+    # A different prompt template never reuses these answers
+    edited = ChatPromptTemplate.from_messages([("user", "Cheap hotels in {city}")])
+    assert CachedChain("test_query", edited, llm, StrOutputParser()).invoke({"city": "Paris"}) == "unexpected"
+
+def test_disk_tier_is_bounded(tmp_path):
+    cache = TieredCache("test_llm_disk", path=str(tmp_path / "llm.sqlite"), max_entries=10, max_disk_entries=2)
+    cache.set("old", 1, ttl=10)
+    cache.set("newer", 2, ttl=20)
+    cache.set("newest", 3, ttl=30)
+
+    restarted = TieredCache("test_llm_disk", path=str(tmp_path / "llm.sqlite"))
+    assert restarted.get("old") is None
+    assert restarted.get("newest") == 3
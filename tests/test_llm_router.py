@@ -0,0 +1,102 @@
+import os
+os.environ.setdefault("OPENAI_API_KEY", "sk-test-mock-key")
+
+import time
+import asyncio
+from typing import Any
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from utils import llm_factory
+from utils.llm_factory import HedgedLLM, ModelStats
+
+class FakeChat(BaseChatModel):
+    """Local chat model with injected latency and failures."""
+    model_name: str
+    delay: float = 0.0
+    fail: bool = False
+    calls: Any = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def _result(self):
+        self.calls.append(self.model_name)
+        if self.fail:
+            raise RuntimeError(f"{self.model_name} is down")
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.model_name))])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.delay)
+        return self._result()
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.delay)
+        return self._result()
+
+def _router(*models, **kw):
+    calls = []
+    for m in models:
+        m.calls = calls
+    return HedgedLLM(models=list(models), stats=ModelStats(), **kw), calls
+
+def test_slow_primary_is_hedged(monkeypatch):
+    monkeypatch.setattr(llm_factory, "HEDGE_DEFAULT_SECONDS", 0.05)
+    for call in (lambda r: r.invoke("hi"), lambda r: asyncio.run(r.ainvoke("hi"))):
+        router, calls = _router(FakeChat(model_name="primary", delay=1.0), FakeChat(model_name="backup", delay=0.01))
+        started = time.perf_counter()
+        assert call(router).content == "backup"
+        assert time.perf_counter() - started < 0.5
+        assert calls == ["backup"]                        # the primary never got to answer
+
+def test_errors_fail_over_and_demote(monkeypatch):
+    monkeypatch.setattr(llm_factory, "MIN_SAMPLES", 3)
+    router, calls = _router(FakeChat(model_name="primary", fail=True), FakeChat(model_name="backup"))
+    for _ in range(3):
+        assert router.invoke("hi").content == "backup"
+    assert calls == ["primary", "backup"] * 3
+    assert router.stats.demoted("primary")
+
+    calls.clear()
+    assert asyncio.run(router.ainvoke("hi")).content == "backup"
+    assert calls == ["backup"]                            # demoted model is no longer tried first
+
+def test_hedge_delay_tracks_latency_percentile(monkeypatch):
+    monkeypatch.setattr(llm_factory, "MIN_SAMPLES", 3)
+    monkeypatch.setattr(llm_factory, "HEDGE_MIN_SECONDS", 0.1)
+    stats = ModelStats()
+    assert stats.hedge_after("itinerary", "gpt") == llm_factory.HEDGE_DEFAULT_SECONDS
+    for seconds in (1, 2, 3, 4, 10):
+        stats.record("itinerary", "gpt", "ok", seconds)
+    assert stats.hedge_after("itinerary", "gpt") == 10
+    assert stats.hedge_after("reasoning", "gpt") == llm_factory.HEDGE_DEFAULT_SECONDS
+
+def test_clients_and_chains_are_shared():
+    from agents import itinerary_agent
+    assert llm_factory.get_llm(0.7, route="itinerary") is llm_factory.get_llm(0.7, route="itinerary")
+    assert llm_factory.get_llm(0.7) is not llm_factory.get_llm(0.3)
+    assert itinerary_agent._day_chain() is itinerary_agent._day_chain()
+
+def test_caller_cancellation_does_not_count_against_models(monkeypatch):
+    monkeypatch.setattr(llm_factory, "MIN_SAMPLES", 3)
+    router, _ = _router(FakeChat(model_name="primary", delay=1.0), FakeChat(model_name="backup", delay=1.0))
+
+    async def main():
+        tasks = [asyncio.create_task(router.ainvoke("hi")) for _ in range(6)]
+        await asyncio.sleep(0.05)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    asyncio.run(main())
+    assert not router.stats.demoted("primary")
+    assert router.stats.snapshot()["outcomes"] == {}
+
+def test_lost_hedges_are_recorded_as_slow(monkeypatch):
+    monkeypatch.setattr(llm_factory, "HEDGE_DEFAULT_SECONDS", 0.05)
+    router, _ = _router(FakeChat(model_name="primary", delay=1.0), FakeChat(model_name="backup", delay=0.01))
+    assert asyncio.run(router.ainvoke("hi")).content == "backup"
+    assert router.stats.snapshot()["outcomes"]["primary"]["slow"] == 1
@@ -0,0 +1,91 @@
+from database import migrations
+
+class FakeCursor:
+    def __init__(self, version=0, columns=()):
+        self.version = version
+        self.columns = set(columns)
+        self.statements = []
+
+    def execute(self, sql, params=None):
+        self.statements.append(" ".join(sql.split()))
+        self._params = params
+        if sql.startswith("INSERT IGNORE INTO schema_version"):
+            self.version = max(self.version, params[0])
+        if "ADD COLUMN" in sql:
+            self.columns.add(sql.split("ADD COLUMN")[1].split()[0])
+
+    def fetchone(self):
+        last = self.statements[-1]
+        if "MAX(version)" in last:
+            return (self.version or None,)
+        if "information_schema" in last:
+            return (1 if self._params[1] in self.columns else 0,)
+        return (0,)
+
+class FakeConn:
+    def __init__(self, cur):
+        self.cur = cur
+        self.commits = 0
+
+    def cursor(self):
+        return self.cur
+
+    def commit(self):
+        self.commits += 1
+
+def test_fresh_database_gets_every_migration():
+    cur = FakeCursor()
+    assert migrations.migrate(FakeConn(cur)) == len(migrations.MIGRATIONS)
+    assert not any(s.startswith("DROP") for s in cur.statements)
+    assert any("CREATE TABLE IF NOT EXISTS trip_plans" in s for s in cur.statements)
+    assert cur.version == migrations.MIGRATIONS[-1][0]
+
+def test_current_schema_is_a_no_op():
+    """
+    Restarting against an up-to-date schema only checks the version.
+    """
+    cur = FakeCursor(version=migrations.MIGRATIONS[-1][0])
+    conn = FakeConn(cur)
+    assert migrations.migrate(conn) == 0
+    assert len(cur.statements) == 2
+    assert conn.commits == 0
+
+def test_additive_migrations_skip_existing_columns():
+    existing = {"snapshot", "cache_key", "route_key", "dest_key", "cache_key_idx", "route_key_idx", "dest_key_idx"}
+    cur = FakeCursor(version=1, columns=existing)
+    migrations.migrate(FakeConn(cur))
+    assert not any("ALTER TABLE" in s for s in cur.statements)
+
+    cur = FakeCursor(version=2)
+    migrations.migrate(FakeConn(cur))
+    assert "ALTER TABLE trip_plans ADD COLUMN cache_key VARCHAR(40)" in cur.statements
+
+class RacingCursor(FakeCursor):
+    """Another worker adds every column / index between the check and the ALTER."""
+
+    def __init__(self, column_error=migrations.DUPLICATE_COLUMN, index_error=migrations.DUPLICATE_KEY_NAME):
+        super().__init__(version=2)
+        self.column_error = column_error
+        self.index_error = index_error
+
+    def execute(self, sql, params=None):
+        if sql.startswith("ALTER TABLE"):
+            self.statements.append(sql)
+            code = self.index_error if "ADD INDEX" in sql else self.column_error
+            raise Exception(code, "already exists")
+        super().execute(sql, params)
+
+def test_concurrent_worker_changes_count_as_applied():
+    cur = RacingCursor()
+    assert migrations.migrate(FakeConn(cur)) == 1
+    assert cur.version == migrations.MIGRATIONS[-1][0]
+
+def test_other_alter_errors_still_fail():
+    cur = RacingCursor(column_error=1146)    # table doesn't exist
+    try:
+        migrations.migrate(FakeConn(cur))
+    except Exception as e:
+        assert e.args[0] == 1146
+    else:
+        raise AssertionError("migration error was swallowed")
+    assert cur.version == 2
@@ -0,0 +1,44 @@
+import os
+os.environ.setdefault("OPENAI_API_KEY", "sk-test-mock-key")
+
+import asyncio
+import pytest
+from agents import modifier_agent
+from agents.modifier_agent import parse_feedback
+from state import TravelState
+
+@pytest.mark.parametrize("message, expected", [
+    ("cheaper hotels", {"max_price_per_night": 150.0, "rerun_hotels": True}),
+    ("4 stars minimum", {"min_rating": 4.0, "rerun_hotels": True}),
+    ("More relaxed pace please", {"travel_pace": "Relaxed", "rerun_itinerary": True}),
+    ("2 bedrooms", {"bedrooms": 2, "rerun_hotels": True}),
+    ("under $150 per night", {"max_price_per_night": 150.0, "rerun_hotels": True}),
+    ("a more balanced pace", {"travel_pace": "Moderate", "rerun_itinerary": True}),
+    ("budget of 180 and 4.5+ stars", {"max_price_per_night": 180.0, "min_rating": 4.5, "rerun_hotels": True}),
+])
+def test_common_feedback_is_parsed_locally(message, expected):
+    updates = parse_feedback(TravelState(max_price_per_night=200), message)
+    assert updates.model_dump(exclude_defaults=True) == expected
+
+@pytest.mark.parametrize("message", ["I hate hostels", "Add museums to my interests", "cheaper but under $300", "7 stars",
+                                     "min $100 per night", "at least $100", "over 150 a night", "$150",
+                                     "moderate price hotels", "normal price please", "max 3 stars",
+                                     "3 stars maximum", "only 3 stars", "at most 3 stars", "up to 4 stars",
+                                     "under 4 stars", "less than 4 stars", "3 stars or less"])
+def test_unclear_feedback_goes_to_the_llm(message):
+    assert parse_feedback(TravelState(), message) is None
+
+def test_modify_state_skips_the_llm_for_parsed_feedback(monkeypatch):
+    class NoLLM:
+        def invoke(self, inputs):
+            raise AssertionError("LLM called")
+
+        async def ainvoke(self, inputs):
+            raise AssertionError("LLM called")
+
+    monkeypatch.setattr(modifier_agent, "chain", NoLLM())
+    state, diff = modifier_agent.modify_state(TravelState(), "2 bedrooms")
+    assert state.bedrooms == 2 and diff["rerun_hotels"]
+    state, _ = asyncio.run(modifier_agent.amodify_state(state, "faster pace"))
+    assert state.travel_pace == "Hectic"
+    assert modifier_agent.feedback_stats()["rules"] >= 2
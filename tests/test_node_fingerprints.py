@@ -0,0 +1,51 @@
+import os
+os.environ.setdefault("OPENAI_API_KEY", "sk-test-mock-key")
+
+import json
+import graph as graph_module
+from agents.itinerary_agent import _itinerary_inputs, ITINERARY_FALLBACK
+from database import ops
+from state import TravelState
+
+def _itinerary_node(calls, output="Day 1: Louvre"):
+    def generate(state):
+        calls.append(state.interests)
+        state.itinerary = output
+        return state
+    return graph_module.fingerprinted_node(
+        "itinerary", "itinerary", _itinerary_inputs, ITINERARY_FALLBACK, generate, None)
+
+def _apply(state, updates):
+    data = state.model_dump()
+    for key, value in updates.items():
+        data[key] = {**data[key], **value} if key == "node_fingerprints" else value
+    return TravelState(**data)
+
+def test_itinerary_regenerates_only_when_inputs_change():
+    calls = []
+    itinerary = _itinerary_node(calls)
+    state = TravelState(origin="SFO", destination="Paris", start_date="2025-06-01", end_date="2025-06-05")
+
+    state = _apply(state, itinerary.invoke(state))
+    assert itinerary.invoke(state) == {}                        # same inputs: skipped
+    assert itinerary.invoke(state.model_copy(update={"weather_summary": "Rain"})) == {}   # not an input
+
+    changed = state.model_copy(update={"interests": "Museums"})
+    assert itinerary.invoke(changed)["itinerary"] == "Day 1: Louvre"
+    assert calls == ["General sightseeing", "Museums"]
+
+def test_failed_generation_is_retried():
+    calls = []
+    itinerary = _itinerary_node(calls, output=ITINERARY_FALLBACK)
+    state = TravelState(origin="SFO", destination="Paris")
+    state = _apply(state, itinerary.invoke(state))
+    assert state.node_fingerprints == {"itinerary": ""}
+    itinerary.invoke(state)
+    assert len(calls) == 2
+
+def test_snapshot_carries_fingerprints():
+    state = TravelState(destination="Paris", itinerary="Day 1", trip_analysis="Nice",
+                        node_fingerprints={"itinerary": "abc"})
+    snapshot = json.loads(ops._trip_snapshot(state))
+    assert snapshot["trip_analysis"] == "Nice"
+    assert snapshot["node_fingerprints"] == {"itinerary": "abc"}
@@ -0,0 +1,47 @@
+import os
+os.environ.setdefault("OPENAI_API_KEY", "sk-test-mock-key")
+
+import asyncio
+from api import server
+from database.cache_keys import plan_key
+
+REQUEST = {"origin": "San Francisco", "destination": "Paris", "start_date": "2025-06-01", "end_date": "2025-06-05"}
+
+def test_plan_key_normalizes_route_but_not_user():
+    base = plan_key(server._initial_state(REQUEST).model_dump())
+    assert plan_key(server._initial_state(dict(REQUEST, origin="SFO", destination=" paris")).model_dump()) == base
+    assert plan_key(server._initial_state(dict(REQUEST, user_id="alice")).model_dump()) != base
+    assert plan_key(server._initial_state(dict(REQUEST, bedrooms=2)).model_dump()) != base
+
+def test_identical_requests_share_one_graph_run(monkeypatch):
+    runs = []
+
+    class FakeGraph:
+        async def astream(self, state, config=None, stream_mode=None):
+            runs.append(state.destination)
+            for step in ("weather", "itinerary"):
+                await asyncio.sleep(0.05)
+                yield "updates", {step: {step: f"{step} for {state.destination}"}}
+
+    async def fake_save(state):
+        pass
+
+    monkeypatch.setattr(server, "graph", FakeGraph())
+    monkeypatch.setattr(server, "asave_trip_plan", fake_save)
+
+    async def client(delay):
+        await asyncio.sleep(delay)
+        state = server._initial_state(REQUEST)
+        run = server._plan_runs.stream(plan_key(state.model_dump()),
+                                       lambda stream: server._run_plan(state, stream))
+        steps = [update.step async for update in run.events()]
+        return steps, await run.result()
+
+    async def main():
+        return await asyncio.gather(client(0), client(0.01), client(0.07))
+
+    results = asyncio.run(main())
+    assert runs == ["Paris"]
+    # The late subscriber replays the update it missed
+    assert all(steps == ["weather", "itinerary"] for steps, _ in results)
+    assert all(final == {"weather": "weather for Paris", "itinerary": "itinerary for Paris"} for _, final in results)
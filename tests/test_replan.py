@@ -0,0 +1,61 @@
+import os
+os.environ.setdefault("OPENAI_API_KEY", "sk-test-mock-key")
+
+import asyncio
+from langchain_core.runnables import RunnableLambda
+
+import replan
+from graph import graph_nodes
+from state import TravelState
+
+HOTELS = [{"name": "Grand", "price": 400, "rating": 4.8}, {"name": "Budget Inn", "price": 90, "rating": 4.1}]
+
+def _fake_nodes(calls):
+    nodes = graph_nodes()
+
+    def fake(name, updates):
+        def run(state):
+            calls.append(name)
+            return updates(state) if callable(updates) else updates
+        return RunnableLambda(run)
+
+    return {
+        **nodes,     # real recommend_hotels / recommend_flights / check_constraints
+        "resolve_ids": fake("resolve_ids", {}),
+        "weather": fake("weather", lambda s: {"weather_summary": f"Sunny from {s.start_date}"}),
+        "community_agent": fake("community_agent", {}),
+        "live_search": fake("live_search", {"accommodations": HOTELS}),           # same hotels either way
+        "flight_api": fake("flight_api", lambda s: {"flights": [{"airline": "Delta", "price": 300, "date": s.start_date}]}),
+        "itinerary": fake("itinerary", lambda s: {"itinerary": f"{s.travel_pace} trip from {s.start_date}"}),
+        "reasoning": fake("reasoning", {"trip_analysis": "Looks good"}),
+    }
+
+def _state(**kw):
+    base = dict(destination="Paris", destination_id="CDG", origin_id="JFK", start_date="2025-06-01",
+                end_date="2025-06-05", accommodations=HOTELS, flights=[{"airline": "Delta", "price": 300}])
+    return TravelState(**{**base, **kw})
+
+def test_dependency_map():
+    assert replan.affected_nodes(["max_price_per_night"]) == ["recommend_hotels"]
+    assert replan.affected_nodes(["travel_pace"]) == ["itinerary"]
+    assert replan.affected_nodes(["start_date"])[:3] == ["weather", "live_search", "flight_api"]
+    assert replan.changed_fields(_state(), _state(min_rating=4.5, itinerary="ignored")) == ["min_rating"]
+
+def test_only_the_affected_subgraph_reruns(monkeypatch):
+    calls, updates = [], []
+    monkeypatch.setattr(replan, "_nodes", lambda: _fake_nodes(calls))
+
+    async def on_update(step, changes):
+        updates.append(step)
+
+    # Price cap: hotels are re-ranked, nothing is fetched, the itinerary is untouched
+    state = asyncio.run(replan.areplan(_state(max_price_per_night=150), ["max_price_per_night"], on_update))
+    assert calls == [] and updates == ["recommend_hotels"]
+    assert [h["name"] for h in state.recommended_hotels] == ["Budget Inn"]
+
+    # New dates: fetches re-run; unchanged hotels stop there, changed flights flow on
+    calls.clear()
+    state = replan.replan(_state(start_date="2025-07-01"), ["start_date"])
+    assert sorted(calls) == ["flight_api", "itinerary", "live_search", "reasoning", "weather"]
+    assert state.itinerary == "Moderate trip from 2025-07-01"
+    assert state.weather_summary == "Sunny from 2025-07-01"
@@ -0,0 +1,91 @@
+import time
+import pytest
+from utils.cache import TieredCache
+from agents.tools import serp_tools
+from agents.tools.serp_tools import serp_cache_key
+
+def test_lru_eviction_and_ttl():
+    """
+    Memory tier is bounded (LRU) and entries expire after their TTL.
+    """
+    cache = TieredCache("test_lru", max_entries=2)
+    cache.set("a", {"v": 1}, ttl=60)
+    cache.set("b", {"v": 2}, ttl=60)
+    cache.get("a")                      # 'a' becomes most recently used
+    cache.set("c", {"v": 3}, ttl=60)    # evicts 'b'
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": 1}
+    assert cache.stats()["evictions"] == 1
+
+    cache.set("short", {"v": 4}, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("short") is None
+
+def test_disk_tier_survives_restart(tmp_path):
+    """
+    A new cache instance (e.g. after a restart) is served from the SQLite tier.
+    """
+    path = str(tmp_path / "cache.sqlite")
+    TieredCache("test_disk", path=path).set("k", {"results": [1, 2]}, ttl=60)
+
+    restarted = TieredCache("test_disk", path=path)
+    assert restarted.get("k") == {"results": [1, 2]}
+    assert restarted.stats()["disk_hits"] == 1
+
+def test_cache_key_normalization():
+    """
+    api_key is stripped and case/whitespace differences map to one key.
+    """
+    a = {"engine": "google_news", "q": "Paris ", "api_key": "one"}
+    b = {"engine": "google_news", "q": "paris", "api_key": "two"}
+    assert serp_cache_key(a) == serp_cache_key(b)
+    assert serp_cache_key(a).startswith("google_news:")
+
+def test_serp_search_hits_cache(monkeypatch, tmp_path):
+    """
+    Identical queries only reach SerpAPI once; errors are not cached.
+    """
+    calls = []
+
+    class FakeSearch:
+        def __init__(self, params):
+            self.params = params
+        def get_dict(self):
+            calls.append(self.params["q"])
+            if self.params["q"] == "broken":
+                return {"error": "quota"}
+            return {"news_results": [{"title": "Hello"}]}
+
+    monkeypatch.setattr(serp_tools, "GoogleSearch", FakeSearch)
+    monkeypatch.setattr(serp_tools, "_serp_cache", TieredCache("test_serp", path=str(tmp_path / "serp.sqlite")))
+
+    params = {"engine": "google_news", "q": "Paris", "api_key": "k"}
+    assert serp_tools._serp_search(params) == serp_tools._serp_search(dict(params, api_key="other"))
+    assert calls == ["Paris"]
+
+    broken = {"engine": "google_news", "q": "broken", "api_key": "k"}
+    serp_tools._serp_search(broken)
+    serp_tools._serp_search(broken)
+    assert calls.count("broken") == 2
+
+def test_expired_disk_rows_are_purged(tmp_path, monkeypatch):
+    """
+    Expired rows are dropped when the file is opened and every PURGE_EVERY writes.
+    """
+    path = str(tmp_path / "cache.sqlite")
+    cache = TieredCache("test_purge", path=path)
+    cache.set("old", 1, ttl=0.01)
+    time.sleep(0.02)
+
+    def rows(c):
+        return c._db.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    assert rows(TieredCache("test_purge", path=path)) == 0     # purged on open
+
+    monkeypatch.setattr(TieredCache, "PURGE_EVERY", 2)
+    cache = TieredCache("test_purge", path=path)
+    cache.set("short", 1, ttl=0.01)
+    time.sleep(0.02)
+    cache.set("kept", 2, ttl=60)
+    assert rows(cache) == 1
@@ -0,0 +1,46 @@
+import asyncio
+import pytest
+from utils.singleflight import SingleFlight
+
+def test_concurrent_callers_share_one_run():
+    calls = []
+
+    async def refresh():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"flights": [1]}
+
+    async def main():
+        flight = SingleFlight("test_refresh")
+        results = await asyncio.gather(*(flight.run("trip", refresh) for _ in range(20)))
+        assert flight.stats()["joined"] == 19
+        assert not flight.in_flight("trip")
+        await flight.run("trip", refresh)      # finished keys start a new run
+        return results
+
+    results = asyncio.run(main())
+    assert len(calls) == 2
+    assert all(r == {"flights": [1]} for r in results)
+
+def test_work_survives_waiter_cancellation_and_errors_propagate():
+    done = []
+
+    async def refresh():
+        await asyncio.sleep(0.05)
+        done.append(1)
+
+    async def broken():
+        raise RuntimeError("upstream down")
+
+    async def main():
+        flight = SingleFlight("test_cancel")
+        waiter = asyncio.create_task(flight.run("trip", refresh))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.sleep(0.1)
+        with pytest.raises(RuntimeError):
+            await flight.run("bad", broken)
+        assert flight.stats()["failed"] == 1
+
+    asyncio.run(main())
+    assert done == [1]
@@ -0,0 +1,92 @@
+import os
+os.environ.setdefault("OPENAI_API_KEY", "sk-test-mock-key")
+
+from database import ops
+from database.cache_keys import canonical_location, trip_keys
+
+class FakeCursor:
+    """Returns `rows[n]` for the n-th trip_plans query."""
+
+    def __init__(self, rows):
+        self.rows = list(rows)
+        self.statements = []
+
+    def execute(self, sql, params=None):
+        self.statements.append((" ".join(sql.split()), params))
+
+    def fetchone(self):
+        return self.rows.pop(0) if self.rows else None
+
+class FakeConn:
+    def __init__(self, cur):
+        self.cur = cur
+
+    def cursor(self):
+        return self.cur
+
+    def close(self):
+        pass
+
+PARAMS = {"origin": "San Francisco", "destination": "Mumbai", "start_date": "2025-06-01",
+          "end_date": "2025-06-05", "trip_purpose": "vacation"}
+
+def test_location_aliases_share_one_key():
+    assert canonical_location("Mumbai") == canonical_location("mumbai ") == canonical_location("BOM") == "BOM"
+    assert canonical_location("Bombay") == "BOM"
+    assert canonical_location("Some Village") == "some village"
+
+    a = trip_keys(PARAMS)
+    b = trip_keys(dict(PARAMS, origin="SFO", destination=" mumbai", trip_purpose=None))
+    assert a == b
+    assert trip_keys(dict(PARAMS, end_date="2025-06-06"))["cache_key"] != a["cache_key"]
+    assert trip_keys(dict(PARAMS, end_date="2025-06-06"))["route_key"] == a["route_key"]
+
+def test_exact_lookup_uses_the_cache_key(monkeypatch):
+    cur = FakeCursor([(1, None, "San Francisco", "Mumbai", '{"flights": []}')])
+    monkeypatch.setattr(ops, "get_conn", lambda: FakeConn(cur))
+    result = ops.find_cached_trip(dict(PARAMS, destination="BOM"))
+
+    sql, params = cur.statements[0]
+    assert "WHERE cache_key = %s" in sql
+    assert params == (trip_keys(PARAMS)["cache_key"],)
+    assert result["cached"] is True
+
+def test_near_match_policies(monkeypatch):
+    """
+    Shifted dates are a full hit; destination-only reuse returns community data
+    and marks the branch as cached so the graph skips it.
+    """
+    monkeypatch.setattr(ops, "TRIP_CACHE_NEAR_MATCH", {"dates", "destination"})
+
+    cur = FakeCursor([None, (2, None, "San Francisco", "Mumbai", '{"flights": [{"price": 1}]}')])
+    monkeypatch.setattr(ops, "get_conn", lambda: FakeConn(cur))
+    result = ops.find_cached_trip(PARAMS)
+    assert result["near_match"] == "dates"
+    assert "route_key = %s" in cur.statements[1][0]
+
+    cur = FakeCursor([None, None, ('{"top_sights": [{"title": "Gateway of India"}], "flights": [1]}',)])
+    monkeypatch.setattr(ops, "get_conn", lambda: FakeConn(cur))
+    assert ops.find_cached_trip(PARAMS) is None
+    cur.rows = [None, None, ('{"top_sights": [{"title": "Gateway of India"}], "flights": [1]}',)]
+    partial = ops.check_trip_cache(PARAMS)
+    assert partial["cached_components"] == ["community_agent"]
+    assert partial["top_sights"] == [{"title": "Gateway of India"}]
+    assert "flights" not in partial
+
+def test_stale_match_is_flagged(monkeypatch):
+    """
+    Past the cutoff an exact match is only served when the caller accepts stale
+    data (and will refresh it).
+    """
+    monkeypatch.setattr(ops, "TRIP_CACHE_STALE_HOURS", 24)
+    row = (3, None, "San Francisco", "Mumbai", '{"flights": [{"price": 1}]}')
+
+    cur = FakeCursor([None, row])
+    monkeypatch.setattr(ops, "get_conn", lambda: FakeConn(cur))
+    assert ops.find_cached_trip(PARAMS) is None
+
+    cur = FakeCursor([None, row])
+    monkeypatch.setattr(ops, "get_conn", lambda: FakeConn(cur))
+    result = ops.find_cached_trip(PARAMS, allow_stale=True)
+    assert result["stale"] is True
+    assert "INTERVAL 48 HOUR" in cur.statements[1][0]
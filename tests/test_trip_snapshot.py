@@ -0,0 +1,76 @@
+import os
+os.environ.setdefault("OPENAI_API_KEY", "sk-test-mock-key")
+
+import json
+from database import ops
+from state import TravelState
+
+class FakeCursor:
+    """Answers the trip lookup with `trip_row`; every other query returns no rows."""
+
+    lastrowid = 7
+
+    def __init__(self, trip_row=None):
+        self.trip_row = trip_row
+        self.statements = []
+        self.description = []
+
+    def execute(self, sql, params=None):
+        self.statements.append((sql, params))
+        self._last = sql
+
+    def fetchone(self):
+        return self.trip_row if "FROM trip_plans" in self._last else None
+
+    def fetchall(self):
+        return []
+
+class FakeConn:
+    def __init__(self, cur):
+        self.cur = cur
+
+    def cursor(self):
+        return self.cur
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+def _state():
+    return TravelState(
+        origin="SFO", destination="Paris", destination_city="Paris",
+        start_date="2025-06-01", end_date="2025-06-05",
+        flights=[{"airline": "Delta", "price": 320}],
+        accommodations=[{"name": "Hotel", "price": 120, "image": "h.jpg"}],
+        itinerary="Day 1: Louvre",
+    )
+
+def test_snapshot_round_trip_is_one_query(monkeypatch):
+    """
+    save_trip_plan writes a snapshot; a hit on it is served with a single query.
+    """
+    save_cur = FakeCursor()
+    monkeypatch.setattr(ops, "get_conn", lambda: FakeConn(save_cur))
+    ops.save_trip_plan(_state())
+    snapshot = save_cur.statements[0][1][16]
+    assert json.loads(snapshot)["itinerary"] == "Day 1: Louvre"
+
+    read_cur = FakeCursor(trip_row=(7, None, None, "Paris", snapshot))
+    monkeypatch.setattr(ops, "get_conn", lambda: FakeConn(read_cur))
+    result = ops.find_cached_trip(_state())
+
+    assert len(read_cur.statements) == 1
+    assert result["cached"] is True
+    assert result["flights"] == [{"airline": "Delta", "price": 320}]
+    assert result["accommodations"][0]["image"] == "h.jpg"
+
+def test_legacy_rows_fall_back_to_component_queries(monkeypatch):
+    cur = FakeCursor(trip_row=(7, None, "San Francisco", "Paris", None))
+    monkeypatch.setattr(ops, "get_conn", lambda: FakeConn(cur))
+    result = ops.find_cached_trip(_state())
+
+    assert len(cur.statements) == 9
+    assert result["destination_city"] == "Paris"
+    assert result["flights"] == []
@@ -0,0 +1,32 @@
+import json
+from api.protocol import DELTA, FULL, PlanUpdate, changed_keys, merge_update, negotiate, snapshot_message
+from utils.metrics import metrics
+
+def test_delta_updates_carry_only_changed_keys():
+    state = {"flights": [{"airline": "Delta", "details": "x" * 5000}], "weather_summary": "Sunny"}
+    changes = changed_keys(state, {"weather_summary": "Sunny", "itinerary": "Day 1"})
+    assert changes == {"itinerary": "Day 1"}
+
+    update = PlanUpdate(3, "itinerary", changes, {**state, **changes})
+    delta = json.loads(update.encode(DELTA))
+    full = json.loads(update.encode(FULL))
+    assert delta == {"type": "delta", "seq": 3, "step": "itinerary", "message": "Completed itinerary",
+                     "changes": {"itinerary": "Day 1"}}
+    assert full["type"] == "update" and full["data"]["flights"]
+    assert update.encode(DELTA) is update.encode(DELTA)     # encoded once, shared
+    assert len(update.encode(DELTA)) * 20 < len(update.encode(FULL))
+
+    assert metrics.percentile(f"ws.payload_bytes.{DELTA}.itinerary", 50) < metrics.percentile(f"ws.payload_bytes.{FULL}.itinerary", 50)
+
+def test_protocol_negotiation_and_snapshot():
+    assert negotiate({}) == FULL
+    assert negotiate({"protocol": "delta"}) == DELTA
+    assert negotiate({"protocol": "bogus"}) == FULL
+    assert json.loads(snapshot_message(7, {"itinerary": "Day 1"})) == {
+        "type": "snapshot", "seq": 7, "message": "Resynchronized", "data": {"itinerary": "Day 1"}}
+
+def test_branch_timings_accumulate_across_updates():
+    state = {"node_timings": {"weather": 0.4}, "weather_summary": "Sunny"}
+    update = merge_update(state, {"node_timings": {"flight_api": 1.2}, "flights": []})
+    assert update == {"node_timings": {"weather": 0.4, "flight_api": 1.2}, "flights": []}
+    assert changed_keys(state, update) == update
@@ -0,0 +1,154 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from utils.logger import logger
+from utils.metrics import metrics
+
+
+class TieredCache:
+    """
+    Two-tier TTL cache: a bounded in-memory LRU in front of an optional SQLite
+    file that survives restarts and is shared by workers on the same host.
+
+    Values must be JSON-serializable. They are stored serialized in both tiers
+    so callers never share mutable objects through the cache.
+
+    Expired disk rows are purged on open and every PURGE_EVERY writes;
+    max_disk_entries additionally caps the disk tier.
+    """
+
+    PURGE_EVERY = 256
+
+    def __init__(self, name: str, path: Optional[str] = None, max_entries: int = 512,
+                 max_disk_entries: Optional[int] = None):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries   # None = bounded by TTL only
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._db = None
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "sets": 0, "evictions": 0}
+        self._writes = 0
+
+        if path:
+            self._open(path)
+
+        metrics.register_gauge(f"cache.{name}", self.stats)
+
+    def _open(self, path: str) -> None:
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False, timeout=5)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT, expires_at REAL)"
+            )
+            self._db.commit()
+            self.purge_expired()
+        except Exception as e:
+            logger.warning(f"⚠️ Disk cache '{self.name}' unavailable ({e}). Using memory only.")
+            self._db = None
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, raw = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return json.loads(raw)
+                del self._memory[key]
+
+            if self._db is not None:
+                try:
+                    row = self._db.execute(
+                        "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    logger.warning(f"⚠️ Disk cache read failed: {e}")
+                    row = None
+                if row and row[1] > now:
+                    self._remember(key, row[1], row[0])
+                    self._stats["disk_hits"] += 1
+                    return json.loads(row[0])
+
+            self._stats["misses"] += 1
+            return None
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """Store a value in both tiers for `ttl` seconds."""
+        expires_at = time.time() + ttl
+        raw = json.dumps(value, default=str)
+        with self._lock:
+            self._remember(key, expires_at, raw)
+            self._stats["sets"] += 1
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                        (key, raw, expires_at),
+                    )
+                    if self.max_disk_entries:
+                        self._trim_disk()
+                    self._db.commit()
+                    self._writes += 1
+                    if self._writes % self.PURGE_EVERY == 0:
+                        self.purge_expired()
+                except sqlite3.Error as e:
+                    logger.warning(f"⚠️ Disk cache write failed: {e}")
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._memory.pop(key, None)
+            if self._db is not None:
+                self._db.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._db.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM cache")
+                self._db.commit()
+
+    def purge_expired(self) -> int:
+        """Drop expired rows from the disk tier. Returns the number removed."""
+        if self._db is None:
+            return 0
+        with self._lock:
+            cur = self._db.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+            self._db.commit()
+            return cur.rowcount
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["memory_hits"] + stats["disk_hits"]) / lookups, 3) if lookups else 0.0
+        return stats
+
+    def _trim_disk(self) -> None:
+        """Drop the rows closest to expiry beyond max_disk_entries (LRU when TTLs are refreshed on use)."""
+        cur = self._db.execute(
+            "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,),
+        )
+        self._stats["evictions"] += max(cur.rowcount, 0)
+
+    def _remember(self, key: str, expires_at: float, raw: str) -> None:
+        self._memory[key] = (expires_at, raw)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
@@ -0,0 +1,39 @@
+import asyncio
+import os
+import weakref
+
+import httpx
+
+from utils.logger import logger
+
+# One pooled client per event loop: httpx.AsyncClient is bound to the loop it
+# was first used on, and uvicorn / tests may run several loops in one process.
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    Return the shared async HTTP client for the running event loop.
+    Used by the async agent nodes for SerpAPI and OpenWeather calls.
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(float(os.getenv("HTTP_TIMEOUT_SECONDS", "30"))),
+            limits=httpx.Limits(
+                max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "100")),
+                max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE", "20")),
+            ),
+        )
+        _clients[loop] = client
+        logger.info("🌐 Created shared async HTTP client")
+    return client
+
+
+async def close_async_client() -> None:
+    """Close the shared client of the running loop (call on server shutdown)."""
+    loop = asyncio.get_running_loop()
+    client = _clients.pop(loop, None)
+    if client is not None and not client.is_closed:
+        await client.aclose()
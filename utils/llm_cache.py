@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict
+
+from langchain_core.callbacks import UsageMetadataCallbackHandler
+
+from utils.cache import TieredCache
+from utils.llm_factory import model_name
+from utils.logger import setup_logger
+from utils.metrics import metrics
+
+logger = setup_logger("llm_cache")
+
+# Exact-match response cache for deterministic (temperature 0) chains. Opt in
+# per chain by building it as a CachedChain. Every hit refreshes the entry's
+# TTL, so the oldest-expiring rows dropped past LLM_CACHE_MAX_ENTRIES are the
+# least recently used ones.
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() != "false"
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 60 * 60)))
+
+def _default_llm_cache():
+    if not LLM_CACHE_ENABLED:
+        return None
+    max_entries = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2048"))
+    return TieredCache(
+        "llm_responses",
+        path=os.getenv("LLM_CACHE_PATH", ".cache/llm.sqlite"),
+        max_entries=max_entries,
+        max_disk_entries=max_entries,
+    )
+
+_llm_cache = _default_llm_cache()
+_chain_names = set()
+
+def set_llm_cache(cache) -> None:
+    """Swap the response cache backend (a TieredCache or compatible); None disables it."""
+    global _llm_cache
+    _llm_cache = cache
+
+def _digest(*parts) -> str:
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+def llm_identity(llm) -> str:
+    """Models (and temperature) that can answer through `llm`, fallbacks included."""
+    models = getattr(llm, "models", None)                       # HedgedLLM
+    if models is None and hasattr(llm, "fallbacks"):            # with_fallbacks()
+        models = [llm.runnable, *llm.fallbacks]
+    models = models or [llm]
+    return ",".join(f"{model_name(m)}@{getattr(m, 'temperature', None)}" for m in models)
+
+
+class CachedChain:
+    """
+    prompt | llm | parser with responses cached on (models, prompt template,
+    rendered inputs). Editing the template or switching models changes the key.
+    """
+
+    def __init__(self, name: str, prompt, llm, parser):
+        self.name = name
+        self.chain = prompt | llm | parser
+        self.version = _digest(llm_identity(llm), prompt.pretty_repr())[:12]
+        _chain_names.add(name)
+
+    def _key(self, inputs: Dict[str, Any]) -> str:
+        return f"{self.name}:{self.version}:{_digest(inputs)}"
+
+    def _lookup(self, key: str):
+        if _llm_cache is None:
+            return None
+        entry = _llm_cache.get(key)
+        metrics.incr(f"llm_cache.{self.name}.{'hit' if entry is not None else 'miss'}")
+        if entry is not None:
+            metrics.incr(f"llm_cache.{self.name}.saved_seconds", entry["seconds"])
+            metrics.incr(f"llm_cache.{self.name}.saved_tokens", entry["tokens"])
+            _llm_cache.set(key, entry, LLM_CACHE_TTL)     # refresh recency
+            logger.info(f"♻️ Reusing cached {self.name} response")
+        return entry
+
+    def _store(self, key: str, value, started: float, usage: UsageMetadataCallbackHandler) -> None:
+        if _llm_cache is None:
+            return
+        tokens = sum(u.get("total_tokens", 0) for u in usage.usage_metadata.values())
+        try:
+            _llm_cache.set(key, {"value": value, "seconds": time.perf_counter() - started, "tokens": tokens},
+                           LLM_CACHE_TTL)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not cache {self.name} response: {e}")
+
+    def invoke(self, inputs: Dict[str, Any]):
+        key = self._key(inputs)
+        entry = self._lookup(key)
+        if entry is not None:
+            return entry["value"]
+        usage, started = UsageMetadataCallbackHandler(), time.perf_counter()
+        value = self.chain.invoke(inputs, config={"callbacks": [usage]})
+        self._store(key, value, started, usage)
+        return value
+
+    async def ainvoke(self, inputs: Dict[str, Any]):
+        key = self._key(inputs)
+        entry = self._lookup(key)
+        if entry is not None:
+            return entry["value"]
+        usage, started = UsageMetadataCallbackHandler(), time.perf_counter()
+        value = await self.chain.ainvoke(inputs, config={"callbacks": [usage]})
+        self._store(key, value, started, usage)
+        return value
+
+def llm_cache_stats() -> Dict[str, dict]:
+    """Per-chain hit rate and the latency / tokens the hits saved."""
+    stats = {}
+    for name in sorted(_chain_names):
+        hits, misses = metrics.counter(f"llm_cache.{name}.hit"), metrics.counter(f"llm_cache.{name}.miss")
+        stats[name] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+            "saved_seconds": round(metrics.counter(f"llm_cache.{name}.saved_seconds"), 2),
+            "saved_tokens": metrics.counter(f"llm_cache.{name}.saved_tokens"),
+        }
+    return stats
+
+metrics.register_gauge("llm_cache", llm_cache_stats)
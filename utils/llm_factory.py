@@ -1,9 +1,27 @@
 from langchain_openai import ChatOpenAI
 from langchain_community.chat_models import ChatAnthropic
 from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
 from utils.logger import logger
+from utils.metrics import metrics
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Dict, List
+import asyncio
+import threading
+import time
 import os
 
+# Hedged routing (see HedgedLLM)
+LLM_ROUTER_ENABLED = os.getenv("LLM_ROUTER_ENABLED", "true").lower() != "false"
+HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "90"))
+HEDGE_MIN_SECONDS = float(os.getenv("LLM_HEDGE_MIN_SECONDS", "2"))
+HEDGE_DEFAULT_SECONDS = float(os.getenv("LLM_HEDGE_DEFAULT_SECONDS", "15"))
+STATS_WINDOW = int(os.getenv("LLM_STATS_WINDOW", "50"))
+MIN_SAMPLES = int(os.getenv("LLM_MIN_SAMPLES", "5"))
+DEMOTE_ERROR_RATE = float(os.getenv("LLM_DEMOTE_ERROR_RATE", "0.5"))
+DEMOTE_SECONDS = float(os.getenv("LLM_DEMOTE_SECONDS", "300"))
+
 class FallbackLLM:
     """
     A simple wrapper that tries a list of LLMs in order until one succeeds.
@@ -25,15 +43,270 @@ class FallbackLLM:
         logger.error("❌ All fallback models failed.")
         raise last_exception
 
-def get_llm(temperature=0.7) -> BaseChatModel:
+def model_name(model) -> str:
+    return getattr(model, "model_name", None) or getattr(model, "model", None) or type(model).__name__
+
+
+class ModelStats:
     """
-    Returns an LLM with fallback capabilities.
-    Order: GPT-4o -> Claude 3.5 Sonnet -> Llama (via Groq or Local)
+    Rolling per-model health shared by every router in the process:
+    latencies per route (prompts differ wildly in length) and recent
+    outcomes per model ("ok", "error", or "slow" = lost a hedge).
     """
-    
-    # 1. Primary: GPT-4o
-    primary = ChatOpenAI(model="gpt-4o", temperature=temperature)
-    
+
+    def __init__(self, window: int = STATS_WINDOW):
+        self.window = window
+        self._latencies: Dict[tuple, deque] = {}
+        self._outcomes: Dict[str, deque] = {}
+        self._demoted_until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def record(self, route: str, model: str, outcome: str, seconds: float = None) -> None:
+        with self._lock:
+            if seconds is not None and outcome == "ok":
+                self._latencies.setdefault((route, model), deque(maxlen=self.window)).append(seconds)
+            outcomes = self._outcomes.setdefault(model, deque(maxlen=self.window))
+            outcomes.append(outcome)
+            bad = sum(1 for o in outcomes if o != "ok")
+            if len(outcomes) >= MIN_SAMPLES and bad / len(outcomes) >= DEMOTE_ERROR_RATE \
+                    and self._demoted_until.get(model, 0) < time.time():
+                self._demoted_until[model] = time.time() + DEMOTE_SECONDS
+                outcomes.clear()    # judged afresh once the demotion expires
+                metrics.incr(f"llm.{model}.demoted")
+                logger.warning(f"⚠️ Demoting {model} for {DEMOTE_SECONDS:.0f}s ({bad} slow/failed of last calls)")
+        if seconds is not None:
+            metrics.observe(f"llm.{model}.seconds", seconds)
+        metrics.incr(f"llm.{model}.{outcome}")
+
+    def hedge_after(self, route: str, model: str) -> float:
+        """Seconds to wait on `model` before hedging: its rolling latency percentile."""
+        with self._lock:
+            samples = sorted(self._latencies.get((route, model), ()))
+        if len(samples) < MIN_SAMPLES:
+            return HEDGE_DEFAULT_SECONDS
+        idx = min(len(samples) - 1, int(round(HEDGE_PERCENTILE / 100 * (len(samples) - 1))))
+        return max(HEDGE_MIN_SECONDS, samples[idx])
+
+    def demoted(self, model: str) -> bool:
+        with self._lock:
+            return self._demoted_until.get(model, 0) > time.time()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "demoted": [m for m, until in self._demoted_until.items() if until > time.time()],
+                "outcomes": {m: {o: list(d).count(o) for o in ("ok", "error", "slow")} for m, d in self._outcomes.items()},
+            }
+
+model_stats = ModelStats()
+metrics.register_gauge("llm_router", model_stats.snapshot)
+
+# Hedged sync calls run here; a losing call finishes in the background
+_hedge_pool = ThreadPoolExecutor(max_workers=int(os.getenv("LLM_HEDGE_WORKERS", "16")), thread_name_prefix="llm-hedge")
+
+
+class HedgedLLM(BaseChatModel):
+    """
+    Latency-aware router over several chat models (preference order).
+
+    - Healthy models are tried in order; demoted ones (too many recent errors
+      or lost hedges) go last until their demotion expires.
+    - If the current model has not answered within its rolling latency
+      percentile for this route, the next model is started as a hedge and
+      the first valid answer wins. Errors start the next model immediately.
+    - Streaming does not hedge (chunks cannot be merged): it fails over to
+      the next model only if the current one errors before its first chunk.
+    """
+
+    models: List[BaseChatModel]
+    route: str = "default"
+    stats: Any = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "hedged_router"
+
+    def _stats(self) -> ModelStats:
+        return self.stats or model_stats
+
+    def _ordered(self) -> List[BaseChatModel]:
+        stats = self._stats()
+        healthy = [m for m in self.models if not stats.demoted(model_name(m))]
+        return healthy + [m for m in self.models if m not in healthy]
+
+    def _hedge_after(self, model) -> float:
+        return self._stats().hedge_after(self.route, model_name(model))
+
+    def _timed_call(self, model, messages, stop, abandoned: threading.Event, **kwargs):
+        started = time.perf_counter()
+        try:
+            message = model.invoke(messages, stop=stop, **kwargs)
+        except Exception:
+            if not abandoned.is_set():
+                self._stats().record(self.route, model_name(model), "error")
+            raise
+        if not abandoned.is_set():
+            self._stats().record(self.route, model_name(model), "ok", time.perf_counter() - started)
+        return message
+
+    async def _atimed_call(self, model, messages, stop, abandoned: threading.Event, **kwargs):
+        started = time.perf_counter()
+        try:
+            message = await model.ainvoke(messages, stop=stop, **kwargs)
+        except asyncio.CancelledError:
+            # Only a lost hedge counts against the model, not the caller giving up
+            if abandoned.is_set():
+                self._stats().record(self.route, model_name(model), "slow")
+            raise
+        except Exception:
+            self._stats().record(self.route, model_name(model), "error")
+            raise
+        self._stats().record(self.route, model_name(model), "ok", time.perf_counter() - started)
+        return message
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        order = self._ordered()
+        pending: Dict[Any, tuple] = {}
+        next_idx = 0
+        last_error = None
+        won = False
+
+        def launch():
+            nonlocal next_idx
+            model, abandoned = order[next_idx], threading.Event()
+            next_idx += 1
+            pending[_hedge_pool.submit(self._timed_call, model, messages, stop, abandoned, **kwargs)] = (model, abandoned)
+
+        try:
+            while True:
+                if not pending:
+                    if next_idx >= len(order):
+                        raise last_error
+                    launch()
+                timeout = self._hedge_after(order[next_idx - 1]) if next_idx < len(order) else None
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    metrics.incr("llm.hedged")
+                    logger.info(f"⏱️ {model_name(order[next_idx - 1])} is slow. Hedging with {model_name(order[next_idx])}")
+                    launch()
+                    continue
+                for future in done:
+                    model, _ = pending.pop(future)
+                    try:
+                        message = future.result()
+                    except Exception as e:
+                        logger.warning(f"⚠️ {model_name(model)} failed: {e}. Trying next model...")
+                        last_error = e
+                        continue
+                    won = True
+                    return ChatResult(generations=[ChatGeneration(message=message)])
+        finally:
+            # Threads cannot be cancelled: losers finish in the background unrecorded
+            for model, abandoned in pending.values():
+                abandoned.set()
+                if won:
+                    self._stats().record(self.route, model_name(model), "slow")
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        order = self._ordered()
+        pending: Dict[asyncio.Task, tuple] = {}
+        next_idx = 0
+        last_error = None
+        won = False
+
+        def launch():
+            nonlocal next_idx
+            model, abandoned = order[next_idx], threading.Event()
+            next_idx += 1
+            pending[asyncio.create_task(self._atimed_call(model, messages, stop, abandoned, **kwargs))] = (model, abandoned)
+
+        try:
+            while True:
+                if not pending:
+                    if next_idx >= len(order):
+                        raise last_error
+                    launch()
+                timeout = self._hedge_after(order[next_idx - 1]) if next_idx < len(order) else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    metrics.incr("llm.hedged")
+                    logger.info(f"⏱️ {model_name(order[next_idx - 1])} is slow. Hedging with {model_name(order[next_idx])}")
+                    launch()
+                    continue
+                for task in done:
+                    model, _ = pending.pop(task)
+                    try:
+                        message = task.result()
+                    except Exception as e:
+                        logger.warning(f"⚠️ {model_name(model)} failed: {e}. Trying next model...")
+                        last_error = e
+                        continue
+                    won = True
+                    return ChatResult(generations=[ChatGeneration(message=message)])
+        finally:
+            for task, (model, abandoned) in pending.items():
+                if won:
+                    abandoned.set()     # recorded as "slow" by _atimed_call
+                task.cancel()
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        last_error = None
+        for model in self._ordered():
+            started, yielded = time.perf_counter(), False
+            try:
+                for chunk in model.stream(messages, stop=stop, **kwargs):
+                    yielded = True
+                    yield ChatGenerationChunk(message=chunk)
+            except Exception as e:
+                self._stats().record(self.route, model_name(model), "error")
+                if yielded:
+                    raise
+                logger.warning(f"⚠️ {model_name(model)} failed: {e}. Trying next model...")
+                last_error = e
+                continue
+            self._stats().record(self.route, model_name(model), "ok", time.perf_counter() - started)
+            return
+        raise last_error
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        last_error = None
+        for model in self._ordered():
+            started, yielded = time.perf_counter(), False
+            try:
+                async for chunk in model.astream(messages, stop=stop, **kwargs):
+                    yielded = True
+                    yield ChatGenerationChunk(message=chunk)
+            except Exception as e:
+                self._stats().record(self.route, model_name(model), "error")
+                if yielded:
+                    raise
+                logger.warning(f"⚠️ {model_name(model)} failed: {e}. Trying next model...")
+                last_error = e
+                continue
+            self._stats().record(self.route, model_name(model), "ok", time.perf_counter() - started)
+            return
+        raise last_error
+
+# Process-wide client registry: one client (and HTTP connection pool) per
+# provider model and temperature, one router per temperature and route.
+_clients: Dict[tuple, BaseChatModel] = {}
+_clients_lock = threading.RLock()    # routers build their clients under it
+
+def _shared(key: tuple, build):
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = build()
+            metrics.incr("llm.clients_created")
+        return _clients[key]
+
+def clear_llm_clients() -> None:
+    """Drop every shared client (e.g. after rotating API keys)."""
+    with _clients_lock:
+        _clients.clear()
+
+metrics.register_gauge("llm_clients", lambda: len(_clients))
+
+def _fallback_clients(temperature) -> List[BaseChatModel]:
     fallbacks = []
 
     # 2. Secondary: Claude 3.5 Sonnet (if key exists)
@@ -41,7 +314,8 @@ def get_llm(temperature=0.7) -> BaseChatModel:
     # Assuming standard LangChain setup. If API key missing, we skip.
     if os.getenv("ANTHROPIC_API_KEY"):
          try:
-             claude = ChatAnthropic(model="claude-3-5-sonnet-20240620", temperature=temperature)
+             claude = _shared(("claude-3-5-sonnet-20240620", temperature),
+                              lambda: ChatAnthropic(model="claude-3-5-sonnet-20240620", temperature=temperature))
              fallbacks.append(claude)
          except Exception as e:
              logger.warning(f"Could not initialize Claude fallback: {e}")
@@ -50,15 +324,35 @@ def get_llm(temperature=0.7) -> BaseChatModel:
     if os.getenv("GROQ_API_KEY"):
         try:
             from langchain_groq import ChatGroq
-            llama = ChatGroq(model_name="llama3-70b-8192", temperature=temperature)
+            llama = _shared(("llama3-70b-8192", temperature),
+                            lambda: ChatGroq(model_name="llama3-70b-8192", temperature=temperature))
             fallbacks.append(llama)
         except ImportError:
              logger.warning("langchain_groq not installed. Skipping Groq fallback.")
         except Exception as e:
              logger.warning(f"Could not initialize Groq fallback: {e}")
+    return fallbacks
+
+def get_llm(temperature=0.7, route: str = "default") -> BaseChatModel:
+    """
+    Returns an LLM with fallback capabilities.
+    Order: GPT-4o -> Claude 3.5 Sonnet -> Llama (via Groq or Local)
+    With several models available, calls are hedged (see HedgedLLM); `route`
+    names the prompt so latency percentiles are tracked per use.
+    Clients are shared process-wide, so calling this per request is cheap.
+    """
+    return _shared(("router", temperature, route), lambda: _build_llm(temperature, route))
+
+def _build_llm(temperature, route) -> BaseChatModel:
+    # 1. Primary: GPT-4o
+    primary = _shared(("gpt-4o", temperature), lambda: ChatOpenAI(model="gpt-4o", temperature=temperature))
+    fallbacks = _fallback_clients(temperature)
 
     if not fallbacks:
         return primary
+
+    if LLM_ROUTER_ENABLED:
+        return HedgedLLM(models=[primary, *fallbacks], route=route)
     
     # Use LangChain's native fallback feature for best compatibility
     return primary.with_fallbacks(fallbacks)
@@ -1,4 +1,5 @@
 import os
+import asyncio
 from typing import List, Dict, Any
 from mem0 import MemoryClient
 from utils.logger import logger
@@ -76,3 +77,11 @@ class MemoryManager:
     def get_all_memories(self, user_id: str) -> List[str]:
         """Wrapper to get all memories without specific query."""
         return self.get_memories(user_id)
+
+    # Async variants: the Mem0 client is blocking, so calls are offloaded to a
+    # worker thread instead of stalling the event loop.
+    async def aadd_memory(self, user_id: str, text: str) -> None:
+        await asyncio.to_thread(self.add_memory, user_id, text)
+
+    async def aget_memories(self, user_id: str, query: str = None) -> List[str]:
+        return await asyncio.to_thread(self.get_memories, user_id, query)
@@ -0,0 +1,79 @@
+import threading
+from collections import defaultdict, deque
+from typing import Any, Callable, Dict
+
+
+class Metrics:
+    """
+    Minimal in-process metrics registry (counters, timings and gauges).
+    Exposed as JSON by the API server's /metrics endpoint.
+    """
+
+    def __init__(self, window: int = 500):
+        self._lock = threading.Lock()
+        self._window = window
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._timings: Dict[str, deque] = {}
+        self._timing_totals: Dict[str, list] = {}
+        self._gauges: Dict[str, Callable[[], Any]] = {}
+
+    def incr(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] += value
+
+    def observe(self, name: str, value: float) -> None:
+        """Record a sample (e.g. latency in seconds or payload bytes)."""
+        with self._lock:
+            samples = self._timings.get(name)
+            if samples is None:
+                samples = self._timings[name] = deque(maxlen=self._window)
+                self._timing_totals[name] = [0, 0.0]
+            samples.append(value)
+            self._timing_totals[name][0] += 1
+            self._timing_totals[name][1] += value
+
+    def register_gauge(self, name: str, fn: Callable[[], Any]) -> None:
+        """Register a callable evaluated on every snapshot (pool sizes, cache stats...)."""
+        with self._lock:
+            self._gauges[name] = fn
+
+    def counter(self, name: str) -> float:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def percentile(self, name: str, pct: float):
+        """Percentile over the recent window, or None without samples."""
+        with self._lock:
+            samples = sorted(self._timings.get(name, ()))
+        if not samples:
+            return None
+        idx = min(len(samples) - 1, max(0, int(round(pct / 100 * (len(samples) - 1)))))
+        return samples[idx]
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            timings = {}
+            for name, samples in self._timings.items():
+                ordered = sorted(samples)
+                count, total = self._timing_totals[name]
+                timings[name] = {
+                    "count": count,
+                    "avg": round(total / count, 4) if count else 0,
+                    "p50": ordered[len(ordered) // 2],
+                    "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+                    "max": ordered[-1],
+                }
+            gauges = dict(self._gauges)
+
+        snapshot = {"counters": counters, "timings": timings, "gauges": {}}
+        for name, fn in gauges.items():
+            try:
+                snapshot["gauges"][name] = fn()
+            except Exception as e:
+                snapshot["gauges"][name] = f"error: {e}"
+        return snapshot
+
+
+# Create a default registry instance for easy import
+metrics = Metrics()
@@ -0,0 +1,122 @@
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from utils.logger import setup_logger
+from utils.metrics import metrics
+
+logger = setup_logger("singleflight")
+
+
+class SharedStream:
+    """
+    Event stream of one shared run. Every subscriber sees every event: late
+    subscribers first replay what they missed, then follow live.
+    """
+
+    def __init__(self):
+        self._events: List[Any] = []
+        self._result: Any = None
+        self._error: Optional[BaseException] = None
+        self._closed = False
+        self._cond = asyncio.Condition()
+
+    async def publish(self, event: Any) -> None:
+        async with self._cond:
+            self._events.append(event)
+            self._cond.notify_all()
+
+    async def finish(self, result: Any = None, error: Optional[BaseException] = None) -> None:
+        async with self._cond:
+            self._result, self._error, self._closed = result, error, True
+            self._cond.notify_all()
+
+    async def events(self) -> AsyncIterator[Any]:
+        seen = 0
+        while True:
+            async with self._cond:
+                await self._cond.wait_for(lambda: seen < len(self._events) or self._closed)
+                batch, closed = self._events[seen:], self._closed
+            for event in batch:
+                yield event
+            seen += len(batch)
+            if closed and seen >= len(self._events):
+                return
+
+    async def result(self) -> Any:
+        """Final result once the run has finished (re-raises its error)."""
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._closed)
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent async work by key (per process).
+
+    The first caller for a key starts the coroutine as a task; callers that
+    arrive while it is running await the same task. The task is not tied to
+    any caller, so it finishes (and e.g. saves its result) even if every
+    waiter disconnects.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._streams: Dict[str, SharedStream] = {}
+        self._stats = {"started": 0, "joined": 0, "failed": 0}
+        metrics.register_gauge(f"singleflight.{name}", self.stats)
+
+    def start(self, key: str, factory: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """Return the in-flight task for `key`, starting `factory()` if there is none."""
+        task = self._inflight.get(key)
+        if task is not None:
+            self._stats["joined"] += 1
+            return task
+        task = asyncio.create_task(factory())
+        self._inflight[key] = task
+        self._stats["started"] += 1
+        task.add_done_callback(lambda t: self._done(key, t))
+        return task
+
+    async def run(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Await the shared result. Cancelling one waiter does not cancel the work."""
+        return await asyncio.shield(self.start(key, factory))
+
+    def stream(self, key: str, producer: Callable[[SharedStream], Awaitable[Any]]) -> SharedStream:
+        """
+        Like start(), for runs that publish progress: `producer(stream)` runs
+        once per key and every caller subscribes to the same SharedStream.
+        """
+        if key in self._inflight and key in self._streams:
+            self._stats["joined"] += 1
+            return self._streams[key]
+        shared = SharedStream()
+
+        async def run():
+            try:
+                result = await producer(shared)
+            except BaseException as e:     # incl. cancellation: never leave subscribers waiting
+                await shared.finish(error=e)
+                raise
+            await shared.finish(result=result)
+            return result
+
+        self._streams[key] = shared
+        self.start(key, run)
+        return shared
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._inflight
+
+    def _done(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+            self._streams.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            self._stats["failed"] += 1
+            logger.error(f"❌ {self.name} task for {key} failed: {task.exception()}")
+
+    def stats(self) -> dict:
+        return {**self._stats, "in_flight": len(self._inflight)}